@@ -0,0 +1,181 @@
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# === CONFIGURATION ===
+
+# Descriptions that overlap no segment are joined to the nearest one within this distance
+ALIGN_MAX_DRIFT_SECONDS = 5
+TIMESTAMP_PATTERN = re.compile(r"\b(?:\d{1,2}:)?\d{1,2}:\d{2}\b")
+
+
+def parse_timestamp(value) -> int:
+    """Whole seconds for "HH:MM:SS", "MM:SS" or a number; -1 if it cannot be parsed."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        seconds = 0
+        for part in str(value).strip().split(":"):
+            seconds = seconds * 60 + int(float(part))
+        return seconds
+    except ValueError:
+        return -1
+
+
+def format_timestamp(seconds: int) -> str:
+    """Inverse of ``parse_timestamp``: "HH:MM:SS" ("" for unparseable timestamps)."""
+    if seconds < 0:
+        return ""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def find_timestamps(text: str) -> List[int]:
+    """Seconds for every "MM:SS" / "HH:MM:SS" mentioned in ``text`` (e.g. a question)."""
+    return [parse_timestamp(match) for match in TIMESTAMP_PATTERN.findall(text)]
+
+
+def record_bounds(records: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and end seconds of records with "start_time"/"end_time" timestamps."""
+    starts = np.array([parse_timestamp(record.get("start_time")) for record in records], dtype=np.int64)
+    ends = np.array([parse_timestamp(record.get("end_time")) for record in records], dtype=np.int64)
+    return starts, np.maximum(ends, starts + 1)
+
+
+class IntervalIndex:
+    """Half-open intervals ``[start, end)`` in whole seconds, searchable in O(log n).
+
+    ``starts`` must be ascending. Intervals may overlap (caption segments often do),
+    so a running maximum of the ends is kept alongside: the intervals that can reach
+    past a time ``t`` all lie after the first position whose running maximum does, which
+    makes both bounds of a lookup a binary search. Positions returned are indexes
+    into ``starts``; indexes built with ``from_bounds``/``from_records`` map them
+    back to the caller's order.
+    """
+
+    def __init__(self, starts, ends, running_max_end=None):
+        self.starts = starts
+        self.ends = ends
+        self.running_max_end = (np.maximum.accumulate(np.maximum(ends, starts + 1)) if running_max_end is None
+                                else running_max_end)
+        self.order: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_bounds(cls, starts: np.ndarray, ends: np.ndarray) -> "IntervalIndex":
+        """Index intervals given in any order."""
+        order = np.argsort(starts, kind="stable")
+        index = cls(starts[order], ends[order])
+        index.order = order
+        return index
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "IntervalIndex":
+        """Index records with "start_time"/"end_time" timestamps, in any order."""
+        return cls.from_bounds(*record_bounds(records))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlapping(self, start: int, end: int) -> np.ndarray:
+        """Positions of intervals overlapping ``[start, end)``, in start order."""
+        end = max(end, start + 1)
+        first = int(np.searchsorted(self.running_max_end, start, side="right"))
+        last = int(np.searchsorted(self.starts, end, side="left"))
+        if first >= last:
+            return np.empty(0, dtype=np.int64)
+        # Zero-length segments (sub-second captions rounded down) still cover their second
+        ends = np.maximum(self.ends[first:last], self.starts[first:last] + 1)
+        positions = first + np.flatnonzero(ends > start)
+        return positions if self.order is None else self.order[positions]
+
+    def at(self, seconds: int) -> np.ndarray:
+        """Positions of intervals covering the time ``seconds``."""
+        return self.overlapping(seconds, seconds + 1)
+
+    def nearest(self, seconds: int) -> int:
+        """Position of the interval starting closest to ``seconds`` (-1 if empty)."""
+        if not len(self.starts):
+            return -1
+        right = int(np.searchsorted(self.starts, seconds))
+        candidates = [i for i in (right - 1, right) if 0 <= i < len(self.starts)]
+        best = min(candidates, key=lambda i: abs(int(self.starts[i]) - seconds))
+        return best if self.order is None else int(self.order[best])
+
+
+def align_descriptions(segments: List[Dict], descriptions: List[Dict]) -> Tuple[List[str], Dict, List[Dict]]:
+    """Join visual descriptions to transcript segments by time.
+
+    Returns one description per segment, a report, and the leftover descriptions
+    (unmatched, or landing on a segment that already has one) in their input order.
+
+    A description whose timestamps equal a segment's is joined to it directly.
+    Otherwise its interval is looked up in an ``IntervalIndex`` over the segments
+    and joined to the overlapping segment with the closest bounds, or to the nearest segment within
+    ALIGN_MAX_DRIFT_SECONDS. Only descriptions without usable timestamps fall back
+    to their position. The report counts how many were joined which way, how far
+    shifted ones drifted, and what was left over.
+    """
+    joined = [""] * len(segments)
+    leftovers = []
+    report = {"segments": len(segments), "descriptions": len(descriptions), "exact": 0, "shifted": 0,
+              "positional": 0, "max_drift_seconds": 0, "duplicates": 0, "unmatched": 0}
+    by_times: Dict[tuple, List[int]] = {}
+    for i, segment in enumerate(segments):
+        by_times.setdefault((segment.get("start_time"), segment.get("end_time")), []).append(i)
+    seg_starts, seg_ends = record_bounds(segments)
+    index = IntervalIndex.from_bounds(seg_starts, seg_ends)
+
+    for number, item in enumerate(descriptions):
+        # Segments can share timestamps; fill them in order
+        same_times = by_times.get((item.get("start_time"), item.get("end_time")), [])
+        position = next((i for i in same_times if not joined[i]), same_times[0] if same_times else None)
+        kind = "exact"
+        if position is None:
+            start, end = parse_timestamp(item.get("start_time")), parse_timestamp(item.get("end_time"))
+            end = max(end, start + 1)
+            if start < 0:
+                kind = "positional"
+                position = number if number < len(segments) else None
+            else:
+                kind = "shifted"
+                candidates = index.overlapping(start, end)
+                if len(candidates):
+                    # Overlapping caption segments: take the one whose bounds are closest
+                    distance = np.abs(seg_starts[candidates] - start) + np.abs(seg_ends[candidates] - end)
+                    distance += np.array([bool(joined[i]) for i in candidates]) * (1 << 30)
+                    position = int(candidates[int(np.argmin(distance))])
+                else:
+                    position = index.nearest(start)
+                if position is not None and position >= 0:
+                    drift = abs(int(seg_starts[position]) - start)
+                    if drift > ALIGN_MAX_DRIFT_SECONDS and not len(candidates):
+                        position = None
+                    else:
+                        report["max_drift_seconds"] = max(report["max_drift_seconds"], drift)
+                else:
+                    position = None
+        if position is None:
+            report["unmatched"] += 1
+            leftovers.append(item)
+        elif joined[position]:
+            report["duplicates"] += 1
+            leftovers.append(item)
+        else:
+            joined[position] = item.get("description") or ""
+            report[kind] += 1
+
+    report["missing"] = sum(1 for text in joined if not text)
+    return joined, report, leftovers
+
+
+def aligned_descriptions(video: Dict) -> Tuple[List[str], List[Dict]]:
+    """(description per transcript segment, leftover descriptions) of a final.json video."""
+    joined, _, leftovers = align_descriptions(video.get("transcription") or [], video.get("visual_description") or [])
+    return joined, leftovers
+
+
+def segment_descriptions(video: Dict) -> List[str]:
+    """Visual description for each transcript segment of a final.json video (see align_descriptions).
+
+    Descriptions no segment takes are left out; ``aligned_descriptions`` returns them too.
+    """
+    return aligned_descriptions(video)[0]
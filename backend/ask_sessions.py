@@ -0,0 +1,123 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from disk_cache import DiskCache, make_cache_key
+import token_budget
+
+# === CONFIGURATION ===
+
+ASK_SESSION_MAX_TURNS = int(os.getenv("ASK_SESSION_MAX_TURNS", "10"))  # question/answer pairs kept per session
+ASK_SESSION_HISTORY_TOKENS = int(os.getenv("ASK_SESSION_HISTORY_TOKENS", "8000"))  # older turns are dropped beyond this
+ASK_SESSION_TTL_MINUTES = float(os.getenv("ASK_SESSION_TTL_MINUTES", "60"))
+ASK_MAX_SESSIONS = int(os.getenv("ASK_MAX_SESSIONS", "1000"))
+ASK_CACHE_MAX_AGE_HOURS = float(os.getenv("ASK_CACHE_MAX_AGE_HOURS", "24"))
+ASK_CACHE_MAX_MB = float(os.getenv("ASK_CACHE_MAX_MB", "50"))
+
+SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Punctuation is dropped except ":" so timestamps in questions survive normalization
+QUESTION_NOISE = re.compile(r"[^\w\s:]+")
+
+# Answers to first questions keyed by (normalized question, corpus hash, prompt variant, model, budgets, prompts)
+answer_cache = DiskCache(
+    "answers",
+    max_age_seconds=ASK_CACHE_MAX_AGE_HOURS * 3600,
+    max_bytes=int(ASK_CACHE_MAX_MB * 1024 * 1024)
+)
+
+
+class SessionError(ValueError):
+    """Raised for an unusable session ID."""
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cased question without punctuation or repeated whitespace, for answer-cache keys."""
+    return " ".join(QUESTION_NOISE.sub(" ", question.lower()).split())
+
+
+def answer_key(question: str, corpus_hash: str, *config) -> str:
+    return make_cache_key(normalize_question(question), corpus_hash, *config)
+
+
+def corpus_hash(final_data: Dict) -> str:
+    """Hash of final.json's videos independent of their order (see canonical_videos)."""
+    return make_cache_key(canonical_videos(final_data))
+
+
+def canonical_videos(final_data: Dict) -> List[Dict]:
+    """final.json's videos in a fixed order (by video ID or URL), so the same corpus always
+    serializes to the same prompt prefix whatever order the videos were processed in."""
+    return sorted(final_data.get("videos", []), key=lambda video: str(video.get("video_id") or video.get("URL") or
+                                                                       video.get("url") or ""))
+
+
+class AskSession:
+    """One conversation with /ask: its question/answer turns, oldest first."""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.turns: List[Tuple[str, str]] = []
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def history(self, model: str, max_tokens: int = ASK_SESSION_HISTORY_TOKENS) -> List[Dict]:
+        """The most recent turns that fit ``max_tokens``, as chat messages."""
+        with self.lock:
+            turns = list(self.turns)
+        messages, used = [], 0
+        for question, answer in reversed(turns):
+            used += token_budget.counter.count(question, model) + token_budget.counter.count(answer, model)
+            if messages and used > max_tokens:
+                break
+            messages[:0] = [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        return messages
+
+    def append(self, question: str, answer: str):
+        with self.lock:
+            self.turns.append((question, answer))
+            del self.turns[:-ASK_SESSION_MAX_TURNS]
+            self.updated = time.monotonic()
+
+
+class SessionStore:
+    """In-memory /ask sessions per workspace, dropped after ASK_SESSION_TTL_MINUTES idle.
+
+    At most ``max_sessions`` are kept; the least recently used go first. Sessions
+    live in this process only, so a restart starts every conversation afresh.
+    """
+
+    def __init__(self, max_sessions: int = ASK_MAX_SESSIONS, ttl_seconds: float = ASK_SESSION_TTL_MINUTES * 60):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sessions: "OrderedDict[Tuple[str, str], AskSession]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, workspace_id: str, session_id: str) -> AskSession:
+        """The session ``session_id`` in ``workspace_id``, started on first use."""
+        if not SESSION_ID.match(session_id):
+            raise SessionError("session_id must be 1-64 letters, digits, '-' or '_'")
+        key = (workspace_id, session_id)
+        now = time.monotonic()
+        with self.lock:
+            while self.sessions:
+                oldest = next(iter(self.sessions.values()))
+                if now - oldest.updated <= self.ttl_seconds and len(self.sessions) < self.max_sessions:
+                    break
+                self.sessions.popitem(last=False)
+            session = self.sessions.pop(key, None) or AskSession(session_id)
+            session.updated = now
+            self.sessions[key] = session
+        return session
+
+    def end(self, workspace_id: str, session_id: str) -> bool:
+        with self.lock:
+            return self.sessions.pop((workspace_id, session_id), None) is not None
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {"sessions": len(self.sessions), "turns": sum(len(session.turns) for session in self.sessions.values())}
+
+
+sessions = SessionStore()
@@ -0,0 +1 @@
+"""Offline benchmarks against local stand-ins for the external APIs (see bench/run.py)."""
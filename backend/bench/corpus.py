@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+from alignment import format_timestamp, parse_timestamp
+
+# === CONFIGURATION ===
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SOURCE_FILES = ["data1.json", "data2.json", "data3.json", "data4.json"]
+MIN_SEGMENTS = 40  # short sources are repeated up to this many segments per video
+
+
+def load_sources(data_dir: Path = DATA_DIR) -> List[Dict]:
+    """The bundled sample analyses (``URL``, ``transcription``, ``visual_description``)."""
+    sources = []
+    for name in SOURCE_FILES:
+        with open(data_dir / name, "r", encoding="utf-8") as f:
+            sources.append(json.load(f))
+    return sources
+
+
+def video_id(number: int) -> str:
+    return f"bench{number:05d}"
+
+
+def video_url(number: int) -> str:
+    return f"https://www.youtube.com/watch?v={video_id(number)}"
+
+
+def synthesize_video(sources: List[Dict], number: int, min_segments: int = MIN_SEGMENTS) -> Dict:
+    """Video ``number`` of a synthetic corpus, in the per-video analysis shape.
+
+    Videos cycle through the sample files; each segment's text is tagged with the
+    video number so no two videos share cache entries, and short samples are
+    repeated (shifted in time) until they reach ``min_segments``.
+    """
+    source = sources[number % len(sources)]
+    base = source.get("transcription") or []
+    transcription, descriptions = [], []
+    descriptions_by_start = {item.get("start_time"): item.get("description", "") for item in source.get("visual_description") or []}
+    offset, repeat = 0, 0
+    while base and (repeat == 0 or len(transcription) < min_segments):
+        last_end = 0
+        for segment in base:
+            start = max(parse_timestamp(segment.get("start_time")), 0) + offset
+            end = max(parse_timestamp(segment.get("end_time")), start - offset + 1) + offset
+            last_end = max(last_end, end)
+            text = f"{segment.get('text', '')} (video {number}, part {repeat + 1})"
+            transcription.append({"start_time": format_timestamp(start), "end_time": format_timestamp(end), "text": text})
+            description = descriptions_by_start.get(segment.get("start_time")) or "A presenter at a desk with electronics."
+            descriptions.append({"start_time": format_timestamp(start), "end_time": format_timestamp(end), "description": description})
+        offset = last_end + 1
+        repeat += 1
+    return {
+        "video_id": video_id(number),
+        "title": f"Benchmark video {number}",
+        "url": video_url(number),
+        "transcription": transcription,
+        "visual_description": descriptions
+    }
+
+
+def synthesize_corpus(count: int, sources: Optional[List[Dict]] = None) -> List[Dict]:
+    """``count`` synthetic videos (see synthesize_video)."""
+    sources = sources or load_sources()
+    return [synthesize_video(sources, number) for number in range(count)]
+
+
+def raw_transcript(video: Dict) -> List[Dict]:
+    """The video's transcript as YouTube returns it (text, start, duration), for the transcript stub."""
+    raw = []
+    for segment in video["transcription"]:
+        start = parse_timestamp(segment["start_time"])
+        raw.append({"text": segment["text"], "start": float(start), "duration": float(parse_timestamp(segment["end_time"]) - start)})
+    return raw
+
+
+def final_json(videos: List[Dict]) -> Dict:
+    return {"total_videos": len(videos), "videos": videos}
+
+
+def podcast_text(videos: List[Dict], paragraph_chars: int = 700, max_chars: int = 20000) -> str:
+    """Podcast-like text built from the transcripts: paragraphs of about ``paragraph_chars``."""
+    paragraphs, current = [], ""
+    for video in videos:
+        for segment in video["transcription"]:
+            current = f"{current} {segment['text']}".strip()
+            if len(current) >= paragraph_chars:
+                paragraphs.append(current)
+                current = ""
+            if sum(len(paragraph) + 2 for paragraph in paragraphs) >= max_chars:
+                return "\n\n".join(paragraphs)
+    if current:
+        paragraphs.append(current)
+    return "\n\n".join(paragraphs)
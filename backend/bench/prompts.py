@@ -0,0 +1,177 @@
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import prompt_format
+import token_budget
+from alignment import segment_descriptions
+from bench import corpus
+
+# === CONFIGURATION ===
+
+# Modelled serving speed, for turning token counts into latency
+PREFILL_TOKENS_PER_S = 5000
+DECODE_TOKENS_PER_S = 300
+ASK_SEGMENTS = 40  # retrieved segments per /ask question (ASK_TOP_K)
+TAVUS_ITEMS = 5  # transcript/description items per video in the conversation context
+
+# The previous encodings, kept here only to measure against
+LEGACY_DESCRIPTION_PROMPT = """
+            You are an AI assistant analyzing a video. Based on the following transcript segments,
+            generate detailed visual descriptions for each segment. Focus on what a person would see
+            (e.g., people, objects, actions, text on screen).
+
+            Transcript segments:
+            {segments}
+
+            Generate visual descriptions in the following exact JSON format:
+            [
+                {{
+                    "start_time": "00:00:00",
+                    "end_time": "00:00:05",
+                    "description": "Detailed visual description here"
+                }},
+                ...
+            ]
+
+            Important instructions:
+            1. Match the start_time and end_time exactly with the transcript segments
+            2. Provide detailed visual descriptions
+            3. Return ONLY the JSON array, nothing else
+            4. Do not include any markdown formatting or code block markers
+            5. Ensure the JSON is valid and properly formatted
+            6. Use double quotes for all property names and string values
+            7. Do not include any explanatory text before or after the JSON
+            8. Make sure the JSON is complete and properly closed with a closing bracket
+            """
+
+
+def compact_json(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def legacy_segments(segments: List[Dict]) -> str:
+    lines, current_video = [], None
+    for segment in segments:
+        if segment["video_id"] != current_video:
+            current_video = segment["video_id"]
+            lines.append(f"\nVideo: {segment['title']} (id: {current_video})")
+        line = f"[{segment['start_time']}-{segment['end_time']}] Transcript: {segment['text']}"
+        if segment.get("description"):
+            line += f" | Visual: {segment['description']}"
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def retrieved_segments(videos: List[Dict], count: int) -> List[Dict]:
+    """``count`` segments spread over the corpus, shaped like retrieval_index results."""
+    segments = []
+    for video in videos:
+        for segment, description in zip(video["transcription"], segment_descriptions(video)):
+            segments.append({"video_id": video["video_id"], "title": video["title"], "description": description, **segment})
+    step = max(1, len(segments) // count)
+    return segments[::step][:count]
+
+
+def limited(video: Dict) -> Dict:
+    return {key: value[:TAVUS_ITEMS] if isinstance(value, list) else value for key, value in video.items()}
+
+
+# ====== REQUESTS ======
+
+def requests(videos: List[Dict]) -> List[Tuple[str, Callable[[], str], Callable[[], str], str, str]]:
+    """(name, legacy prompt, compact prompt, legacy output, compact output) per request type."""
+    from generate_video_metadata import build_description_prompt, pack_description_chunks
+    from generate_podcast import format_podcast_prompt
+
+    chunk = pack_description_chunks(videos[0]["transcription"])[0]
+    described = [
+        {"start_time": segment["start_time"], "end_time": segment["end_time"], "description": description}
+        for segment, description in zip(videos[0]["transcription"], segment_descriptions(videos[0]))
+    ][:len(chunk)]
+    retrieved = retrieved_segments(videos, ASK_SEGMENTS)
+    final = corpus.final_json(videos)
+    return [
+        (f"describe chunk ({len(chunk)} segments)",
+         lambda: LEGACY_DESCRIPTION_PROMPT.format(segments=json.dumps(chunk, indent=2)),
+         lambda: build_description_prompt(chunk),
+         json.dumps(described, indent=2),
+         prompt_format.format_records(described, "description")),
+        ("podcast episode",
+         lambda: format_podcast_prompt(videos[0]).replace(prompt_format.format_video(videos[0]), "```json\n" + compact_json(videos[0])),
+         lambda: format_podcast_prompt(videos[0]), "", ""),
+        (f"ask ({ASK_SEGMENTS} retrieved segments)", lambda: legacy_segments(retrieved),
+         lambda: prompt_format.format_segments(retrieved), "", ""),
+        ("ask (no index, whole corpus)", lambda: json.dumps(final, indent=2),
+         lambda: prompt_format.format_videos(videos), "", ""),
+        ("auto-summarize (direct)", lambda: compact_json(final),
+         lambda: prompt_format.format_videos(videos), "", ""),
+        ("conversation context", lambda: str({f"youtube_{video['video_id']}_enhanced.json": limited(video) for video in videos}),
+         lambda: "\n\n".join(prompt_format.format_video(limited(video)) for video in videos), "", ""),
+    ]
+
+
+def measure(build: Callable[[], str]) -> Tuple[str, float]:
+    started = time.perf_counter()
+    text = build()
+    return text, time.perf_counter() - started
+
+
+def modelled_ms(prompt_tokens: int, output_tokens: int) -> float:
+    return (prompt_tokens / PREFILL_TOKENS_PER_S + output_tokens / DECODE_TOKENS_PER_S) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    global PREFILL_TOKENS_PER_S, DECODE_TOKENS_PER_S
+    parser = argparse.ArgumentParser(description="Prompt size and modelled latency: previous JSON encodings vs prompt_format.py.")
+    parser.add_argument("--videos", type=int, default=4, help="synthetic videos in the corpus (cycles data/data1-4.json)")
+    parser.add_argument("--prefill-tokens-per-s", type=float, default=PREFILL_TOKENS_PER_S)
+    parser.add_argument("--decode-tokens-per-s", type=float, default=DECODE_TOKENS_PER_S)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    PREFILL_TOKENS_PER_S, DECODE_TOKENS_PER_S = args.prefill_tokens_per_s, args.decode_tokens_per_s
+
+    videos = corpus.synthesize_corpus(args.videos)
+    results = []
+    for name, legacy, compact, legacy_output, compact_output in requests(videos):
+        legacy_text, legacy_seconds = measure(legacy)
+        compact_text, compact_seconds = measure(compact)
+        before = token_budget.raw_count(legacy_text)
+        after = token_budget.raw_count(compact_text)
+        output_before = token_budget.raw_count(legacy_output)
+        output_after = token_budget.raw_count(compact_output)
+        results.append({
+            "request": name,
+            "prompt_tokens": [before, after],
+            "output_tokens": [output_before, output_after],
+            "prompt_chars": [len(legacy_text), len(compact_text)],
+            "build_ms": [round(legacy_seconds * 1000, 2), round(compact_seconds * 1000, 2)],
+            "modelled_ms": [round(modelled_ms(before, output_before)), round(modelled_ms(after, output_after))],
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"Estimated tokens (token_budget.raw_count), {args.videos} video(s); latency modelled at "
+          f"{PREFILL_TOKENS_PER_S:g} prompt and {DECODE_TOKENS_PER_S:g} output tokens/s\n")
+    header = f"{'request':<34}{'prompt tokens':>22}{'output tokens':>20}{'modelled latency':>24}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        (before, after), (output_before, output_after), (ms_before, ms_after) = (
+            result["prompt_tokens"], result["output_tokens"], result["modelled_ms"])
+        output = f"{output_before:>7} -> {output_after:<6}" if output_before else f"{'-':>12}"
+        print(f"{result['request']:<34}{before:>8} -> {after:<6}{1 - after / before:>5.0%} {output:>18}"
+              f"{ms_before:>9} -> {ms_after:<5} ms{1 - ms_after / ms_before:>5.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
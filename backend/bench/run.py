@@ -0,0 +1,394 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.stubs import StubAPIs, StubSettings
+from bench import corpus
+
+# === CONFIGURATION ===
+
+SCENARIOS = ("process_videos", "podcasts", "ask", "translate", "generate_audio")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_HISTORY = RESULTS_DIR / "history.jsonl"
+# Metrics compared against the previous run with the same settings: +1 if higher is worse
+TRACKED = {"latency_p95_ms": 1, "throughput_per_s": -1, "peak_rss_mb": 1}
+WORKSPACE = "bench"
+
+
+# ====== SCENARIOS (run in a child process) ======
+
+def run_requests(operation: Callable[[int], bool], count: int, concurrency: int) -> Dict:
+    """Run ``operation(i)`` for i in range(count) on ``concurrency`` threads, timing each call."""
+    latencies: List[float] = [0.0] * count
+    failures = [0] * count
+
+    def timed(i: int):
+        started = time.perf_counter()
+        try:
+            ok = operation(i)
+        except Exception as e:
+            print(f"Request {i} failed: {e}")
+            ok = False
+        latencies[i] = time.perf_counter() - started
+        failures[i] = 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(timed, range(count)))
+    return {"latencies": latencies, "errors": sum(failures), "wall_seconds": time.perf_counter() - started}
+
+
+class AppServer:
+    """The FastAPI app served by uvicorn on a background thread, so requests go over real HTTP."""
+
+    def __init__(self):
+        import uvicorn
+        import main
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        import httpx
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        self.client = httpx.Client(base_url=f"http://127.0.0.1:{self.port}", timeout=600,
+                                   limits=httpx.Limits(max_connections=256, max_keepalive_connections=256))
+        return self.client
+
+    def __exit__(self, *exc):
+        self.client.close()
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def scenario_process_videos(config: Dict, videos: List[Dict]) -> Dict:
+    """``process_multiple_videos`` over the whole corpus; one operation per video."""
+    import generate_video_metadata
+    from workspace import get_workspace
+    started = time.perf_counter()
+    timings = generate_video_metadata.process_multiple_videos(
+        [video["url"] for video in videos], workspace=get_workspace(WORKSPACE)
+    )
+    return {
+        "latencies": [timing["seconds"] for timing in timings],
+        "errors": sum(1 for timing in timings if timing["status"] != "ok") + len(videos) - len(timings),
+        "wall_seconds": time.perf_counter() - started
+    }
+
+
+def scenario_podcasts(config: Dict, videos: List[Dict]) -> Dict:
+    """``process_and_merge_podcasts`` over one analysis file per video; one operation per episode."""
+    import generate_podcast
+    from workspace import atomic_write_json, get_workspace
+    workspace = get_workspace(WORKSPACE)
+    for video in videos:
+        atomic_write_json(workspace.video_output_path(video["video_id"]), video)
+    started = time.perf_counter()
+    timings = generate_podcast.process_and_merge_podcasts(workspace=workspace)
+    return {
+        "latencies": [timing["seconds"] for timing in timings],
+        "errors": sum(1 for timing in timings if timing["status"] == "failed"),
+        "wall_seconds": time.perf_counter() - started
+    }
+
+
+def scenario_ask(config: Dict, videos: List[Dict]) -> Dict:
+    """POST /ask against a final.json of the whole corpus; questions differ unless ``warm``."""
+    from workspace import atomic_write_json, get_workspace
+    atomic_write_json(get_workspace(WORKSPACE).final_json, corpus.final_json(videos))
+    headers = {"X-Workspace-Id": WORKSPACE}
+
+    with AppServer() as client:
+        started = time.perf_counter()
+        client.post("/ask", json={"question": "What sensor is used?"}, headers=headers)  # builds the index
+        setup_seconds = time.perf_counter() - started
+
+        def ask(i: int) -> bool:
+            # Unique questions unless warm, so cold runs miss the answer cache
+            number = 0 if config["warm"] else i % len(videos)
+            question = f"What happens around 00:00:30 in video {number}, and which sensor is wired up?"
+            if not config["warm"]:
+                question += f" (request {i})"
+            response = client.post("/ask", json={"question": question}, headers=headers)
+            return response.status_code == 200 and "response" in response.json()
+
+        result = run_requests(ask, config["requests"], config["concurrency"])
+    result["setup_seconds"] = round(setup_seconds, 3)
+    return result
+
+
+def write_podcast_texts(config: Dict, videos: List[Dict]) -> List[str]:
+    """One workspace per request, each with a podcast text whose every paragraph is unique
+    (so chunk caches miss), or one shared workspace when ``warm``."""
+    from workspace import atomic_write_text, get_workspace
+    base = corpus.podcast_text(videos, max_chars=config["text_chars"]).split("\n\n")
+    names = [WORKSPACE] if config["warm"] else [f"{WORKSPACE}-{i}" for i in range(config["requests"])]
+    for i, name in enumerate(names):
+        text = "\n\n".join(f"{paragraph} ({i})" for paragraph in base)
+        atomic_write_text(get_workspace(name).podcast_text, text)
+    return names
+
+
+def scenario_translate(config: Dict, videos: List[Dict]) -> Dict:
+    """POST /translate of a podcast text into ``languages``."""
+    names = write_podcast_texts(config, videos)
+    with AppServer() as client:
+        def translate(i: int) -> bool:
+            response = client.post("/translate", json={"languages": config["languages"]},
+                                   headers={"X-Workspace-Id": names[i % len(names)]})
+            if response.status_code != 200:
+                return False
+            translations = response.json().get("translations", {})
+            return all(not text.startswith("Translation error") for text in translations.values())
+
+        return run_requests(translate, config["requests"], config["concurrency"])
+
+
+def scenario_generate_audio(config: Dict, videos: List[Dict]) -> Dict:
+    """POST /generate-audio of a podcast text, reading the whole WAV stream."""
+    names = write_podcast_texts(config, videos)
+    with AppServer() as client:
+        def generate(i: int) -> bool:
+            response = client.post("/generate-audio", data={"filename": "podcasts/full_podcast.txt"},
+                                   headers={"X-Workspace-Id": names[i % len(names)]})
+            return response.status_code == 200 and response.headers.get("content-type", "").startswith("audio/")
+
+        return run_requests(generate, config["requests"], config["concurrency"])
+
+
+def peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_child(scenario: str, config: Dict, result_file: str):
+    """Run one scenario in this (fresh) process and write its summary to ``result_file``.
+
+    The parent has already pointed the environment at the stubs and a scratch
+    directory, so backend modules are only imported here.
+    """
+    os.chdir(os.environ["BENCH_SCRATCH"])
+    videos = corpus.synthesize_corpus(config["videos"])
+    result = globals()[f"scenario_{scenario}"](config, videos)
+
+    from metrics import metrics
+    tokens = {}
+    for labels, value in metrics.counters.get("llm_tokens_total", {}).items():
+        kind = dict(labels)["kind"]
+        tokens[kind] = tokens.get(kind, 0) + int(value)
+
+    latencies = np.asarray(result.pop("latencies"), dtype=float) * 1000
+    ops = len(latencies)
+    wall = result.pop("wall_seconds")
+    summary = {
+        "ops": ops,
+        "errors": result.pop("errors"),
+        "wall_seconds": round(wall, 3),
+        "throughput_per_s": round(ops / wall, 3) if wall else None,
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1) if ops else None,
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1) if ops else None,
+        "latency_max_ms": round(float(latencies.max()), 1) if ops else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "tokens": tokens,
+        **result
+    }
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+
+
+# ====== ORCHESTRATION ======
+
+def run_scenario(scenario: str, config: Dict) -> Optional[Dict]:
+    """Run ``scenario`` in a child process against fresh stubs and a fresh scratch directory."""
+    settings = StubSettings(config["latency_ms"], config["ms_per_token"], config["jitter_ms"],
+                            config["upstream_rpm"], config["error_rate"], config["seed"],
+                            config.get("ms_per_prompt_token", 0))
+    stubs = StubAPIs(settings).start()
+    for video in corpus.synthesize_corpus(config["videos"]):
+        stubs.transcripts[video["video_id"]] = corpus.raw_transcript(video)
+
+    scratch = Path(tempfile.mkdtemp(prefix=f"bench-{scenario}-"))
+    (scratch / "data" / "output").mkdir(parents=True)
+    (scratch / "podcasts").mkdir()
+    env = {**os.environ, **stubs.env()}
+    env.update({
+        "BENCH_SCRATCH": str(scratch),
+        "CACHE_DIR": str(scratch / "cache"),
+        "JOB_DB": str(scratch / "jobs.sqlite3"),
+        "WORKSPACES_DIR": str(scratch / "workspaces"),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")])),
+    })
+    # Unless overridden, keep the client-side Groq limiter out of the way of the stubs' own limits
+    env.setdefault("GROQ_REQUESTS_PER_MIN", "1000000")
+    env.setdefault("GROQ_TOKENS_PER_MIN", "1000000000")
+
+    RESULTS_DIR.joinpath("logs").mkdir(parents=True, exist_ok=True)
+    log_path = RESULTS_DIR / "logs" / f"{scenario}.log"
+    result_file = scratch / "result.json"
+    command = [sys.executable, "-m", "bench.run", "--child", scenario,
+               "--child-config", json.dumps(config), "--result-file", str(result_file)]
+    print(f"Running {scenario} (log: {log_path})...", flush=True)
+    try:
+        with open(log_path, "w", encoding="utf-8") as log:
+            completed = subprocess.run(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if completed.returncode != 0 or not result_file.exists():
+            print(f"  {scenario} failed with exit code {completed.returncode}; see {log_path}")
+            return None
+        with open(result_file, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        result["upstream"] = stubs.stats
+        return result
+    finally:
+        stubs.stop()
+        import shutil
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: Path) -> List[Dict]:
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_run(history: List[Dict], config: Dict) -> Optional[Dict]:
+    """Most recent recorded run with the same settings (runs are only comparable like for like)."""
+    for entry in reversed(history):
+        if entry.get("config") == config:
+            return entry
+    return None
+
+
+def find_regressions(previous: Dict, results: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for scenario, result in results.items():
+        before = (previous.get("results") or {}).get(scenario)
+        if not result or not before:
+            continue
+        for metric, direction in TRACKED.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * direction > threshold:
+                regressions.append(f"{scenario}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def print_report(results: Dict, previous: Optional[Dict]):
+    header = f"{'scenario':<16}{'ops':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>9}{'RSS MB':>9}{'tokens':>10}"
+    print("\n" + header)
+    print("-" * len(header))
+    for scenario, result in results.items():
+        if result is None:
+            print(f"{scenario:<16}{'failed':>6}")
+            continue
+        tokens = sum(result.get("tokens", {}).values())
+        print(f"{scenario:<16}{result['ops']:>6}{result['errors']:>5}{result['latency_p50_ms'] or 0:>10.1f}"
+              f"{result['latency_p95_ms'] or 0:>10.1f}{result['throughput_per_s'] or 0:>9.2f}"
+              f"{result['peak_rss_mb']:>9.1f}{tokens:>10}")
+        before = (previous or {}).get("results", {}).get(scenario)
+        if before:
+            deltas = []
+            for metric in TRACKED:
+                if before.get(metric) and result.get(metric) is not None:
+                    deltas.append(f"{metric} {(result[metric] - before[metric]) / before[metric]:+.1%}")
+            print(f"{'':<16}vs {previous.get('commit') or previous['timestamp']}: {', '.join(deltas)}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks against local stand-ins for Groq, Llama, Tavus and YouTube.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--videos", type=int, default=12, help="synthetic videos in the corpus (cycles data/data1-4.json)")
+    parser.add_argument("--requests", type=int, default=20, help="requests per route scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent requests in route scenarios")
+    parser.add_argument("--warm", action="store_true", help="repeat identical inputs to measure the cached path")
+    parser.add_argument("--languages", default="Spanish,German", help="target languages for /translate")
+    parser.add_argument("--text-chars", type=int, default=6000, help="podcast text size for /translate and /generate-audio")
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub latency per response")
+    parser.add_argument("--ms-per-token", type=float, default=0, help="extra stub latency per generated token")
+    parser.add_argument("--ms-per-prompt-token", type=float, default=0, help="extra stub latency per prompt token")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="random extra stub latency")
+    parser.add_argument("--upstream-rpm", type=int, default=0, help="stub rate limit per service (0 = none)")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of stub responses that are 503s")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="free-form note stored with the results")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSON-lines file results are appended to")
+    parser.add_argument("--no-history", action="store_true", help="do not record this run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--child-config", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, json.loads(args.child_config), args.result_file)
+        return 0
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    config = {
+        "videos": args.videos, "requests": args.requests, "concurrency": args.concurrency, "warm": args.warm,
+        "languages": [language.strip() for language in args.languages.split(",") if language.strip()],
+        "text_chars": args.text_chars, "latency_ms": args.latency_ms, "ms_per_token": args.ms_per_token,
+        "ms_per_prompt_token": args.ms_per_prompt_token,
+        "jitter_ms": args.jitter_ms, "upstream_rpm": args.upstream_rpm, "error_rate": args.error_rate, "seed": args.seed
+    }
+
+    results = {scenario: run_scenario(scenario, config) for scenario in scenarios}
+    history = load_history(args.history)
+    previous = previous_run(history, config)
+    print_report(results, previous)
+
+    regressions = find_regressions(previous, results, args.threshold) if previous else []
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+    if not args.no_history:
+        entry = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+                 "label": args.label, "config": config, "results": results}
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"\nRecorded in {args.history}")
+
+    if any(result is None for result in results.values()):
+        return 2
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import io
+import re
+import json
+import time
+import wave
+import random
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from prompt_format import format_record, parse_records
+
+# Segments embedded in the visual-description prompt (see build_description_prompt)
+DESCRIPTION_SEGMENTS = re.compile(r"Transcript segments:\n(.*?)\n\nRespond with one line per segment", re.S)
+TRANSLATION_PROMPT = re.compile(r"English text to (.+?)\.(?:.|\n)*?Respond with only the translation:\s*(.*)", re.S)
+CHARS_PER_TOKEN = 4
+SPEECH_RATE = 8000  # Hz; mono 16-bit silence
+SPEECH_SECONDS_PER_CHAR = 0.004
+
+
+class StubSettings:
+    """How the stand-in APIs behave.
+
+    Every response waits ``latency_ms``, plus ``ms_per_prompt_token`` per prompt token,
+    ``ms_per_token`` per generated token and up to ``jitter_ms`` of noise. ``requests_per_min`` (0 = unlimited) is enforced per
+    service with 429 + Retry-After, and ``error_rate`` of requests get a 503.
+    """
+
+    def __init__(self, latency_ms: float = 50, ms_per_token: float = 0, jitter_ms: float = 10,
+                 requests_per_min: int = 0, error_rate: float = 0, seed: int = 0, ms_per_prompt_token: float = 0):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.jitter_ms = jitter_ms
+        self.requests_per_min = requests_per_min
+        self.error_rate = error_rate
+        self.seed = seed
+        self.ms_per_prompt_token = ms_per_prompt_token
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+class StubAPIs:
+    """Local HTTP server standing in for Groq (chat, TTS), the Llama API, Tavus and YouTube.
+
+    ``env()`` returns the settings that point the backend at it; transcripts served
+    for a video ID are registered in ``transcripts``.
+    """
+
+    def __init__(self, settings: Optional[StubSettings] = None):
+        self.settings = settings or StubSettings()
+        self.transcripts: Dict[str, List[Dict]] = {}
+        self.random = random.Random(self.settings.seed)
+        self.lock = threading.Lock()
+        self.windows: Dict[str, deque] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 256
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "StubAPIs":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def env(self) -> Dict[str, str]:
+        base = self.base_url
+        return {
+            "GROQ_API_KEY": "bench", "LLAMA_API_KEY": "bench", "TAVUS_API_KEY": "bench",
+            "TAVUS_REPLICA_ID": "bench", "TAVUS_PERSONA_ID": "bench",
+            "GROQ_BASE_URL": f"{base}/groq",  # Groq SDK
+            "GROQ_API_BASE": f"{base}/groq/openai/v1",
+            "LLAMA_API_BASE": f"{base}/llama",
+            "TAVUS_API_BASE": f"{base}/tavus",
+            "YOUTUBE_OEMBED_URL": f"{base}/youtube/oembed",
+            "YOUTUBE_TRANSCRIPT_URL": f"{base}/youtube/transcript",
+        }
+
+    def _count(self, service: str, outcome: str):
+        with self.lock:
+            entry = self.stats.setdefault(service, {})
+            entry[outcome] = entry.get(outcome, 0) + 1
+
+    def _admit(self, service: str) -> Optional[float]:
+        """None if the request may proceed, else the Retry-After seconds for a 429."""
+        limit = self.settings.requests_per_min
+        if not limit:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.setdefault(service, deque())
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= limit:
+                return max(1.0, 60 - (now - window[0]))
+            window.append(now)
+        return None
+
+    def _delay(self, output_chars: int, prompt_chars: int = 0):
+        settings = self.settings
+        with self.lock:
+            jitter = self.random.uniform(0, settings.jitter_ms)
+        tokens = output_chars / CHARS_PER_TOKEN
+        prompt_tokens = prompt_chars / CHARS_PER_TOKEN
+        time.sleep((settings.latency_ms + jitter + tokens * settings.ms_per_token
+                    + prompt_tokens * settings.ms_per_prompt_token) / 1000)
+
+    def _fail(self) -> bool:
+        if not self.settings.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.settings.error_rate
+
+    # --- response bodies ---
+
+    def chat_reply(self, messages: List[Dict], max_tokens: Optional[int]) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        match = DESCRIPTION_SEGMENTS.search(prompt)
+        if match:
+            return "\n".join(
+                format_record(segment["start_time"], segment["end_time"],
+                              f"On screen while the speaker says: {segment['text'][:120]}")
+                for segment in parse_records(match.group(1))
+            )
+        match = TRANSLATION_PROMPT.search(prompt)
+        if match:
+            return f"[{match.group(1)}] {match.group(2).strip()}"
+        # Summaries, podcast scripts, answers: a reply proportional to the request, capped by max_tokens
+        length = min(len(prompt) // 8 + 200, (max_tokens or 2000) * CHARS_PER_TOKEN, 6000)
+        words = re.findall(r"[A-Za-z]{4,}", prompt)[:400] or ["benchmark"]
+        text = " ".join(words[i % len(words)] for i in range(length // 6))
+        return f"Stub reply. {text}"[:length]
+
+    def speech(self, text: str) -> bytes:
+        frames = int(len(text) * SPEECH_SECONDS_PER_CHAR * SPEECH_RATE)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SPEECH_RATE)
+            wav.writeframes(b"\x00\x00" * max(frames, 1))
+        return buffer.getvalue()
+
+    def _handler_class(self):
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, body, status: int = 200, content_type: str = "application/json", headers=None):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def guarded(self, service: str) -> bool:
+                """Apply rate limits and injected errors; True if a response was already sent."""
+                retry_after = stubs._admit(service)
+                if retry_after is not None:
+                    stubs._count(service, "429")
+                    self.send({"error": {"message": "Rate limit reached"}}, 429,
+                              headers={"Retry-After": f"{retry_after:.0f}"})
+                    return True
+                if stubs._fail():
+                    stubs._count(service, "503")
+                    stubs._delay(0)
+                    self.send({"error": {"message": "Injected failure"}}, 503)
+                    return True
+                stubs._count(service, "ok")
+                return False
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path.startswith("/youtube/oembed"):
+                    if not self.guarded("youtube"):
+                        stubs._delay(0)
+                        self.send({"title": "Benchmark video"})
+                elif path.startswith("/youtube/transcript/"):
+                    if not self.guarded("youtube"):
+                        transcript = stubs.transcripts.get(path.rsplit("/", 1)[-1])
+                        stubs._delay(0)
+                        if transcript is None:
+                            self.send({"error": "unknown video"}, 404)
+                        else:
+                            self.send(transcript)
+                else:
+                    self.send({"error": "not found"}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw or b"{}")
+                except ValueError:
+                    body = {}
+                path = self.path.split("?")[0]
+                if path.startswith("/groq/openai/v1/chat/completions"):
+                    self.groq_chat(body)
+                elif path.startswith("/groq/openai/v1/audio/speech"):
+                    if not self.guarded("groq_tts"):
+                        audio = stubs.speech(body.get("input", ""))
+                        stubs._delay(0)
+                        self.send(audio, content_type="audio/wav")
+                elif path.startswith("/llama/chat/completions"):
+                    self.llama_chat(body)
+                elif path.startswith("/tavus/"):
+                    if not self.guarded("tavus"):
+                        stubs._delay(0)
+                        self.send({"conversation_id": "bench", "conversation_url": "http://127.0.0.1/bench", "status": "active"})
+                else:
+                    self.send({"error": "not found"}, 404)
+
+            def groq_chat(self, body: Dict):
+                if self.guarded("groq_chat"):
+                    return
+                reply = stubs.chat_reply(body.get("messages") or [], body.get("max_tokens"))
+                prompt_chars = sum(len(message.get("content") or "") for message in body.get("messages") or [])
+                stubs._delay(len(reply), prompt_chars)
+                self.send({
+                    "id": "bench",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "bench"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_chars // CHARS_PER_TOKEN, "completion_tokens": len(reply) // CHARS_PER_TOKEN,
+                              "total_tokens": (prompt_chars + len(reply)) // CHARS_PER_TOKEN}
+                })
+
+            def llama_chat(self, body: Dict):
+                if self.guarded("llama"):
+                    return
+                messages = body.get("messages") or []
+                reply = stubs.chat_reply(messages, body.get("max_tokens"))
+                prompt_chars = sum(len(message.get("content") or "") for message in messages)
+                usage = [
+                    {"metric": "num_prompt_tokens", "value": prompt_chars // CHARS_PER_TOKEN, "unit": "tokens"},
+                    {"metric": "num_completion_tokens", "value": len(reply) // CHARS_PER_TOKEN, "unit": "tokens"},
+                ]
+                if not body.get("stream"):
+                    stubs._delay(len(reply), prompt_chars)
+                    self.send({"completion_message": {"role": "assistant", "content": {"type": "text", "text": reply}},
+                               "metrics": usage})
+                    return
+                # Server-Sent Events: the latency comes first, then deltas paced by ms_per_token
+                stubs._delay(0, prompt_chars)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = [reply[i:i + 40] for i in range(0, len(reply), 40)]
+                events = [{"event": {"event_type": "progress", "delta": {"type": "text", "text": piece}}} for piece in pieces]
+                events.append({"event": {"event_type": "metrics", "metrics": usage}})
+                for event in events:
+                    self.chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    time.sleep(40 / CHARS_PER_TOKEN * stubs.settings.ms_per_token / 1000)
+                self.chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def chunk(self, data: bytes):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+        return Handler
@@ -1,4 +1,5 @@
-import requests
+import httpx
+import http_client
 import json
 import os
 
@@ -22,9 +23,8 @@ def create_tavus_conversation(
     if not TAVUS_API_KEY:
      raise ValueError("TAVUS_API_KEY environment variable is not set")
 
-    TAVUS_API_URL = os.getenv('TAVUS_API_URL')  # Get Url from environment variable
-    if not TAVUS_API_URL:
-        raise ValueError("TAVUS_API_KEY environment variable is not set")
+    # Optional full URL override; otherwise use the pooled client's Tavus base URL
+    TAVUS_API_URL = os.getenv('TAVUS_API_URL') or "/conversations"
     PERSONA_ID = os.getenv('PERSONA_ID')  # Get PersonaID from environment variable
     if not PERSONA_ID:
         raise ValueError("PERSONA_ID environment variable is not set")
@@ -65,7 +65,7 @@ def create_tavus_conversation(
     }
 
     try:
-        response = requests.post(TAVUS_API_URL, headers=headers, data=json.dumps(payload))
+        response = http_client.post("tavus", TAVUS_API_URL, headers=headers, content=json.dumps(payload))
         response.raise_for_status()
         data = response.json()
         return {
@@ -73,7 +73,7 @@ def create_tavus_conversation(
             "conversation_id": data.get('conversation_id'),
             "conversation_url": data.get('conversation_url')
         }
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {
             "success": False,
             "error": str(e),
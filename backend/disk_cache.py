@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from metrics import metrics
+
+# === CONFIGURATION ===
+
+CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash arbitrary JSON-serializable parts into a stable content-addressed key."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Sharded on-disk JSON cache with age- and size-based eviction.
+
+    Entries live at ``<CACHE_DIR>/<namespace>/<key[:2]>/<key>.json``. A hit refreshes
+    the entry's mtime, so size-based eviction removes least recently used entries first.
+    With ``binary=True`` values are raw bytes stored as ``<key>.bin`` files instead.
+    """
+
+    def __init__(self, namespace: str, max_age_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 binary: bool = False):
+        self.namespace = namespace
+        self.root = Path(CACHE_DIR) / namespace
+        self.binary = binary
+        self.suffix = ".bin" if binary else ".json"
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._total_bytes = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def _expired(self, mtime: float) -> bool:
+        return self.max_age_seconds is not None and time.time() - mtime > self.max_age_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or None on a miss."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if self._expired(stat.st_mtime):
+                self._remove(path, stat.st_size)
+                value = None
+            elif self.binary:
+                with open(path, "rb") as f:
+                    value = f.read()
+                os.utime(path)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)["value"]
+                os.utime(path)
+        except (OSError, ValueError, KeyError):
+            value = None
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.inc("cache_requests_total", cache=self.namespace, result="miss" if value is None else "hit")
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store ``value`` under ``key`` atomically, then evict if over budget."""
+        if self.binary:
+            data = value
+        else:
+            data = json.dumps({"key": key, "created": time.time(), "value": value}, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._commit(key, tmp_path)
+        except OSError as e:
+            print(f"Warning: could not write {self.namespace} cache entry {key[:12]}: {e}")
+
+    def path(self, key: str) -> Optional[Path]:
+        """Return the file holding ``key`` (refreshing its LRU position), or None on a miss."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if self._expired(stat.st_mtime):
+                self._remove(path, stat.st_size)
+                path = None
+            else:
+                os.utime(path)
+        except OSError:
+            path = None
+        with self.lock:
+            if path is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.inc("cache_requests_total", cache=self.namespace, result="miss" if path is None else "hit")
+        return path
+
+    def temp_file(self, key: str) -> str:
+        """Create a temporary file next to ``key``'s entry, to be filled and passed to ``put_file``."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    def put_file(self, key: str, tmp_path: str) -> Path:
+        """Move a fully written file (from ``temp_file``) into place as ``key``'s entry."""
+        self._commit(key, tmp_path)
+        return self._path(key)
+
+    def _commit(self, key: str, tmp_path: str):
+        path = self._path(key)
+        size = os.path.getsize(tmp_path)
+        previous = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.writes += 1
+            if self._total_bytes is not None:
+                self._total_bytes += size - previous
+        if self.max_bytes is not None and self.total_bytes() > self.max_bytes:
+            self.evict()
+
+    def _remove(self, path: Path, size: int):
+        try:
+            path.unlink()
+        except OSError:
+            return
+        with self.lock:
+            self.evictions += 1
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _entries(self):
+        entries = []
+        for path in self.root.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def total_bytes(self) -> int:
+        """Bytes currently used by this cache (scanned once, then tracked incrementally)."""
+        if self._total_bytes is None:
+            total = sum(size for _, size, _ in self._entries())
+            with self.lock:
+                self._total_bytes = total
+        return self._total_bytes
+
+    def evict(self):
+        """Drop expired entries, then least recently used entries until under ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        with self.lock:
+            self._total_bytes = total
+        for mtime, size, path in entries:
+            over_budget = self.max_bytes is not None and self._total_bytes > self.max_bytes
+            if not over_budget and not self._expired(mtime):
+                continue
+            self._remove(path, size)
+
+    def clear(self):
+        """Remove every entry in this namespace."""
+        for _, size, path in self._entries():
+            self._remove(path, size)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current disk usage."""
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age_seconds
+        }
@@ -0,0 +1,128 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Union
+from metrics import metrics
+
+# === CONFIGURATION ===
+
+DOCUMENT_STORE_MAX_MB = float(os.getenv("DOCUMENT_STORE_MAX_MB", "256"))
+# Parsed JSON takes several times the memory of its text; used to budget entries
+PARSED_OVERHEAD = 4
+
+
+class _Entry:
+    __slots__ = ("key", "signature", "text", "derived", "size")
+
+    def __init__(self, key: str, signature: tuple, text: str):
+        self.key = key
+        self.signature = signature
+        self.text = text
+        self.derived: Dict[str, Any] = {}
+        self.size = len(text)
+
+
+class DocumentStore:
+    """In-memory LRU of files the routes read on every request (final.json, podcast text, ...).
+
+    Each lookup costs one ``stat``: an entry is reused while the file's inode,
+    mtime and size are unchanged, so replacing a file (atomic rename) or editing it
+    in place is picked up automatically; writers can also call ``invalidate``.
+    Parsed and other derived forms are built once per file version and shared
+    between callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _entry(self, path: Union[str, Path]) -> _Entry:
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                metrics.inc("cache_requests_total", cache="documents", result="hit")
+                return entry
+            self.misses += 1
+        metrics.inc("cache_requests_total", cache="documents", result="miss")
+        with open(key, "r", encoding="utf-8") as f:
+            entry = _Entry(key, signature, f.read())
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            if entry.size <= self.max_bytes:
+                self.entries[key] = entry
+                self.bytes += entry.size
+                self._evict()
+        return entry
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self.entries:
+            _, entry = self.entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+
+    def _derive(self, entry: _Entry, name: str, builder: Callable[[_Entry], Any], weight: int = 1) -> Any:
+        if name not in entry.derived:
+            value = builder(entry)
+            with self.lock:
+                if name not in entry.derived:
+                    entry.derived[name] = value
+                    extra = len(entry.text) * weight
+                    entry.size += extra
+                    if self.entries.get(entry.key) is entry:
+                        self.bytes += extra
+                        self._evict()
+        return entry.derived[name]
+
+    def read_text(self, path: Union[str, Path]) -> str:
+        """Contents of ``path`` (raises OSError like ``open`` if it is missing)."""
+        return self._entry(path).text
+
+    def read_json(self, path: Union[str, Path]) -> Any:
+        """Parsed JSON of ``path``; shared, do not mutate."""
+        return self._derive(self._entry(path), "json", lambda entry: json.loads(entry.text), PARSED_OVERHEAD)
+
+    def derived(self, path: Union[str, Path], name: str, builder: Callable[[Any], Any]) -> Any:
+        """``builder(parsed JSON)`` memoized per file version, e.g. a compact serialization."""
+        entry = self._entry(path)
+        parsed = self._derive(entry, "json", lambda entry: json.loads(entry.text), PARSED_OVERHEAD)
+        return self._derive(entry, f"derived:{name}", lambda entry: builder(parsed))
+
+    def invalidate(self, path: Union[str, Path]):
+        """Drop ``path`` so the next read reloads it (called by writers)."""
+        with self.lock:
+            entry = self.entries.pop(os.path.abspath(path), None)
+            if entry is not None:
+                self.bytes -= entry.size
+                self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and memory usage."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+document_store = DocumentStore(int(DOCUMENT_STORE_MAX_MB * 1024 * 1024))
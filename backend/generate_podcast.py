@@ -1,18 +1,26 @@
 import os
 import json
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
+import summarize
+from prompt_format import RECORD_LEGEND, format_video
+from disk_cache import make_cache_key
+from metrics import in_context, metrics
+from workspace import get_workspace, atomic_write_json, atomic_write_text
 
 # === CONFIGURATION ===
 
 MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
-DATA_FOLDER = "data"
 OUTPUT_FOLDER = "podcasts"
-MERGED_FILE = "full_podcast.txt"
+MANIFEST_FILE = "manifest.json"
+TEMPERATURE = 0.7
+SCRIPT_TOKENS = 4096  # room left for the script when fitting the prompt (scripts stay under 10,000 characters)
+PODCAST_WORKERS = int(os.getenv("PODCAST_WORKERS", "4"))
 
 # === FORMAT PODCAST PROMPT ===
 def format_podcast_prompt(data):
     return f"""
-Below is structured video content, including transcription and visual descriptions.
+Below is video content, including transcription and visual descriptions. {RECORD_LEGEND}
 
 Please generate a podcast-style script narrating the content, combining what is said and what is seen into a coherent, spoken narration.
 
@@ -20,82 +28,148 @@ Use an engaging tone, introduce the topic, and guide the listener through the vi
 
 Respond only with the podcast script.
 
-```json
-{json.dumps(data, indent=2)}
+{format_video(data)}
 """
 
-# === CALL GROQ LLaMA API ===
-def call_llama(json_data):
-    GROQ_API_KEY = os.getenv('GROQ_API_KEY')  # Get API key from environment variable
-    if not GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY environment variable is not set")
-    headers = {
-    "Authorization": f"Bearer {GROQ_API_KEY}",
-    "Content-Type": "application/json"
-    }
+def format_notes_prompt(notes):
+    notes_text = "\n\n---\n\n".join(notes)
+    return f"""
+Below are notes summarizing consecutive parts of a video, including what is said and what is seen.
+
+Please generate a podcast-style script narrating the content as a coherent, spoken narration.
+
+Use an engaging tone, introduce the topic, and guide the listener through the visuals and speech as if they're hearing a podcast.
+
+Respond only with the podcast script.
 
-    system_prompt = (
+{notes_text}
+"""
+
+SYSTEM_PROMPT = (
     "You are a scriptwriter for podcasts. Your job is to take structured data and generate a spoken-style narrative "
     "that is suitable for a podcast episode. The output must be engaging and under 10,000 characters in total, including all text. "
     "Be concise, summarize key themes, and avoid repeating the full transcript. Focus on narrative clarity."
 )
 
+# === CALL GROQ LLaMA API ===
+def call_llama(json_data):
+    """Generate the podcast script for one video's data.
 
-    user_prompt = format_podcast_prompt(json_data)
-
-    payload = {
-        "model": MODEL,
-        "temperature": 0.7,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-    }
+    Long videos are map-reduced into notes first (see summarize.py) so the final
+    prompt stays within the model's context.
+    """
+    if not os.getenv('GROQ_API_KEY'):
+        raise ValueError("GROQ_API_KEY environment variable is not set")
 
-    response = requests.post(
-        "https://api.groq.com/openai/v1/chat/completions",
-        headers=headers,
-        json=payload
+    messages = summarize.prepare_messages(
+        [json_data],
+        "groq",
+        MODEL,
+        direct_messages=lambda videos: [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": format_podcast_prompt(json_data)}
+        ],
+        reduce_messages=lambda notes: [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": format_notes_prompt(notes)}
+        ],
+        max_tokens=SCRIPT_TOKENS
     )
-
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        raise Exception(f"Groq API Error {response.status_code}: {response.text}")
+    return summarize.chat_complete("groq", MODEL, messages, temperature=TEMPERATURE)
+
+# === MANIFEST ===
+def episode_fingerprint(video_data):
+    """Hash of an episode's input JSON plus everything else that shapes the script."""
+    return make_cache_key(video_data, MODEL, TEMPERATURE, SYSTEM_PROMPT, format_podcast_prompt({}),
+                          format_notes_prompt([]), summarize.MAP_PROMPT, summarize.SUMMARY_DIRECT_CHARS)
+
+def load_manifest(output_folder=OUTPUT_FOLDER):
+    manifest_path = os.path.join(output_folder, MANIFEST_FILE)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest, output_folder=OUTPUT_FOLDER):
+    atomic_write_json(os.path.join(output_folder, MANIFEST_FILE), manifest)
+
+# === EPISODES ===
+@metrics.timed("podcast.episode")
+def generate_episode(filepath, output_folder, manifest):
+    """Generate (or reuse) the script for one data file. Returns (script, fingerprint, timing)."""
+    filename = os.path.basename(filepath)
+    episode_path = os.path.join(output_folder, filename.replace(".json", ".txt"))
+    print(f"\n🎬 Processing: {filename}")
+    started = time.perf_counter()
+    status = "generated"
+    script = None
+    fingerprint = None
+
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            video_data = json.load(f)
+        # Per-video analyses carry a bookkeeping fingerprint that is not episode content
+        video_data.pop("fingerprint", None)
+        fingerprint = episode_fingerprint(video_data)
+
+        if manifest.get(filename) == fingerprint and os.path.exists(episode_path):
+            with open(episode_path, "r", encoding="utf-8") as f:
+                script = f.read()
+            status = "skipped"
+            print(f"⏭️ Unchanged, reusing: {episode_path}")
+        else:
+            script = call_llama(video_data)
+            atomic_write_text(episode_path, script)
+            print(f"✅ Saved: {episode_path}")
+
+    except Exception as e:
+        status = "failed"
+        print(f"❌ Error processing {filename}: {e}")
+
+    timing = {"file": filename, "status": status, "seconds": round(time.perf_counter() - started, 2)}
+    return script, fingerprint, timing
 
 # === MAIN FUNCTION ===
-def process_and_merge_podcasts():
-    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-    all_scripts = []
-
-    for filename in sorted(os.listdir(DATA_FOLDER)):
-        if filename.endswith(".json"):
-            filepath = os.path.join(DATA_FOLDER, filename)
-            print(f"\n🎬 Processing: {filename}")
+def process_and_merge_podcasts(max_workers=None, workspace=None):
+    """Generate every episode concurrently, skipping unchanged ones, and merge them in file order.
+
+    Episodes are read from and written to ``workspace`` (the default workspace's
+    ``data/`` and ``podcasts/`` folders when omitted). Returns the per-episode timings.
+    """
+    workspace = workspace or get_workspace()
+    output_folder = str(workspace.podcasts_dir)
+    os.makedirs(output_folder, exist_ok=True)
+    sources = [str(path) for path in workspace.episode_sources()]
+    filenames = [os.path.basename(path) for path in sources]
+    manifest = load_manifest(output_folder)
+
+    workers = max(1, min(max_workers or PODCAST_WORKERS, len(filenames) or 1))
+    batch_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, so the merge order stays deterministic
+        results = list(executor.map(in_context(lambda path: generate_episode(path, output_folder, manifest)), sources))
 
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    video_data = json.load(f)
-
-                script = call_llama(video_data)
-
-                episode_path = os.path.join(OUTPUT_FOLDER, filename.replace(".json", ".txt"))
-                with open(episode_path, "w", encoding="utf-8") as out_file:
-                    out_file.write(script)
-
-                all_scripts.append(f"\n🎙️ Episode based on {filename}:\n\n{script}")
-                print(f"✅ Saved: {episode_path}")
-
-            except Exception as e:
-                print(f"❌ Error processing {filename}: {e}")
+    all_scripts = []
+    timings = []
+    new_manifest = {}
+    for filename, (script, fingerprint, timing) in zip(filenames, results):
+        timings.append(timing)
+        if script is None:
+            continue
+        new_manifest[filename] = fingerprint
+        all_scripts.append(f"\n🎙️ Episode based on {filename}:\n\n{script}")
+    save_manifest(new_manifest, output_folder)
 
     # Merge all episodes
-    merged_path = os.path.join(OUTPUT_FOLDER, MERGED_FILE)
-    with open(merged_path, "w", encoding="utf-8") as f:
-        f.write("🎧 Full Podcast Episode\n\n")
-        f.write("\n\n---\n\n".join(all_scripts))
+    merged_path = workspace.podcast_text
+    atomic_write_text(merged_path, "🎧 Full Podcast Episode\n\n" + "\n\n---\n\n".join(all_scripts))
 
     print(f"\n✅ Merged full podcast saved to: {merged_path}")
+    print(f"Generated {len(filenames)} episode(s) with {workers} worker(s) in {time.perf_counter() - batch_started:.1f}s")
+    for timing in timings:
+        print(f"  [{timing['status']}] {timing['file']}: {timing['seconds']:.1f}s")
+    return timings
 
 # === RUN ===
 if __name__ == "__main__":
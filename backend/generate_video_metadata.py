@@ -1,4 +1,5 @@
 from pathlib import Path
+import shutil
 from dotenv import load_dotenv
 import os
 load_dotenv()
@@ -6,14 +7,29 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "meta-llama/llama-4-maverick-17b-128e-instruct")
 GROQ_TEMPERATURE = float(os.getenv("GROQ_TEMPERATURE", "0.2"))
 GROQ_MAX_TOKENS = int(os.getenv("GROQ_MAX_TOKENS", "4000"))
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", "4"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "8"))
+DESCRIPTION_CACHE_MAX_AGE_DAYS = float(os.getenv("DESCRIPTION_CACHE_MAX_AGE_DAYS", "30"))
+DESCRIPTION_CACHE_MAX_MB = float(os.getenv("DESCRIPTION_CACHE_MAX_MB", "200"))
+DESCRIPTION_FOLLOWUP_ATTEMPTS = int(os.getenv("DESCRIPTION_FOLLOWUP_ATTEMPTS", "2"))
+DESCRIPTION_MAX_MISSING_RATIO = float(os.getenv("DESCRIPTION_MAX_MISSING_RATIO", "0.05"))
 from groq import Groq
-from youtube_transcript_api import YouTubeTranscriptApi
 import json
 from typing import List, Dict, Optional
-import re
 import time
-from collections import deque
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from groq import RateLimitError
+from rate_limiter import groq_limiter
+from disk_cache import DiskCache, make_cache_key
+from llm_json import JSONObjectStream
+from prompt_format import format_records, parse_records
+from alignment import align_descriptions
+from metrics import in_context, metrics
+import token_budget
+import youtube_data
+from retrieval_index import build_index
+from jobs import JobCancelled, JobHandle
+from workspace import Workspace, get_workspace, atomic_write_json
 
 def setup_groq_client():
     """Setup Groq client with API key."""
@@ -26,11 +42,12 @@ def setup_groq_client():
         print(f"Error initializing Groq client: {e}")
         return None
 
-def setup_directories():
+def setup_directories(workspace: Optional[Workspace] = None):
     """Create required directories."""
-    Path("data/output").mkdir(parents=True, exist_ok=True)
-    Path("data/generated").mkdir(parents=True, exist_ok=True)
-    Path("data/cleaned").mkdir(parents=True, exist_ok=True)
+    workspace = workspace or get_workspace()
+    workspace.output_dir.mkdir(parents=True, exist_ok=True)
+    (workspace.root / "data" / "generated").mkdir(parents=True, exist_ok=True)
+    (workspace.root / "data" / "cleaned").mkdir(parents=True, exist_ok=True)
 
 def extract_video_id(video_url: str) -> Optional[str]:
     """Extract video ID from different YouTube URL formats, including shorts."""
@@ -64,8 +81,10 @@ def extract_transcript(video_url: str) -> Optional[List[Dict]]:
         if not video_id:
             return None
         
-        # Get transcript using youtube-transcript-api
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+        # Get transcript (cached, or via youtube-transcript-api)
+        transcript_list = youtube_data.fetch_raw_transcript(video_id)
+        if not transcript_list:
+            return None
         
         # Format transcript with timestamps
         formatted_transcript = []
@@ -84,165 +103,286 @@ def extract_transcript(video_url: str) -> Optional[List[Dict]]:
         print(f"Error during transcript extraction: {e}")
         return None
 
-def generate_visual_description(transcript_data: List[Dict], client) -> Optional[List[Dict]]:
-    """Generate visual descriptions for the video using Groq."""
-    try:
-        # Token usage tracker
-        token_window = deque()
-        TOKEN_LIMIT_PER_MIN = 280000
-        MAX_TOKENS_PER_REQUEST = 8192
-        CONTEXT_WINDOW = 128000  # Llama 4 Maverick context window
-        # Estimate tokens per transcript segment and prompt overhead
-        tokens_per_segment = 40  # Adjust as needed
-        prompt_overhead = 1000   # Estimated tokens for prompt instructions
-        # Calculate how many segments fit in one request
-        max_input_tokens = CONTEXT_WINDOW - MAX_TOKENS_PER_REQUEST - prompt_overhead
-        segments_per_chunk = max_input_tokens // tokens_per_segment
-        segments_per_chunk = min(segments_per_chunk, 50)  # Limit to 50 segments per chunk
-        total_segments = len(transcript_data)
-        num_chunks = max(1, (total_segments + segments_per_chunk - 1) // segments_per_chunk)
-        chunk_size = (total_segments + num_chunks - 1) // num_chunks
-        print(f"Dynamic chunking: {num_chunks} chunks, {chunk_size} segments per chunk (estimated)")
-        all_descriptions = []
-        
-        for i in range(0, total_segments, chunk_size):
-            chunk = transcript_data[i:i+chunk_size]
-            print(f"\nProcessing chunk {i//chunk_size + 1} of {num_chunks}")
-            # Estimate tokens for this request (input + output)
-            prompt = f"""
-            You are an AI assistant analyzing a video. Based on the following transcript segments, 
-            generate detailed visual descriptions for each segment. Focus on what a person would see 
-            (e.g., people, objects, actions, text on screen).
-
-            Transcript segments:
-            {json.dumps(chunk, indent=2)}
-
-            Generate visual descriptions in the following exact JSON format:
-            [
-                {{
-                    "start_time": "00:00:00",
-                    "end_time": "00:00:05",
-                    "description": "Detailed visual description here"
-                }},
-                ...
-            ]
+MAX_TOKENS_PER_REQUEST = 8192
+CONTEXT_WINDOW = token_budget.context_window(GROQ_MODEL)
+FOLLOWUP_TOKENS_PER_SEGMENT = 250  # output budget per segment for follow-up requests
+# Expected description length per segment; chunks are packed to fill DESCRIPTION_OUTPUT_FILL of MAX_TOKENS_PER_REQUEST
+DESCRIPTION_OUTPUT_TOKENS = int(os.getenv("DESCRIPTION_OUTPUT_TOKENS", "120"))
+DESCRIPTION_OUTPUT_FILL = 0.8
 
-            Important instructions:
-            1. Match the start_time and end_time exactly with the transcript segments
-            2. Provide detailed visual descriptions
-            3. Return ONLY the JSON array, nothing else
-            4. Do not include any markdown formatting or code block markers
-            5. Ensure the JSON is valid and properly formatted
-            6. Use double quotes for all property names and string values
-            7. Do not include any explanatory text before or after the JSON
-            8. Make sure the JSON is complete and properly closed with a closing bracket
-            """
-            estimated_tokens = int(len(prompt) / 2) + MAX_TOKENS_PER_REQUEST
-            # Throttle if needed
-            now = time.time()
-            # Remove tokens older than 60 seconds
-            while token_window and now - token_window[0][0] > 60:
-                token_window.popleft()
-            used_tokens = sum(t[1] for t in token_window)
-            if used_tokens + estimated_tokens > TOKEN_LIMIT_PER_MIN:
-                wait_time = 60 - (now - token_window[0][0])
-                print(f"[Token Limit] Waiting {wait_time:.1f} seconds to stay under 280,000 tokens/minute...")
-                time.sleep(wait_time)
-            # After waiting, record this request
-            token_window.append((time.time(), estimated_tokens))
-            
-            print("Sending prompt to Groq API...")
-            try:
-                # Call Groq API with appropriate max_tokens
+# Parsed chunk descriptions keyed by (model, temperature, max tokens, prompt with its segments)
+description_cache = DiskCache(
+    "descriptions",
+    max_age_seconds=DESCRIPTION_CACHE_MAX_AGE_DAYS * 86400,
+    max_bytes=int(DESCRIPTION_CACHE_MAX_MB * 1024 * 1024)
+)
+
+def build_description_prompt(chunk: List[Dict]) -> str:
+    """Build the visual-description prompt for one chunk of transcript segments.
+
+    Segments are sent, and descriptions requested, as ``[mm:ss-mm:ss] text`` lines
+    (see prompt_format.py), which take far fewer tokens than indented JSON.
+    """
+    return f"""You are an AI assistant analyzing a video. Below are transcript segments, one per line as [start-end] text.
+For every segment, describe what a person would see (e.g., people, objects, actions, text on screen).
+
+Transcript segments:
+{format_records(chunk)}
+
+Respond with one line per segment, in the same order, in exactly this form:
+[start-end] detailed visual description
+
+Important instructions:
+1. Copy each segment's [start-end] times exactly
+2. Keep each description on a single line
+3. Respond with only these lines: no JSON, markdown, numbering or explanatory text
+"""
+
+def call_groq_with_limit(client, prompt: str, max_tokens: int, max_attempts: int = 3):
+    """Call Groq chat completions under the shared rate limiter, backing off on 429s.
+
+    The limiter reserves the estimated prompt plus ``max_tokens`` for each attempt.
+    A failed attempt's reservation is refunded before retrying; the successful one
+    is settled with the usage the API reports (see token_budget.py).
+    """
+    messages = [
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+    raw, reserved = token_budget.reserve(messages, GROQ_MODEL, max_tokens)
+    for attempt in range(1, max_attempts + 1):
+        groq_limiter.acquire(reserved)
+        try:
+            with metrics.span("llm.groq", model=GROQ_MODEL):
                 chat_completion = client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
+                    messages=messages,
                     model=GROQ_MODEL,
                     temperature=GROQ_TEMPERATURE,
-                    max_tokens=MAX_TOKENS_PER_REQUEST
+                    max_tokens=max_tokens
                 )
-            except Exception as e:
-                print(f"Groq API Error: {e}")
-                if hasattr(e, 'response'):
-                    print(f"API Response: {e.response}")
-                return None
-            
-            # Get the response content
-            response_content = chat_completion.choices[0].message.content
-            print("Received response from Groq API")
-            print("Raw response length:", len(response_content))
-            print("First 500 characters of response:")
-            print(response_content[:500])
-            print("Last 100 characters of response:")
-            print(response_content[-100:])
-            
-            # Clean the response to ensure it's valid JSON
-            response_content = response_content.replace("```json", "").replace("```", "").strip()
-
-            # Fix missing commas between fields in objects
-            response_content = re.sub(r'("start_time":\s*"[^"]+")\s+("end_time":)', r'\1, \2', response_content)
-            response_content = re.sub(r'("end_time":\s*"[^"]+")\s+("description":)', r'\1, \2', response_content)
-
-            # Ensure the response is properly closed
-            if not response_content.endswith(']'):
-                print("Warning: Response does not end with closing bracket")
-                # Try to find the last complete JSON object
-                last_bracket = response_content.rfind(']')
-                if last_bracket != -1:
-                    response_content = response_content[:last_bracket + 1]
-                    print("Truncated response to last complete JSON object")
-                else:
-                    print("Could not find complete JSON object")
-                    return None
-            
-            # Parse the visual descriptions
+        except RateLimitError as e:
+            groq_limiter.refund(reserved)
+            metrics.inc("http_retries_total", service="groq", reason="429")
+            if attempt == max_attempts:
+                raise
+            retry_after = 2 ** attempt
             try:
-                print("Attempting to parse JSON response...")
-                visual_descriptions = json.loads(response_content)
-                
-                # Validate the structure
-                if not isinstance(visual_descriptions, list):
-                    print("Error: Response is not a list")
-                    print("Response type:", type(visual_descriptions))
-                    return None
-                    
-                print(f"Successfully parsed {len(visual_descriptions)} visual description segments")
-                
-                # Validate each item
-                for i, item in enumerate(visual_descriptions):
-                    if not all(key in item for key in ["start_time", "end_time", "description"]):
-                        print(f"Error: Missing required fields in segment {i}")
-                        print("Segment content:", item)
-                        return None
-                        
-                all_descriptions.extend(visual_descriptions)
-                
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response: {e}")
-                print("Error location:", e.pos)
-                print("Response content around error:")
-                start = max(0, e.pos - 50)
-                end = min(len(response_content), e.pos + 50)
-                print(response_content[start:end])
-                return None
-            except ValueError as e:
-                print(f"Error validating response structure: {e}")
-                return None
-        
-        if len(all_descriptions) == len(transcript_data):
-            return all_descriptions
+                retry_after = float(e.response.headers.get("retry-after", retry_after))
+            except Exception:
+                pass
+            print(f"Groq rate limit hit, retrying in {retry_after:.1f}s (attempt {attempt}/{max_attempts})")
+            groq_limiter.penalize(retry_after)
+            continue
+        except Exception:
+            groq_limiter.refund(reserved)
+            raise
+        metrics.record_usage("groq", GROQ_MODEL, chat_completion)
+        token_budget.settle(GROQ_MODEL, raw, chat_completion, groq_limiter, reserved)
+        return chat_completion
+
+def pack_description_chunks(transcript_data: List[Dict]) -> List[List[Dict]]:
+    """Split a transcript into chunks that fill one description request each.
+
+    Each segment costs its tokens in the prompt and an expected description in the
+    response; chunks are packed to the context window and to DESCRIPTION_OUTPUT_FILL
+    of MAX_TOKENS_PER_REQUEST. Only uncalibrated counts are used, so the same
+    transcript always yields the same chunks (and description cache keys).
+    """
+    prompt_overhead = token_budget.raw_count(build_description_prompt([]))
+    lines = format_records(transcript_data).split("\n") if transcript_data else []
+    input_costs = [token_budget.raw_count(line) + 1 for line in lines]
+    # A response line repeats the segment's [start-end] prefix before the description
+    output_costs = [DESCRIPTION_OUTPUT_TOKENS + token_budget.raw_count(line[:line.index("]") + 1]) + 1 for line in lines]
+    return token_budget.pack(
+        transcript_data,
+        input_costs,
+        output_costs,
+        input_budget=int(CONTEXT_WINDOW * token_budget.CONTEXT_FILL) - MAX_TOKENS_PER_REQUEST - prompt_overhead,
+        output_budget=int(MAX_TOKENS_PER_REQUEST * DESCRIPTION_OUTPUT_FILL)
+    )
+
+def parse_visual_descriptions(response_content: str, truncated: bool = False) -> List[Dict]:
+    """Extract every well-formed visual-description item from the model's response.
+
+    Responses are ``[start-end] description`` lines; models that answer with JSON
+    anyway have their items recovered one by one, so a truncated response or one
+    malformed item only loses those items. With ``truncated`` (the response hit
+    max_tokens) the last line is dropped, as it may be cut short.
+    """
+    with metrics.span("describe.parse"):
+        items = [item for item in parse_records(response_content, "description") if item["description"]]
+        if truncated and items:
+            items.pop()
+        stream = JSONObjectStream()
+        if not items:
+            items = stream.feed(response_content)
+    visual_descriptions = [
+        item for item in items
+        if all(isinstance(item.get(key), str) for key in ("start_time", "end_time", "description"))
+    ]
+    skipped = stream.malformed + len(items) - len(visual_descriptions)
+    if skipped:
+        metrics.inc("llm_json_malformed_total", skipped)
+    if skipped or truncated or stream.truncated:
+        print(f"Warning: skipped {skipped} malformed item(s){' and a truncated tail' if truncated or stream.truncated else ''}")
+    print(f"Parsed {len(visual_descriptions)} visual description segments")
+    return visual_descriptions
+
+def match_descriptions(segments: List[Dict], items: List[Dict]) -> Dict[int, str]:
+    """Map positions in ``segments`` to the description the model returned for them.
+
+    Items are matched on their exact timestamps first, then on start time; when the
+    leftovers on both sides have the same count they are paired in order.
+    """
+    matched: Dict[int, str] = {}
+    # Segments can share timestamps; each key lists its segments, filled in order
+    by_times: Dict[tuple, List[int]] = {}
+    by_start: Dict[str, List[int]] = {}
+    for i, segment in enumerate(segments):
+        by_times.setdefault((segment["start_time"], segment["end_time"]), []).append(i)
+        by_start.setdefault(segment["start_time"], []).append(i)
+    leftovers = []
+    for item in items:
+        position = next((i for i in by_times.get((item["start_time"], item["end_time"]), []) if i not in matched), None)
+        if position is None:
+            position = next((i for i in by_start.get(item["start_time"], []) if i not in matched), None)
+        if position is None:
+            leftovers.append(item)
         else:
-            diff = abs(len(all_descriptions) - len(transcript_data))
-            if diff <= 3:
-                print(f"Warning: {diff} segments missing/extra. Proceeding with available descriptions.")
-                return all_descriptions
-            print(f"\nError: Total number of descriptions ({len(all_descriptions)}) does not match total number of transcript segments ({len(transcript_data)})")
+            matched[position] = item["description"]
+    unmatched = [i for i in range(len(segments)) if i not in matched]
+    if leftovers and len(leftovers) == len(unmatched):
+        for position, item in zip(unmatched, leftovers):
+            matched[position] = item["description"]
+    return matched
+
+@metrics.timed("describe.chunk")
+def describe_chunk(chunk: List[Dict], client, chunk_number: int, num_chunks: int,
+                   job: Optional[JobHandle] = None) -> Optional[List[Dict]]:
+    """Generate visual descriptions for one chunk of transcript segments.
+
+    Segments the response misses or garbles are re-requested on their own (up to
+    DESCRIPTION_FOLLOWUP_ATTEMPTS times) and merged back in transcript order. Returns
+    None only if nothing could be described; a partial list otherwise.
+    """
+    if job:
+        job.check_cancelled()
+    print(f"\nProcessing chunk {chunk_number} of {num_chunks}")
+    prompt = build_description_prompt(chunk)
+    cache_key = make_cache_key(GROQ_MODEL, GROQ_TEMPERATURE, MAX_TOKENS_PER_REQUEST, prompt)
+    cached = description_cache.get(cache_key)
+    if cached is not None:
+        print(f"Chunk {chunk_number} served from description cache")
+        return cached
+
+    described: Dict[int, str] = {}
+    missing = list(range(len(chunk)))
+    for attempt in range(DESCRIPTION_FOLLOWUP_ATTEMPTS + 1):
+        if attempt:
+            if job:
+                job.check_cancelled()
+            print(f"Re-requesting {len(missing)} missing segment(s) of chunk {chunk_number} "
+                  f"(follow-up {attempt}/{DESCRIPTION_FOLLOWUP_ATTEMPTS})")
+            segments = [chunk[i] for i in missing]
+            request_prompt = build_description_prompt(segments)
+            max_tokens = min(MAX_TOKENS_PER_REQUEST, FOLLOWUP_TOKENS_PER_SEGMENT * len(segments) + 200)
+        else:
+            print(f"Sending chunk {chunk_number} to Groq API...")
+            segments, request_prompt, max_tokens = chunk, prompt, MAX_TOKENS_PER_REQUEST
+        try:
+            chat_completion = call_groq_with_limit(client, request_prompt, max_tokens)
+        except Exception as e:
+            print(f"Groq API Error: {e}")
+            if hasattr(e, 'response'):
+                print(f"API Response: {e.response}")
+            break
+
+        choice = chat_completion.choices[0]
+        response_content = choice.message.content or ""
+        print(f"Received response from Groq API for chunk {chunk_number} ({len(response_content)} chars)")
+        matched = match_descriptions(segments, parse_visual_descriptions(response_content, choice.finish_reason == "length"))
+        for position, description in matched.items():
+            described[missing[position]] = description
+        missing = [i for i in range(len(chunk)) if i not in described]
+        if not missing:
+            break
+
+    if not described:
+        return None
+    visual_descriptions = [
+        {
+            "start_time": segment["start_time"],
+            "end_time": segment["end_time"],
+            "description": described[i]
+        }
+        for i, segment in enumerate(chunk) if i in described
+    ]
+    if missing:
+        print(f"Warning: chunk {chunk_number} is missing descriptions for {len(missing)} of {len(chunk)} segments")
+    else:
+        description_cache.set(cache_key, visual_descriptions)
+    return visual_descriptions
+
+def generate_visual_description(transcript_data: List[Dict], client, job: Optional[JobHandle] = None,
+                                progress_key: Optional[str] = None) -> Optional[List[Dict]]:
+    """Generate visual descriptions for the video using Groq.
+
+    Chunks are sent concurrently (up to ``CHUNK_WORKERS`` at a time) under the
+    process-wide Groq rate limiter, and the descriptions are aligned to transcript
+    segments by timestamp (see alignment.py). With a ``job``, finished chunks and the
+    alignment report are recorded under ``progress[progress_key]``.
+    """
+    try:
+        chunks = pack_description_chunks(transcript_data)
+        print(f"Packed {len(transcript_data)} segments into {len(chunks)} chunk(s) "
+              f"(largest: {max((len(chunk) for chunk in chunks), default=0)} segments)")
+        workers = max(1, min(CHUNK_WORKERS, len(chunks)))
+        if job:
+            job.set_progress(progress_key, chunks_total=len(chunks), chunks_done=0)
+
+        def run_chunk(chunk, number):
+            descriptions = describe_chunk(chunk, client, number, len(chunks), job)
+            if job:
+                job.increment(progress_key, "chunks_done")
+            return descriptions
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(in_context(run_chunk), chunk, number)
+                for number, chunk in enumerate(chunks, start=1)
+            ]
+            # Collect in submission order so descriptions line up with the transcript
+            chunk_results = [future.result() for future in futures]
+        
+        all_descriptions = []
+        for number, descriptions in enumerate(chunk_results, start=1):
+            if descriptions is None:
+                print(f"Error: chunk {number} of {len(chunks)} failed")
+                return None
+            all_descriptions.extend(descriptions)
+
+        # Join descriptions to segments by time rather than trusting list positions
+        # Leftovers are duplicate or invented-timestamp replies for segments already described
+        aligned, report, _ = align_descriptions(transcript_data, all_descriptions)
+        print(f"Alignment: {report}")
+        if job:
+            job.set_progress(progress_key, alignment=report)
+        if report["missing"] > max(3, len(transcript_data) * DESCRIPTION_MAX_MISSING_RATIO):
+            print(f"\nError: {report['missing']} of {len(transcript_data)} transcript segments have no visual description")
             return None
+        return [
+            {
+                "start_time": segment["start_time"],
+                "end_time": segment["end_time"],
+                "description": description
+            }
+            for segment, description in zip(transcript_data, aligned) if description
+        ]
         
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"\nError during visual description generation: {e}")
         import traceback
@@ -250,20 +390,52 @@ def generate_visual_description(transcript_data: List[Dict], client) -> Optional
         return None
 
 def get_video_title(video_id: str) -> Optional[str]:
-    """Fetch the title of a YouTube video using the oEmbed endpoint."""
+    """Fetch the title of a YouTube video using the (cached) oEmbed endpoint."""
+    return youtube_data.fetch_title(video_id)
+
+def video_output_path(video_id: str, workspace: Optional[Workspace] = None) -> Path:
+    """Path of the per-video analysis file."""
+    return (workspace or get_workspace()).video_output_path(video_id)
+
+def compute_fingerprint(transcript_data: List[Dict]) -> Dict:
+    """Fingerprint a video's inputs: its transcript plus the description model config."""
+    return {
+        "transcript": make_cache_key(transcript_data),
+        "model": make_cache_key(GROQ_MODEL, GROQ_TEMPERATURE, MAX_TOKENS_PER_REQUEST, build_description_prompt([]))
+    }
+
+def load_reusable_analysis(video_id: str, fingerprint: Dict, workspace: Optional[Workspace] = None) -> Optional[Dict]:
+    """Return the saved analysis for ``video_id`` if it was produced from the same inputs."""
+    output_file = video_output_path(video_id, workspace)
+    if not output_file.exists():
+        return None
     try:
-        oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-        response = requests.get(oembed_url)
-        if response.status_code == 200:
-            return response.json()['title']
+        with open(output_file, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Ignoring unreadable analysis {output_file}: {e}")
         return None
-    except Exception as e:
-        print(f"Error fetching video title: {e}")
+    if saved.get("fingerprint") != fingerprint:
+        return None
+    if saved.get("incomplete"):
+        # Accepted with some segments undescribed; describe again rather than keep the gaps
+        print(f"Not reusing {output_file}: {saved['incomplete']} segment(s) had no visual description")
         return None
+    return saved
 
-def process_single_video(video_url: str, client) -> Optional[Dict]:
-    """Process a single YouTube video and return the analysis data."""
+@metrics.timed("video.process")
+def process_single_video(video_url: str, client, incremental: bool = True,
+                         job: Optional[JobHandle] = None, workspace: Optional[Workspace] = None) -> Optional[Dict]:
+    """Process a single YouTube video and return the analysis data.
+
+    With ``incremental`` set, a saved analysis whose fingerprint matches the current
+    transcript and model config is reused instead of calling Groq again. With a
+    ``job``, the video's stage and chunk counts are reported under ``progress[video_url]``.
+    """
     try:
+        if job:
+            job.check_cancelled()
+            job.set_progress(video_url, status="fetching")
         video_id = extract_video_id(video_url)
         if not video_id:
             return None
@@ -277,9 +449,25 @@ def process_single_video(video_url: str, client) -> Optional[Dict]:
         transcript_data = extract_transcript(video_url)
         if not transcript_data:
             return None
+        
+        fingerprint = compute_fingerprint(transcript_data)
+        output_file = video_output_path(video_id, workspace)
+        if incremental:
+            saved = load_reusable_analysis(video_id, fingerprint, workspace)
+            if saved:
+                print(f"Reusing unchanged analysis from: {output_file}")
+                if (saved.get("title"), saved.get("url")) != (video_title, video_url):
+                    saved["title"] = video_title
+                    saved["url"] = video_url
+                    atomic_write_json(output_file, saved, indent=None)
+                if job:
+                    job.set_progress(video_url, status="reused")
+                return saved
             
         # Generate visual descriptions
-        visual_descriptions = generate_visual_description(transcript_data, client)
+        if job:
+            job.set_progress(video_url, status="describing")
+        visual_descriptions = generate_visual_description(transcript_data, client, job, video_url)
         if not visual_descriptions:
             return None
             
@@ -289,30 +477,96 @@ def process_single_video(video_url: str, client) -> Optional[Dict]:
             "title": video_title,
             "url": video_url,
             "transcription": transcript_data,
-            "visual_description": visual_descriptions
+            "visual_description": visual_descriptions,
+            "fingerprint": fingerprint
         }
+        missing = len(transcript_data) - len(visual_descriptions)
+        if missing:
+            video_analysis["incomplete"] = missing
         
         # Save individual video analysis
-        output_file = f"data/output/youtube_{video_id}_enhanced.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(video_analysis, f, indent=2)
+        atomic_write_json(output_file, video_analysis, indent=None)
         print(f"Saved individual analysis to: {output_file}")
+        if job:
+            job.set_progress(video_url, status="done")
         
         return video_analysis
         
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"Error processing video {video_url}: {e}")
         return None
 
-def clean_output_directory():
+def prune_output_directory(keep_video_ids: List[str], workspace: Optional[Workspace] = None,
+                           older_than: Optional[float] = None):
+    """Remove per-video analyses that are not part of the current batch.
+
+    With ``older_than`` (a time.time() value), files written since then are kept,
+    e.g. by another batch running in the same workspace.
+    """
+    workspace = workspace or get_workspace()
+    keep = {workspace.video_output_path(video_id).name for video_id in keep_video_ids}
+    for file in workspace.output_dir.glob("youtube_*_enhanced.json"):
+        if file.name not in keep:
+            try:
+                if older_than is not None and file.stat().st_mtime >= older_than:
+                    continue
+            except OSError:
+                continue
+            try:
+                file.unlink()
+                print(f"Removed stale analysis: {file}")
+            except Exception as e:
+                print(f"Error removing {file}: {e}")
+
+@metrics.timed("video.merge")
+def merge_final_json(video_ids: List[str], workspace: Optional[Workspace] = None) -> Optional[Dict]:
+    """Rebuild final.json from the per-video analysis files, in the given order.
+
+    When none of the videos has an analysis, final.json and its index are removed
+    (so /ask and summaries do not serve a previous batch) and None is returned.
+    """
+    workspace = workspace or get_workspace()
+    all_analyses = []
+    for video_id in video_ids:
+        output_file = workspace.video_output_path(video_id)
+        if not output_file.exists():
+            continue
+        with open(output_file, 'r', encoding='utf-8') as f:
+            analysis = json.load(f)
+        # The fingerprint and incomplete count are bookkeeping only; keep them out of the LLM context
+        analysis.pop("fingerprint", None)
+        analysis.pop("incomplete", None)
+        all_analyses.append(analysis)
+    
+    if not all_analyses:
+        workspace.final_json.unlink(missing_ok=True)
+        shutil.rmtree(workspace.index_dir, ignore_errors=True)
+        print("\nNo video analyses to merge; removed final.json")
+        return None
+    combined_output = {
+        "total_videos": len(all_analyses),
+        "videos": all_analyses
+    }
+    
+    output_file = workspace.final_json
+    atomic_write_json(output_file, combined_output, indent=None)
+    print(f"\nSaved combined analysis to: {output_file}")
+    return combined_output
+
+def clean_output_directory(workspace: Optional[Workspace] = None):
     """Remove all files from the output directory before processing."""
     try:
-        output_dir = Path("data/output")
+        output_dir = (workspace or get_workspace()).output_dir
         if output_dir.exists():
             print("\nCleaning output directory...")
             for file in output_dir.glob("*"):
                 try:
-                    file.unlink()
+                    if file.is_dir():
+                        shutil.rmtree(file)
+                    else:
+                        file.unlink()
                     print(f"Removed: {file}")
                 except Exception as e:
                     print(f"Error removing {file}: {e}")
@@ -323,49 +577,106 @@ def clean_output_directory():
     except Exception as e:
         print(f"Error cleaning output directory: {e}")
 
-def process_multiple_videos(video_urls: List[str]):
-    """Process multiple YouTube videos and combine their analyses."""
+def _timed_process_single_video(url: str, client, incremental: bool = True,
+                                job: Optional[JobHandle] = None, workspace: Optional[Workspace] = None) -> tuple:
+    """Run process_single_video for one URL and return (analysis, timing)."""
+    print(f"\nProcessing video: {url}")
+    started = time.perf_counter()
+    try:
+        analysis = process_single_video(url, client, incremental=incremental, job=job, workspace=workspace)
+    except JobCancelled:
+        analysis = None
+    except Exception as e:
+        print(f"Error processing video {url}: {e}")
+        analysis = None
+    elapsed = time.perf_counter() - started
+    if not analysis:
+        print(f"Failed to process video: {url}")
+    timing = {
+        "url": url,
+        "status": "ok" if analysis else ("cancelled" if job and job.cancelled else "failed"),
+        "seconds": round(elapsed, 2)
+    }
+    if job and not analysis:
+        job.set_progress(url, status=timing["status"])
+    return analysis, timing
+
+def process_multiple_videos(video_urls: List[str], max_workers: Optional[int] = None, full_rebuild: bool = False,
+                            job: Optional[JobHandle] = None, workspace: Optional[Workspace] = None) -> List[Dict]:
+    """Process multiple YouTube videos concurrently and combine their analyses.
+
+    Up to ``max_workers`` videos (default ``VIDEO_WORKERS``) are processed at once;
+    pass 1 to process them sequentially. By default only new or changed videos are
+    sent to Groq and final.json is merged from the per-video files in the order of
+    ``video_urls``; ``full_rebuild`` wipes the output directory and reprocesses everything.
+    Returns the per-video timings.
+
+    When run as a background ``job``, per-video progress is reported and a cancelled
+    batch raises JobCancelled without touching final.json. All files are read and
+    written in ``workspace`` (the default workspace's legacy paths when omitted).
+    """
+    workspace = workspace or get_workspace()
+    timings = []
+    started_at = time.time()
+    if job:
+        for url in video_urls:
+            job.set_progress(url, status="queued")
     try:
         # Setup Groq client
         client = setup_groq_client()
         if not client:
             print("Failed to initialize Groq client. Exiting...")
-            return
+            return timings
             
-        # Setup directories and clean output
-        setup_directories()
-        clean_output_directory()
+        # Setup directories; keep earlier analyses unless a full rebuild was requested
+        setup_directories(workspace)
+        if full_rebuild:
+            with workspace.lock:
+                clean_output_directory(workspace)
         
-        # Process each video
-        all_analyses = []
-        for url in video_urls:
-            try:
-                print(f"\nProcessing video: {url}")
-                analysis = process_single_video(url, client)
-                if analysis:
-                    all_analyses.append(analysis)
-                else:
-                    print(f"Failed to process video: {url}")
-            except Exception as e:
-                print(f"Error processing video {url}: {e}")
-                continue
+        # Resolve titles and transcripts for the whole batch before any LLM work starts
+        youtube_data.prefetch([video_id for video_id in map(extract_video_id, video_urls) if video_id])
         
-        # Save combined analysis
-        if all_analyses:
-            combined_output = {
-                "total_videos": len(all_analyses),
-                "videos": all_analyses
-            }
-            
-            output_file = "data/output/final.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(combined_output, f, indent=2)
-            print(f"\nSaved combined analysis to: {output_file}")
+        # Process the videos on a bounded worker pool; map() yields results in input order
+        workers = max(1, min(max_workers or VIDEO_WORKERS, len(video_urls) or 1))
+        batch_started = time.perf_counter()
+        processed_ids = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                in_context(lambda url: _timed_process_single_video(
+                    url, client, incremental=not full_rebuild, job=job, workspace=workspace
+                )),
+                video_urls
+            )
+            for analysis, timing in results:
+                timings.append(timing)
+                if analysis and analysis["video_id"] not in processed_ids:
+                    processed_ids.append(analysis["video_id"])
+        batch_elapsed = time.perf_counter() - batch_started
+        
+        print(f"\nProcessed {len(video_urls)} video(s) with {workers} worker(s) in {batch_elapsed:.1f}s")
+        print(f"Description cache: {description_cache.stats()}")
+        for timing in timings:
+            print(f"  [{timing['status']}] {timing['url']}: {timing['seconds']:.1f}s")
+        
+        if job:
+            job.check_cancelled()
+        
+        # Drop analyses of videos no longer in the batch, then save the combined analysis
+        # and index it for /ask retrieval, as one step per workspace
+        with workspace.lock:
+            prune_output_directory([video_id for video_id in map(extract_video_id, video_urls) if video_id],
+                                   workspace, older_than=started_at)
+            if merge_final_json(processed_ids, workspace):
+                build_index(str(workspace.final_json), str(workspace.index_dir))
             
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"Error in batch processing: {e}")
         import traceback
         traceback.print_exc()
+    return timings
 
 if __name__ == "__main__":
     # List of YouTube video URLs to process
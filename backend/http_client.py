@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import random
+import asyncio
+import weakref
+import threading
+from typing import AsyncIterator, Dict, Optional
+import httpx
+from dotenv import load_dotenv
+from metrics import metrics
+load_dotenv()
+
+# === CONFIGURATION ===
+
+# Base URLs can be pointed at local stubs for offline testing
+BASE_URLS = {
+    "groq": os.getenv("GROQ_API_BASE", "https://api.groq.com/openai/v1"),
+    "llama": os.getenv("LLAMA_API_BASE", "https://api.llama.com/v1"),
+    "tavus": os.getenv("TAVUS_API_BASE", "https://tavusapi.com/v2"),
+}
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "120"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "20"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Retried for every method: the server did not process the request
+UNPROCESSED_STATUS_CODES = {429, 503}
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+class UpstreamError(Exception):
+    """Non-success response from an upstream API."""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Upstream returned {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+# Per event loop, so a client is never used on a loop other than its own
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_sync_clients: Dict[str, httpx.Client] = {}
+_lock = threading.Lock()
+
+
+def _client_options(service: str) -> Dict:
+    return {
+        "base_url": BASE_URLS[service],
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+    }
+
+
+def get_async_client(service: str) -> httpx.AsyncClient:
+    """Return the keep-alive async client for ``service``, one per event loop.
+
+    Clients of loops that have since closed (e.g. ``asyncio.run`` in a worker
+    thread) are dropped, releasing their connections.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        for closed in [other for other in _async_clients.keys() if other.is_closed()]:
+            del _async_clients[closed]
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(service)
+        if client is None or client.is_closed:
+            client = clients[service] = httpx.AsyncClient(**_client_options(service))
+        return client
+
+
+def get_sync_client(service: str) -> httpx.Client:
+    """Return the keep-alive blocking client for ``service`` (safe to share across threads)."""
+    with _lock:
+        client = _sync_clients.get(service)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_options(service))
+            _sync_clients[service] = client
+        return client
+
+
+def _backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends it."""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            except ValueError:
+                pass
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+
+def _should_retry(method: str, retry: bool, error: Optional[Exception] = None,
+                  response: Optional[httpx.Response] = None) -> bool:
+    """Whether a failed attempt may be sent again.
+
+    Requests that never reached the server (connection errors, 429, 503) are always
+    retried; anything else only for idempotent methods or when the caller passed
+    ``retry=True`` (e.g. side-effect free POSTs such as chat completions).
+    """
+    if error is not None:
+        return retry or method.upper() in IDEMPOTENT_METHODS or isinstance(error, UNSENT_ERRORS)
+    if response.status_code not in RETRY_STATUS_CODES:
+        return False
+    return retry or method.upper() in IDEMPOTENT_METHODS or response.status_code in UNPROCESSED_STATUS_CODES
+
+
+async def arequest(service: str, method: str, path: str, retry: bool = False, **kwargs) -> httpx.Response:
+    """Send a request on the pooled async client, retrying transport errors, 429s and 5xx.
+
+    Non-idempotent methods are only retried when the request cannot have been
+    processed, unless ``retry`` is set (see ``_should_retry``).
+    """
+    with metrics.span(f"http.{service}", path=path):
+        return await _arequest(service, method, path, retry, **kwargs)
+
+
+async def _arequest(service: str, method: str, path: str, retry: bool, **kwargs) -> httpx.Response:
+    client = get_async_client(service)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == HTTP_MAX_RETRIES or not _should_retry(method, retry, error=e):
+                raise
+            delay = _backoff_delay(attempt)
+            metrics.inc("http_retries_total", service=service, reason="transport")
+            print(f"[{service}] {method} {path} failed ({e!r}), retrying in {delay:.1f}s")
+        else:
+            if attempt == HTTP_MAX_RETRIES or not _should_retry(method, retry, response=response):
+                return response
+            delay = _backoff_delay(attempt, response)
+            metrics.inc("http_retries_total", service=service, reason=str(response.status_code))
+            print(f"[{service}] {method} {path} returned {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+def request(service: str, method: str, path: str, retry: bool = False, **kwargs) -> httpx.Response:
+    """Blocking counterpart of ``arequest`` for code running outside the event loop."""
+    with metrics.span(f"http.{service}", path=path):
+        return _request(service, method, path, retry, **kwargs)
+
+
+def _request(service: str, method: str, path: str, retry: bool, **kwargs) -> httpx.Response:
+    client = get_sync_client(service)
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        try:
+            response = client.request(method, path, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == HTTP_MAX_RETRIES or not _should_retry(method, retry, error=e):
+                raise
+            delay = _backoff_delay(attempt)
+            metrics.inc("http_retries_total", service=service, reason="transport")
+            print(f"[{service}] {method} {path} failed ({e!r}), retrying in {delay:.1f}s")
+        else:
+            if attempt == HTTP_MAX_RETRIES or not _should_retry(method, retry, response=response):
+                return response
+            delay = _backoff_delay(attempt, response)
+            metrics.inc("http_retries_total", service=service, reason=str(response.status_code))
+            print(f"[{service}] {method} {path} returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+async def apost(service: str, path: str, retry: bool = False, **kwargs) -> httpx.Response:
+    return await arequest(service, "POST", path, retry=retry, **kwargs)
+
+
+def post(service: str, path: str, retry: bool = False, **kwargs) -> httpx.Response:
+    return request(service, "POST", path, retry=retry, **kwargs)
+
+
+async def astream_sse(service: str, path: str, **kwargs) -> AsyncIterator[Dict]:
+    """POST to ``path`` and yield each JSON ``data:`` payload of the Server-Sent Events reply.
+
+    Streams are not retried: once output has been forwarded it cannot be replayed.
+    Raises UpstreamError on a non-200 status.
+    """
+    client = get_async_client(service)
+    async with client.stream("POST", path, **kwargs) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise UpstreamError(response.status_code, body.decode("utf-8", errors="replace"))
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            try:
+                yield json.loads(data)
+            except ValueError:
+                continue
+
+
+async def aclose_all():
+    """Close the current loop's pooled clients and every blocking one (called on application shutdown)."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+    with _lock:
+        for service, client in list(_sync_clients.items()):
+            client.close()
+            _sync_clients.pop(service, None)
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from metrics import metrics, operation
+
+# === CONFIGURATION ===
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "100"))  # finished jobs kept for polling
+JOB_DB = os.getenv("JOB_DB", "data/jobs.sqlite3")
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled", "interrupted")
+JSON_FIELDS = ("progress", "result")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested."""
+
+
+class JobHandle:
+    """Passed to job functions so they can report progress and notice cancellation."""
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job_id in self.manager.cancel_requested
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job has been asked to stop."""
+        if self.cancelled:
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def set_progress(self, key: str, **fields):
+        """Merge ``fields`` into ``progress[key]``."""
+        self.manager._change_progress(self.job_id, key, fields, increment=False)
+
+    def increment(self, key: str, field: str, amount: int = 1):
+        """Add ``amount`` to the counter ``progress[key][field]``."""
+        self.manager._change_progress(self.job_id, key, {field: amount}, increment=True)
+
+
+class JobManager:
+    """Run long tasks on a background worker pool and track their status by job ID.
+
+    Job state lives in a small SQLite database, so status and results survive a
+    restart; jobs that were still queued or running when the process stopped are
+    reported as ``interrupted``. Cancellation is cooperative: queued jobs never
+    start, running jobs stop at their next ``JobHandle.check_cancelled()``.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, db_path: str = JOB_DB):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.lock = threading.Lock()
+        self.progress: Dict[str, Dict] = {}
+        self.futures = {}
+        self.cancel_requested = set()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, kind TEXT, status TEXT, created_at REAL, started_at REAL, "
+                "finished_at REAL, progress TEXT, result TEXT, error TEXT)"
+            )
+            self.db.execute(
+                "UPDATE jobs SET status = 'interrupted', finished_at = ? WHERE status IN ('queued', 'running')",
+                (time.time(),)
+            )
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, pass_job: bool = False, **kwargs) -> str:
+        """Queue ``fn(*args, **kwargs)`` and return its job ID immediately.
+
+        With ``pass_job`` set, ``fn`` also receives a ``job=JobHandle`` keyword argument.
+        """
+        job_id = uuid.uuid4().hex
+        with self.lock, self.db:
+            self.progress[job_id] = {}
+            self.db.execute(
+                "INSERT INTO jobs (job_id, kind, status, created_at, progress) VALUES (?, ?, 'queued', ?, '{}')",
+                (job_id, kind, time.time())
+            )
+            self._prune()
+        if pass_job:
+            kwargs["job"] = JobHandle(self, job_id)
+        with self.lock:
+            # Held so _run cannot finish and clean up before the future is recorded
+            self.futures[job_id] = self.executor.submit(self._run, job_id, kind, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, kind: str, fn: Callable[..., Any], args: tuple, kwargs: dict):
+        token = operation.set(f"job:{kind}")
+        try:
+            if job_id in self.cancel_requested:
+                self._update(job_id, status="cancelled", finished_at=time.time())
+                return
+            self._update(job_id, status="running", started_at=time.time())
+            try:
+                with metrics.span(f"job.{kind}", job_id=job_id):
+                    result = fn(*args, **kwargs)
+            except JobCancelled:
+                self._update(job_id, status="cancelled", finished_at=time.time())
+            except Exception as e:
+                traceback.print_exc()
+                self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            else:
+                status = "cancelled" if job_id in self.cancel_requested else "completed"
+                self._update(job_id, status=status, result=result, finished_at=time.time())
+        finally:
+            operation.reset(token)
+            with self.lock:
+                self.progress.pop(job_id, None)
+                self.futures.pop(job_id, None)
+                self.cancel_requested.discard(job_id)
+
+    def _update(self, job_id: str, **fields):
+        for name in JSON_FIELDS:
+            if name in fields:
+                fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock, self.db:
+            self.db.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def _change_progress(self, job_id: str, key: str, fields: Dict, increment: bool):
+        with self.lock, self.db:
+            progress = self.progress.get(job_id)
+            if progress is None:
+                return
+            entry = progress.setdefault(key, {})
+            for name, value in fields.items():
+                entry[name] = entry.get(name, 0) + value if increment else value
+            self.db.execute(
+                "UPDATE jobs SET progress = ? WHERE job_id = ?",
+                (json.dumps(progress, ensure_ascii=False), job_id)
+            )
+
+    def _prune(self):
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        self.db.execute(
+            f"DELETE FROM jobs WHERE job_id IN (SELECT job_id FROM jobs WHERE status IN ({placeholders}) "
+            "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (*FINISHED_STATUSES, JOB_HISTORY)
+        )
+
+    def _row_to_job(self, row) -> Dict:
+        job = dict(row)
+        for name in JSON_FIELDS:
+            job[name] = json.loads(job[name]) if job[name] else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Snapshot of a job's state, or None if unknown."""
+        with self.lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list(self, kind: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first, without their results."""
+        query = "SELECT job_id, kind, status, created_at, started_at, finished_at, error FROM jobs"
+        params = []
+        if kind:
+            query += " WHERE kind = ?"
+            params.append(kind)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.db.execute(query, params).fetchall()]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Request cancellation; returns the job's state, or None if unknown."""
+        job = self.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        with self.lock:
+            self.cancel_requested.add(job_id)
+            future = self.futures.get(job_id)
+        if job["status"] == "queued" and future is not None and future.cancel():
+            # Never started, so _run will not clean up after it
+            with self.lock:
+                self.progress.pop(job_id, None)
+                self.futures.pop(job_id, None)
+                self.cancel_requested.discard(job_id)
+            self._update(job_id, status="cancelled", finished_at=time.time())
+        return self.get(job_id)
+
+
+job_manager = JobManager()
@@ -0,0 +1,98 @@
+"""Tolerant parsing of JSON objects in model output.
+
+Visual descriptions are requested as line records (see prompt_format.py);
+``JSONObjectStream`` is the fallback parser for responses that come back as JSON
+anyway.
+"""
+import re
+import json
+from typing import Dict, List
+
+# Repairs applied to each candidate object before parsing
+MISSING_COMMA = re.compile(r'("|\d|true|false|null)(\s*\n\s*)("[^"\n]+"\s*:)')
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def repair_object(text: str) -> str:
+    """Fix the formatting slips models make most often: missing and trailing commas."""
+    text = MISSING_COMMA.sub(r"\1,\2\3", text)
+    return TRAILING_COMMA.sub(r"\1", text)
+
+
+class JSONObjectStream:
+    """Incrementally extract JSON objects from (possibly malformed or truncated) model output.
+
+    Text is fed in pieces; every complete ``{...}`` that parses, directly or after
+    ``repair_object``, is returned as soon as its closing brace arrives. Objects that
+    still fail to parse are counted in ``malformed`` and skipped, and an object cut
+    off at the end of the output is simply never returned, so one bad item no longer
+    loses the rest of the response. Surrounding text, code fences and array brackets
+    are ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.start = None
+        self.in_string = False
+        self.escaped = False
+        self.last = ""  # last significant character outside strings
+        self.malformed = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        """Consume more output and return the objects completed by it."""
+        self.buffer += text
+        objects = []
+        for index in range(self.position, len(self.buffer)):
+            char = self.buffer[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                # Only strings inside an object matter; stray quotes outside are ignored
+                self.in_string = self.depth > 0
+            elif char == "{":
+                if self.depth > 0 and self.last not in ":[,{":
+                    # A value cannot start here, so the previous object lost its closing brace
+                    self.malformed += 1
+                    self.depth = 0
+                if self.depth == 0:
+                    self.start = index
+                self.depth += 1
+            elif char == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    parsed = self._parse(self.buffer[self.start:index + 1])
+                    if parsed is not None:
+                        objects.append(parsed)
+                    self.start = None
+            if not char.isspace():
+                self.last = char
+        self.position = len(self.buffer)
+        if self.start is None:
+            # Nothing pending; drop consumed text so the buffer stays small
+            self.buffer = ""
+            self.position = 0
+        return objects
+
+    def _parse(self, candidate: str):
+        for text in (candidate, repair_object(candidate)):
+            try:
+                value = json.loads(text)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, dict):
+                return value
+        self.malformed += 1
+        return None
+
+    @property
+    def truncated(self) -> bool:
+        """True if the output ended inside an unfinished object."""
+        return self.start is not None
+
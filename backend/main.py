@@ -1,9 +1,7 @@
 import os
 import io
 import sounddevice as sd
-import soundfile as sf
 from pathlib import Path
-import shutil
 import tempfile
 from fastapi import FastAPI, Request, Form, Response, BackgroundTasks
 from starlette.responses import PlainTextResponse
@@ -12,16 +10,30 @@ from pydantic import BaseModel
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
-import uuid
 from generate_podcast import process_and_merge_podcasts
+from jobs import job_manager
 from multilingual import test_translations
 from create_tavus_conversations import create_tavus_conversation
-import requests
-import numpy as np
-from groq import Groq
-from fastapi import Body
-from generate_video_metadata import process_multiple_videos
+import http_client
+from fastapi import Body, Depends, Header
+from typing import Optional
+from generate_video_metadata import process_multiple_videos, description_cache
+from retrieval_index import ensure_index, ASK_TOP_K
+from tts import prepare_wav_stream, synthesize_document, cached_document, document_key, tts_chunks, audio_cache, chunk_cache, TTSError
+from translation import iter_translations, translate_many, translation_cache
+import youtube_data
+import summarize
+import token_budget
+import prompt_format
+import ask_sessions
+from workspace import Workspace, WorkspaceError, get_workspace, atomic_write_text
+from document_store import document_store
+from metrics import metrics, operation, TRACE_FILE
+from starlette.routing import Match
+import re
 import json
+import time
+import asyncio
 
 # Set up Groq client API key and base URL
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
@@ -30,8 +42,11 @@ if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY is not set in environment")
 
 MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
+LLAMA_MODEL = "Llama-4-Maverick-17B-128E-Instruct-FP8"
+ASK_MAX_TOKENS = int(os.getenv("ASK_MAX_TOKENS", "4096"))  # answer length; the context is trimmed to leave room for it
+ASK_FULL_CORPUS_TOKENS = int(os.getenv("ASK_FULL_CORPUS_TOKENS", "4000"))  # stateless /ask sends corpora up to this whole
+SUMMARY_MAX_TOKENS = 1024
 TAVUS_API_KEY = os.getenv("TAVUS_API_KEY")
-TAVUS_API_URL = "https://tavusapi.com/v2/conversations"
 TAVUS_REPLICA_ID = os.getenv("TAVUS_REPLICA_ID")
 TAVUS_PERSONA_ID = os.getenv("TAVUS_PERSONA_ID")
 
@@ -61,14 +76,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_template(request: Request) -> str:
+    """Path template of the route a request matches (e.g. `/jobs/{job_id}`), to keep metric labels bounded."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time every request as a `route <path>` span, until its (possibly streamed) body is finished."""
+    route = route_template(request)
+    token = operation.set(route)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.record_span(f"route {route}", started, time.perf_counter() - started, failed=True)
+        metrics.inc("http_requests_total", route=route, method=request.method, status="500")
+        raise
+    finally:
+        operation.reset(token)
+    body = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            metrics.record_span(f"route {route}", started, time.perf_counter() - started)
+            metrics.inc("http_requests_total", route=route, method=request.method, status=str(response.status_code))
+
+    response.body_iterator = timed_body()
+    return response
+
+@app.exception_handler(WorkspaceError)
+async def workspace_error_handler(request: Request, exc: WorkspaceError):
+    return JSONResponse(status_code=400, content={"error": str(exc)})
+
+def request_workspace(workspace: Optional[str] = None, x_workspace_id: Optional[str] = Header(None)) -> Workspace:
+    """Resolve the caller's workspace from `?workspace=` or the `X-Workspace-Id` header.
+
+    Requests without either use the default workspace (the original shared paths).
+    """
+    return get_workspace(workspace or x_workspace_id)
+
+@app.on_event("startup")
+def warm_retrieval_index():
+    ensure_index()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await http_client.aclose_all()
+
+@app.on_event("shutdown")
+def write_trace_file():
+    if metrics.trace_enabled and TRACE_FILE:
+        metrics.dump_trace(TRACE_FILE)
+
 # ====== MODELS ======
 class PromptRequest(BaseModel):
     question: str
+    session_id: Optional[str] = None
     
     class Config:
         schema_extra = {
             "example": {
-                "question": "What are the main topics covered in the video?"
+                "question": "What are the main topics covered in the video?",
+                "session_id": "my-session-1"
             }
         }
 
@@ -116,6 +192,290 @@ class ConversationMessage(BaseModel):
             }
         }
 
+# ====== HELPERS ======
+
+def final_json_prompt_text(workspace: Workspace) -> str:
+    """All of final.json in the prompt layout, built once per file version."""
+    return document_store.derived(
+        workspace.final_json, "prompt_text", lambda data: prompt_format.format_videos(data.get("videos", []))
+    )
+
+def audio_file_response(request: Request, path: Path, etag: str, filename: str) -> Response:
+    """Serve a cached audio file with ETag, If-None-Match and single-range Range support."""
+    etag = f'"{etag}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    size = path.stat().st_size
+    range_header = request.headers.get("range", "")
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or not any(match.groups()):
+        return FileResponse(path, media_type="audio/wav", headers=headers)
+
+    start_text, end_text = match.groups()
+    if start_text:
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(end_text), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    def read_range():
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = f.read(min(65536, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(read_range(), status_code=206, media_type="audio/wav", headers=headers)
+
+ASK_SYSTEM_PROMPT = (
+    "You are an expert assistant. The following is structured data about a video (including transcript and visual descriptions). "
+    f"{prompt_format.RECORD_LEGEND} "
+    "Use this data to answer any questions the user asks about the video. Here is the data:\n"
+)
+ASK_SESSION_PROMPT = (
+    "You are an expert assistant answering questions about videos. "
+    f"{prompt_format.RECORD_LEGEND} "
+    "Each question comes with the most relevant structured data about the videos (transcript and visual descriptions); "
+    "use it and the conversation so far to answer."
+)
+
+def corpus_prompt_text(workspace: Workspace) -> str:
+    """All of final.json in the prompt layout, videos in canonical order (see ask_sessions.py),
+    built once per file version."""
+    return document_store.derived(
+        workspace.final_json, "corpus_prompt_text",
+        lambda data: prompt_format.format_videos(ask_sessions.canonical_videos(data))
+    )
+
+def corpus_tokens(workspace: Workspace) -> int:
+    """Tokens of the system prompt with the whole corpus, counted once per file version."""
+    return document_store.derived(
+        workspace.final_json, "corpus_prompt_tokens",
+        lambda data: token_budget.counter.count(ASK_SYSTEM_PROMPT + corpus_prompt_text(workspace), LLAMA_MODEL)
+    )
+
+def corpus_fits(workspace: Workspace, reserved: int = 0) -> bool:
+    """Whether the whole corpus fits the context, leaving ``ASK_MAX_TOKENS`` plus ``reserved`` tokens."""
+    budget = int(token_budget.context_window(LLAMA_MODEL) * token_budget.CONTEXT_FILL) - ASK_MAX_TOKENS - reserved
+    return corpus_tokens(workspace) <= budget
+
+def ask_whole_corpus(workspace: Workspace) -> bool:
+    """Whether stateless /ask sends the whole corpus: only small ones, as every question pays for all of it."""
+    return corpus_tokens(workspace) <= ASK_FULL_CORPUS_TOKENS and corpus_fits(workspace)
+
+def retrieved_context(query: str, workspace: Workspace) -> str:
+    """The segments most relevant to ``query`` (or all of final.json without a retrieval index)."""
+    index = ensure_index(str(workspace.final_json), str(workspace.index_dir))
+    if index is not None:
+        return prompt_format.format_segments(index.search_with_times(query))
+    return corpus_prompt_text(workspace)
+
+def build_ask_messages(question: str, workspace: Workspace) -> list:
+    """Build the /ask chat messages, trimmed to leave ``ASK_MAX_TOKENS`` for the answer.
+
+    Corpora up to ``ASK_FULL_CORPUS_TOKENS`` are sent whole; larger ones are narrowed
+    to the most relevant segments.
+    """
+    if ask_whole_corpus(workspace):
+        context = corpus_prompt_text(workspace)
+    else:
+        context = retrieved_context(question, workspace)
+    return token_budget.fit_messages([
+        {"role": "system", "content": ASK_SYSTEM_PROMPT + context},
+        {"role": "user", "content": question}
+    ], LLAMA_MODEL, ASK_MAX_TOKENS)
+
+def ask_session_prefix(workspace: Workspace) -> str:
+    """The system prompt every /ask session on final.json starts with, built once per file version.
+
+    It holds the whole corpus (videos in canonical order, see ask_sessions.py) when that
+    fits next to the history and answer budgets, so each turn repeats the same prefix
+    and upstream prompt caching can reuse it; larger corpora get a fixed instruction
+    prompt and per-question retrieved segments instead.
+    """
+    if corpus_fits(workspace, ask_sessions.ASK_SESSION_HISTORY_TOKENS):
+        return ASK_SYSTEM_PROMPT + corpus_prompt_text(workspace)
+    return ASK_SESSION_PROMPT
+
+def build_session_messages(question: str, workspace: Workspace, history: list) -> list:
+    """Build the chat messages for a turn of an /ask session: prefix, earlier turns, question."""
+    prefix = ask_session_prefix(workspace)
+    content = question
+    if prefix == ASK_SESSION_PROMPT:
+        # Follow-ups ("and after that?") retrieve better together with the previous question
+        previous = history[-2]["content"] if history else ""
+        content = f"Relevant data:\n{retrieved_context(f'{previous} {question}', workspace)}\n\nQuestion: {question}"
+    return token_budget.fit_messages(
+        [{"role": "system", "content": prefix}, *history, {"role": "user", "content": content}],
+        LLAMA_MODEL, ASK_MAX_TOKENS
+    )
+
+def ask_prompt_variant(workspace: Workspace, session) -> str:
+    """Which prompt a first /ask question gets: the whole corpus, or retrieved segments
+    (in the system prompt when stateless, next to the question in a session)."""
+    if session is not None:
+        return "corpus" if ask_session_prefix(workspace) != ASK_SESSION_PROMPT else "session-retrieved"
+    return "corpus" if ask_whole_corpus(workspace) else "retrieved"
+
+def prepare_ask(data: PromptRequest, workspace: Workspace):
+    """Resolve an /ask request to (session, prompt messages, answer-cache key, cached answer).
+
+    Only questions without earlier turns use the answer cache (keyed by the normalized
+    question, a hash of the corpus and the prompt variant), since later answers depend
+    on the conversation. On a cache hit no prompt is built.
+    """
+    session = ask_sessions.sessions.get(workspace.id, data.session_id) if data.session_id else None
+    history = session.history(LLAMA_MODEL) if session else []
+    key = None
+    if not history:
+        corpus_hash = document_store.derived(workspace.final_json, "corpus_hash", ask_sessions.corpus_hash)
+        key = ask_sessions.answer_key(data.question, corpus_hash, ask_prompt_variant(workspace, session),
+                                      LLAMA_MODEL, ASK_MAX_TOKENS, ASK_TOP_K, ASK_SYSTEM_PROMPT, ASK_SESSION_PROMPT)
+        cached = ask_sessions.answer_cache.get(key)
+        if cached is not None:
+            return session, None, key, cached
+    if session:
+        return session, build_session_messages(data.question, workspace, history), key, None
+    return session, build_ask_messages(data.question, workspace), key, None
+
+def finish_ask(question: str, answer: str, session, key: Optional[str]):
+    """Record an /ask answer in the answer cache (first questions only) and the session."""
+    if key is not None:
+        ask_sessions.answer_cache.set(key, answer)
+    if session is not None:
+        session.append(question, answer)
+
+def ask_response(answer: str, session, cached: bool = False) -> dict:
+    body = {"response": answer}
+    if session is not None:
+        body["session_id"] = session.id
+    if cached:
+        body["cached"] = True
+    return body
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You are an expert assistant tasked with summarizing video content. "
+    "The following is structured data about a video (including transcript and visual descriptions). "
+    f"{prompt_format.RECORD_LEGEND} "
+    "Create a detailed summary of the video content based on this data. Here is the data:\n"
+)
+SUMMARY_NOTES_PROMPT = (
+    "You are an expert assistant tasked with summarizing video content. "
+    "The following are notes summarizing consecutive parts of the videos, in order. "
+    "Create a detailed summary of the video content based on these notes. Here are the notes:\n"
+)
+
+def build_summary_messages(workspace: Workspace) -> list:
+    """Build the /auto-summarize chat messages from final.json.
+
+    Small corpora are sent whole; larger ones are map-reduced into per-window notes
+    first (see summarize.py). This can make blocking API calls, so async routes run
+    it in a worker thread.
+    """
+    final_data = document_store.read_json(workspace.final_json)
+    question = {"role": "user", "content": "Please provide a comprehensive summary of this video content."}
+    return summarize.prepare_messages(
+        final_data.get("videos", []),
+        "llama",
+        LLAMA_MODEL,
+        direct_messages=lambda videos: [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT + final_json_prompt_text(workspace)},
+            question
+        ],
+        reduce_messages=lambda notes: [
+            {"role": "system", "content": SUMMARY_NOTES_PROMPT + "\n\n---\n\n".join(notes)},
+            question
+        ],
+        max_tokens=SUMMARY_MAX_TOKENS
+    )
+
+def save_podcast_text(text: str, workspace: Workspace):
+    """Write the podcast/summary script that the podcast and TTS routes read."""
+    atomic_write_text(workspace.podcast_text, text)
+
+def extract_stream_delta(event: dict) -> str:
+    """Pull the text delta out of a Llama API or OpenAI-style streaming event."""
+    if "event" in event:
+        delta = event["event"].get("delta") or {}
+        return delta.get("text") or ""
+    choices = event.get("choices") or []
+    if choices:
+        return (choices[0].get("delta") or {}).get("content") or ""
+    return ""
+
+def settle_llama_usage(prompt_messages: list, response: dict):
+    """Calibrate Llama token estimates from a response's reported usage."""
+    token_budget.settle(LLAMA_MODEL, token_budget.raw_count_messages(prompt_messages), response)
+
+def sse_event(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+async def stream_llama_completion(label: str, prompt_messages: list, max_tokens: int, on_complete=None):
+    """Relay Llama API streaming deltas as SSE events, logging time-to-first-token.
+
+    Emits ``{"delta": ...}`` events, then ``{"done": true}``, or ``{"error": ...}`` on failure.
+    ``on_complete`` receives the full text once the upstream stream finishes.
+    """
+    LLAMA_API_KEY = os.getenv("LLAMA_API_KEY")
+    started = time.perf_counter()
+    first_token_at = None
+    usage_event = {}
+    parts = []
+    try:
+        async for event in http_client.astream_sse(
+            "llama",
+            "/chat/completions",
+            headers={
+                "Authorization": f"Bearer {LLAMA_API_KEY}",
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
+            },
+            json={
+                "model": LLAMA_MODEL,
+                "messages": prompt_messages,
+                "max_tokens": max_tokens,
+                "stream": True
+            }
+        ):
+            # Token counts arrive in a final usage/metrics event, when the API sends one
+            payload = event.get("event") if isinstance(event.get("event"), dict) else event
+            if "usage" in payload or "metrics" in payload:
+                usage_event = payload
+            delta = extract_stream_delta(event)
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                print(f"[{label}] time to first token: {first_token_at - started:.2f}s")
+                metrics.record_span("llm.llama.first_token", started, first_token_at - started)
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+    except Exception as e:
+        print(f"[{label}] stream failed: {e}")
+        yield sse_event({"error": str(e)})
+        return
+    print(f"[{label}] stream finished in {time.perf_counter() - started:.2f}s")
+    metrics.record_usage("llama", LLAMA_MODEL, usage_event)
+    await asyncio.to_thread(settle_llama_usage, prompt_messages, usage_event)
+    if on_complete:
+        await asyncio.to_thread(on_complete, "".join(parts))
+    yield sse_event({"done": True})
+
 # ====== ROUTES ======
 
 @app.get("/", tags=["Health Check"])
@@ -126,46 +486,44 @@ def root():
     return {"message": "API is working"}
 
 @app.post("/ask", tags=["Video Analysis"])
-def ask_question(data: PromptRequest):
+async def ask_question(data: PromptRequest, workspace: Workspace = Depends(request_workspace)):
     """
     Ask questions about the processed video content.
     
     The response will be generated based on the video's transcript and visual descriptions.
+    With a `session_id`, earlier questions and answers of that session are sent along
+    (sessions start on first use and end when idle for `ASK_SESSION_TTL_MINUTES`, or with
+    `DELETE /ask/sessions/{session_id}`). Repeated first questions on an unchanged
+    corpus are answered from a cache (`"cached": true`).
     """
     try:
         # Check if final.json exists
-        if not os.path.exists("data/output/final.json"):
+        if not workspace.final_json.exists():
             return {"error": "No video data available. Please process videos first."}
 
-        # Load context from final.json
-        with open("data/output/final.json", "r", encoding="utf-8") as f:
-            context = f.read()
-
         LLAMA_API_KEY = os.getenv("LLAMA_API_KEY")
         if not LLAMA_API_KEY:
             return {"error": "LLAMA_API_KEY not configured"}
 
-        llama_api_url = "https://api.llama.com/v1/chat/completions"
-        system_prompt = (
-            "You are an expert assistant. The following is structured data about a video (including transcript and visual descriptions). "
-            "Use this data to answer any questions the user asks about the video. Here is the data:\n"
-            f"{context}"
-        )
-        prompt_messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": data.question}
-        ]
+        # Index loading/rebuilds, corpus hashing and prompt trimming are CPU/disk bound
+        session, prompt_messages, key, cached = await asyncio.to_thread(prepare_ask, data, workspace)
+        if cached is not None:
+            if session is not None:
+                session.append(data.question, cached)
+            return ask_response(cached, session, cached=True)
         
-        response = requests.post(
-            llama_api_url,
+        response = await http_client.apost(
+            "llama",
+            "/chat/completions",
+            retry=True,
             headers={
                 "Authorization": f"Bearer {LLAMA_API_KEY}",
                 "Content-Type": "application/json"
             },
             json={
-                "model": "Llama-4-Maverick-17B-128E-Instruct-FP8",
+                "model": LLAMA_MODEL,
                 "messages": prompt_messages,
-                "max_tokens": 900000
+                "max_tokens": ASK_MAX_TOKENS
             }
         )
 
@@ -180,6 +538,8 @@ def ask_question(data: PromptRequest):
             return {"error": f"API call failed: {error_message}"}
 
         res_json = response.json()
+        metrics.record_usage("llama", LLAMA_MODEL, res_json)
+        await asyncio.to_thread(settle_llama_usage, prompt_messages, res_json)
         
         # Handle different possible response formats
         if 'completion_message' in res_json:
@@ -189,8 +549,11 @@ def ask_question(data: PromptRequest):
         else:
             return {"error": "Unexpected API response format"}
 
-        return {"response": content}
+        await asyncio.to_thread(finish_ask, data.question, content, session, key)
+        return ask_response(content, session)
 
+    except ask_sessions.SessionError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except FileNotFoundError:
         return {"error": "Required data files not found"}
     except json.JSONDecodeError:
@@ -198,8 +561,52 @@ def ask_question(data: PromptRequest):
     except Exception as e:
         return {"error": f"An error occurred: {str(e)}"}
 
+@app.post("/ask/stream", tags=["Video Analysis"])
+async def ask_question_stream(data: PromptRequest, workspace: Workspace = Depends(request_workspace)):
+    """
+    Streaming version of `/ask`.
+    
+    Answer tokens are sent as Server-Sent Events (`data: {"delta": "..."}`) as soon as
+    the model produces them, followed by `data: {"done": true}`. Sessions and cached
+    answers work as in `/ask`; a cached answer arrives as a single delta.
+    """
+    if not workspace.final_json.exists():
+        return JSONResponse(status_code=404, content={"error": "No video data available. Please process videos first."})
+    if not os.getenv("LLAMA_API_KEY"):
+        return JSONResponse(status_code=500, content={"error": "LLAMA_API_KEY not configured"})
+    try:
+        session, prompt_messages, key, cached = await asyncio.to_thread(prepare_ask, data, workspace)
+    except ask_sessions.SessionError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"An error occurred: {str(e)}"})
+    if cached is not None:
+        if session is not None:
+            session.append(data.question, cached)
+
+        async def cached_events():
+            yield sse_event({"delta": cached})
+            yield sse_event({"done": True, "cached": True})
+
+        events = cached_events()
+    else:
+        events = stream_llama_completion("ask/stream", prompt_messages, max_tokens=ASK_MAX_TOKENS,
+                                         on_complete=lambda text: finish_ask(data.question, text, session, key))
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/ask/sessions/{session_id}", tags=["Video Analysis"])
+async def end_ask_session(session_id: str, workspace: Workspace = Depends(request_workspace)):
+    """Forget an `/ask` session's history."""
+    if not ask_sessions.sessions.end(workspace.id, session_id):
+        return JSONResponse(status_code=404, content={"error": "Session not found"})
+    return {"status": "success", "message": f"Session {session_id} ended"}
+
 @app.post("/translate", tags=["Translation"])
-async def translate(req: TranslationRequest):
+async def translate(req: TranslationRequest, workspace: Workspace = Depends(request_workspace)):
     """
     Translate the podcast content to specified languages.
     
@@ -208,56 +615,22 @@ async def translate(req: TranslationRequest):
     - Spanish (es)
     - German (de)
     - Hindi (hi)
+    
+    See `/translate/stream` to receive each language as soon as it is ready.
     """
     try:
         # Load the summarization from the podcast file
-        podcast_file = Path("podcasts/full_podcast.txt")
+        podcast_file = workspace.podcast_text
         if not podcast_file.exists():
             return JSONResponse(
                 status_code=404,
                 content={"error": "No summarization available. Process videos first."}
             )
             
-        with open(podcast_file, "r", encoding="utf-8") as f:
-            text_to_translate = f.read()
-
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        translations = {}
-        for lang in req.languages:
-            prompt = f"""
-            Translate the following English text to {lang}. Maintain the same tone and style, 
-            and ensure all technical terms and proper nouns are accurately preserved:
+        text_to_translate = document_store.read_text(podcast_file)
 
-            {text_to_translate}
-            """
-            
-            payload = {
-                "model": MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,  # Lower temperature for more accurate translations
-                "max_tokens": 4000  # Adjust based on your needs
-            }
-            
-            try:
-                response = requests.post(
-                    "https://api.groq.com/openai/v1/chat/completions", 
-                    headers=headers, 
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    content = response.json()["choices"][0]["message"]["content"]
-                    translations[lang] = content
-                else:
-                    translations[lang] = f"Translation error: {response.status_code}"
-                    print(f"Translation error for {lang}: {response.text}")
-            except Exception as e:
-                translations[lang] = f"Translation error: {str(e)}"
-                print(f"Exception during translation to {lang}: {str(e)}")
+        # Languages are translated concurrently; repeated requests are served from the cache
+        translations = await translate_many(text_to_translate, req.languages)
 
         return {"translations": translations}
         
@@ -267,8 +640,35 @@ async def translate(req: TranslationRequest):
             content={"error": f"Translation failed: {str(e)}"}
         )
 
+@app.post("/translate/stream", tags=["Translation"])
+async def translate_stream(req: TranslationRequest, workspace: Workspace = Depends(request_workspace)):
+    """
+    Streaming version of `/translate`.
+    
+    Each language is sent as a Server-Sent Event (`data: {"language": ..., "translation": ...}`)
+    as soon as it finishes, followed by `data: {"done": true}`.
+    """
+    podcast_file = workspace.podcast_text
+    if not podcast_file.exists():
+        return JSONResponse(
+            status_code=404,
+            content={"error": "No summarization available. Process videos first."}
+        )
+    text_to_translate = document_store.read_text(podcast_file)
+
+    async def events():
+        async for language, translated in iter_translations(text_to_translate, req.languages):
+            yield sse_event({"language": language, "translation": translated})
+        yield sse_event({"done": True})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/start-conversation", tags=["Conversation"])
-def start_conversation(request: ConversationRequest):
+async def start_conversation(request: ConversationRequest, workspace: Workspace = Depends(request_workspace)):
     """
     Start a new video conversation.
     
@@ -283,22 +683,24 @@ def start_conversation(request: ConversationRequest):
         )
 
     # Load first 5 lines from each JSON file
-    video_data = {}
-    output_dir = Path("data/output")
+    video_data = []
+    output_dir = workspace.output_dir
     try:
         for json_file in output_dir.glob("*.json"):
             if json_file.name != "final.json":
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # For each key in the JSON, take only first 5 items if it's a list
-                    limited_data = {}
-                    for key, value in data.items():
-                        if isinstance(value, list):
-                            limited_data[key] = value[:5]
-                        else:
-                            limited_data[key] = value
-                    video_data[json_file.name] = limited_data
-                    print(f"First 5 lines from {json_file.name}:", json.dumps(limited_data, indent=2))
+                # Parsed once per file version by the document store
+                data = document_store.read_json(json_file)
+                # For each key in the JSON, take only first 5 items if it's a list
+                limited_data = {}
+                for key, value in data.items():
+                    if key == "fingerprint":
+                        continue
+                    if isinstance(value, list):
+                        limited_data[key] = value[:5]
+                    else:
+                        limited_data[key] = value
+                video_data.append(prompt_format.format_video(limited_data))
+                print(f"First 5 lines from {json_file.name}:\n{video_data[-1]}")
     except Exception as e:
         print(f"Error loading video JSONs: {e}")
         return JSONResponse(
@@ -312,10 +714,11 @@ def start_conversation(request: ConversationRequest):
         "callback_url": "https://yourwebsite.com/webhook",
         "conversation_name": f"DIY Master Session with {request.person}",
         "conversational_context": (
-            f"You are a DIY master assisting {request.person} with video tutorials in {video_data}. "
+            f"You are a DIY master assisting {request.person} with the video tutorials below. "
             f"Always refer the video using the title and not the video id."
             f"You need to summarize the steps to do the tasks if the user asks how to do the tasks described in the videos. "
-            f"You need to pinpoint the exact timestamp in the video where the user can find the information they need."
+            f"You need to pinpoint the exact timestamp in the video where the user can find the information they need. "
+            f"{prompt_format.RECORD_LEGEND}\n\n" + "\n\n".join(video_data)
         ),
         "custom_greeting": f"Hello {request.person}! I've analyzed the project videos in detail. What would you like to know?",
         "properties": {
@@ -327,7 +730,7 @@ def start_conversation(request: ConversationRequest):
 
     # Call Tavus API
     headers = {"Content-Type": "application/json", "x-api-key": TAVUS_API_KEY}
-    response = requests.post(TAVUS_API_URL, json=payload, headers=headers)
+    response = await http_client.apost("tavus", "/conversations", json=payload, headers=headers)
 
     if response.status_code == 200:
         return response.json()
@@ -360,19 +763,55 @@ def start_conversation(request: ConversationRequest):
             content={"error": error_code, "message": error_message}
         )
 
+def run_generate_podcast(workspace: Workspace):
+    """Background job body for /generate-podcast: build and merge the episodes."""
+    with workspace.in_use():
+        return process_and_merge_podcasts(workspace=workspace)
+
 @app.post("/generate-podcast", tags=["Podcast"])
-def generate_podcast():
+def generate_podcast(workspace: Workspace = Depends(request_workspace)):
     """
     Generate a podcast script from processed video content.
     
-    Creates a narrative summary of the video content in podcast format.
+    Creates a narrative summary of the video content in podcast format. Episodes are
+    generated in the background; poll `/jobs/{job_id}` for per-episode timings.
     """
     try:
-        result = process_and_merge_podcasts()
-        return JSONResponse(content={"message": "Podcast created", "result": result})
+        job_id = job_manager.submit("generate-podcast", run_generate_podcast, workspace)
+        return JSONResponse(status_code=202, content={"message": "Podcast generation started", "job_id": job_id})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/jobs", tags=["System"])
+def list_jobs(kind: str = None, limit: int = 50):
+    """
+    List recent background jobs, newest first.
+    """
+    return {"jobs": job_manager.list(kind=kind, limit=limit)}
+
+@app.get("/jobs/{job_id}", tags=["System"])
+def get_job(job_id: str):
+    """
+    Get the status and result of a background job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return job
+
+@app.post("/jobs/{job_id}/cancel", tags=["System"])
+def cancel_job(job_id: str):
+    """
+    Cancel a queued or running background job.
+    
+    Running jobs stop at their next checkpoint (between chunks or videos);
+    poll `/jobs/{job_id}` until the status is `cancelled`.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return job
+
 @app.post("/test-translations", tags=["Translation"])
 def run_translation(request: SingleTranslationRequest = Body(...)):
     """
@@ -384,105 +823,68 @@ def run_translation(request: SingleTranslationRequest = Body(...)):
     return JSONResponse(content=result)
 
 @app.post("/generate-audio")
-def generate_audio(request: Request, filename: str = Form(...)):
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+async def generate_audio(request: Request, filename: str = Form(...), workspace: Workspace = Depends(request_workspace)):
+    """
+    Synthesize a text file to speech.
+    
+    Long texts are split at paragraph/sentence boundaries and the chunks are synthesized
+    concurrently; audio is streamed back as one progressive WAV in chunk order.
+    Unchanged chunks come from the audio cache, and a fully cached result is served
+    with ETag and Range support.
+    """
     TTS_MODEL = "playai-tts"
     VOICE = "Aaliyah-PlayAI"
-    url = "https://api.groq.com/openai/v1/audio/speech"
 
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
+        with open(workspace.resolve(filename), 'r', encoding='utf-8') as file:
             podcast_text = file.read()
 
-        if len(podcast_text) <= 9999:
-            chunks = [podcast_text]
-        else:
-            # Split at sentence boundaries (or fallback to 9000-character chunks)
-            import re
-            sentences = re.split(r'(?<=[.!?])\s+', podcast_text)
-            chunks, current = [], ""
-            for sentence in sentences:
-                if len(current) + len(sentence) < 9000:
-                    current += sentence + " "
-                else:
-                    chunks.append(current.strip())
-                    current = sentence + " "
-            if current:
-                chunks.append(current.strip())
-
-        # Store each audio part
-        audio_segments = []
-        for i, chunk in enumerate(chunks):
-            payload = {
-                "model": TTS_MODEL,
-                "input": chunk,
-                "voice": VOICE,
-                "response_format": "wav"  # Changed to wav format
-            }
+        # Paragraph/sentence chunks under 9000 characters, cached per chunk
+        chunks = tts_chunks(podcast_text)
+        cached_path = cached_document(chunks, VOICE, TTS_MODEL)
+        if cached_path is not None:
+            return audio_file_response(request, cached_path, document_key(chunks, VOICE, TTS_MODEL), "full_podcast.wav")
 
-            headers = {
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
+        audio_stream = await prepare_wav_stream(chunks, VOICE, TTS_MODEL)
+        return StreamingResponse(
+            audio_stream,
+            media_type="audio/wav",
+            headers={
+                "Content-Disposition": "attachment; filename=full_podcast.wav",
+                "ETag": f'"{document_key(chunks, VOICE, TTS_MODEL)}"'
             }
+        )
 
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code != 200:
-                return JSONResponse(status_code=response.status_code, content={"error": response.text})
-
-            # Save temp WAV
-            temp_file = f"chunk_{uuid.uuid4().hex}.wav"
-            with open(temp_file, "wb") as f:
-                f.write(response.content)
-
-            # Read the audio file
-            data, samplerate = sf.read(temp_file)
-            audio_segments.append((data, samplerate))
-            os.remove(temp_file)
-
-        # Combine all segments
-        if audio_segments:
-            # Ensure all segments have the same sample rate
-            samplerate = audio_segments[0][1]
-            combined_data = np.concatenate([segment[0] for segment in audio_segments])
-            
-            # Save the combined audio
-            output_path = f"combined_{uuid.uuid4().hex}.wav"
-            sf.write(output_path, combined_data, samplerate)
-
-            return FileResponse(output_path, media_type="audio/wav", filename="full_podcast.wav")
-        else:
-            return JSONResponse(status_code=500, content={"error": "No audio segments were generated"})
-
+    except TTSError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": e.text})
+    except WorkspaceError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
     
 @app.post("/generate-audio-groq")
-def generate_audio_groq(filename: str = Form(...)):
+async def generate_audio_groq(request: Request, filename: str = Form(...),
+                              workspace: Workspace = Depends(request_workspace)):
     try:
-        client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-
         # Read the text from the specified file
-        with open(filename, 'r') as file:
+        with open(workspace.resolve(filename), 'r') as file:
             podcast_text = file.read()
 
         # Groq TTS parameters
         model = "playai-tts"
         voice = "Fritz-PlayAI"
-        response_format = "wav"
-        speech_file_path = f"speech_{os.path.basename(filename).split('.')[0]}.wav"
-
-        # Generate the audio
-        response = client.audio.speech.create(
-            model=model,
-            voice=voice,
-            input=podcast_text,
-            response_format=response_format
-        )
+        speech_file_name = f"speech_{os.path.basename(filename).split('.')[0]}.wav"
 
-        response.write_to_file(speech_file_path)
+        # Generate the audio (or reuse the cached copy)
+        chunks = tts_chunks(podcast_text)
+        speech_file_path = await synthesize_document(chunks, voice, model)
 
-        return FileResponse(speech_file_path, media_type="audio/wav", filename=speech_file_path)
+        return audio_file_response(request, speech_file_path, document_key(chunks, voice, model), speech_file_name)
 
+    except TTSError as e:
+        return JSONResponse(status_code=e.status_code, content={"error": e.text})
+    except WorkspaceError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
@@ -492,15 +894,17 @@ def run_translation():
     return JSONResponse(content=result)
 
 @app.get("/generate-speech", tags=["Podcast"])
-def generate_speech():
+async def generate_speech(request: Request, workspace: Workspace = Depends(request_workspace)):
     """
     Convert the podcast text to speech.
     
     Generates an audio file from the podcast script using text-to-speech.
+    Audio is cached per paragraph, so only changed paragraphs are re-synthesized,
+    and the response supports ETag and Range requests.
     """
     try:
         # Check if podcast text file exists
-        podcast_file_path = Path("podcasts/full_podcast.txt")
+        podcast_file_path = workspace.podcast_text
         if not podcast_file_path.exists():
             return Response(
                 content="Podcast text file not found. Please process videos first.",
@@ -508,10 +912,8 @@ def generate_speech():
             )
         
         # Read the podcast text
-        with open(podcast_file_path, 'r', encoding='utf-8') as file:
-            podcast_text = file.read()
+        podcast_text = document_store.read_text(podcast_file_path)
         
-        # Initialize the Groq client with API key
         GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
         if not GROQ_API_KEY:
             return Response(
@@ -519,42 +921,14 @@ def generate_speech():
                 status_code=500
             )
         
-        client = Groq(api_key=GROQ_API_KEY)
-        
         try:
-            # Generate speech with Groq API
-            response = client.audio.speech.create(
-                model="playai-tts",
-                voice="Fritz-PlayAI",
-                input=podcast_text,
-                response_format="wav"
-            )
-
-            # Create a temporary file to save the audio
-            temp_file = Path(f"temp_speech_{uuid.uuid4().hex}.wav")
-            response.write_to_file(str(temp_file))
-            
-            # Read the file content
-            with open(temp_file, "rb") as f:
-                audio_content = f.read()
-            
-            # Delete the temporary file
-            try:
-                temp_file.unlink()
-            except Exception as e:
-                print(f"Warning: Could not delete temporary file {temp_file}: {e}")
-            
-            # Return the audio content
-            return Response(
-                content=audio_content,
-                media_type="audio/wav",
-                headers={
-                    "Content-Disposition": "attachment; filename=podcast.wav"
-                }
-            )
+            # Generate speech with Groq API (or reuse the cached copy)
+            chunks = tts_chunks(podcast_text)
+            speech_path = await synthesize_document(chunks, "Fritz-PlayAI", "playai-tts")
+            return audio_file_response(request, speech_path, document_key(chunks, "Fritz-PlayAI", "playai-tts"), "podcast.wav")
             
         except Exception as groq_error:
-            error_message = str(groq_error)
+            error_message = groq_error.text if isinstance(groq_error, TTSError) else str(groq_error)
             print(f"Groq TTS Error: {error_message}")
             
             if "terms acceptance" in error_message.lower():
@@ -576,56 +950,53 @@ def generate_speech():
         )
 
 @app.get("/podcast-text", response_class=PlainTextResponse, tags=["Podcast"])
-async def get_podcast_text():
+async def get_podcast_text(workspace: Workspace = Depends(request_workspace)):
     """
     Get the generated podcast script text.
     
     Returns the current podcast script in plain text format.
     """
-    final_json_path = Path("data/output/final.json")
+    final_json_path = workspace.final_json
     if not final_json_path.exists():
         return PlainTextResponse("No podcast data available yet. Process videos first.", status_code=404)
     
-    file_path = Path("podcasts/full_podcast.txt")
+    file_path = workspace.podcast_text
     if not file_path.exists():
         return PlainTextResponse("Podcast text file not found", status_code=404)
     
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.read()
+    return document_store.read_text(file_path)
 
 @app.post("/clear-output-folder", tags=["System"])
-async def clear_output_folder():
+async def clear_output_folder(workspace: Workspace = Depends(request_workspace)):
     """
     Clear the output folder of processed files.
     
-    Use this to clean up temporary files and start fresh.
+    Use this to clean up temporary files and start fresh. Only the caller's
+    workspace is cleared.
     """
     """Clear the output folder when the page is refreshed"""
-    output_folder = Path("data/output")
-    if output_folder.exists():
-        for file_path in output_folder.glob("*"):
-            if file_path.is_file():
-                file_path.unlink()
-            elif file_path.is_dir():
-                shutil.rmtree(file_path)
+    with workspace.lock:
+        workspace.clear_output()
     
     return {"status": "success", "message": "Output folder cleared"}
 
+def summarize_final_json(workspace: Workspace) -> str:
+    """Summarize final.json with the LlamaAPI and save it as the podcast text (blocking)."""
+    summary = summarize.chat_complete("llama", LLAMA_MODEL, build_summary_messages(workspace), max_tokens=SUMMARY_MAX_TOKENS)
+    save_podcast_text(summary, workspace)
+    return summary
+
 @app.post("/auto-summarize")
-async def auto_summarize():
+async def auto_summarize(workspace: Workspace = Depends(request_workspace)):
     """Automatically generate a summarization using the LlamaAPI with final.json data"""
     try:
-        final_json_path = Path("data/output/final.json")
+        final_json_path = workspace.final_json
         if not final_json_path.exists():
             return JSONResponse(
                 status_code=404,
                 content={"error": "final.json not found. Process videos first."}
             )
         
-        # Load context from final.json
-        with open(final_json_path, "r", encoding="utf-8") as f:
-            context = f.read()
-
         # Get LlamaAPI key from environment variables
         LLAMA_API_KEY = os.getenv("LLAMA_API_KEY")
         if not LLAMA_API_KEY:
@@ -634,91 +1005,93 @@ async def auto_summarize():
                 content={"error": "LLAMA_API_KEY environment variable not set"}
             )
         
-        # Define the API endpoint
-        llama_api_url = "https://api.llama.com/v1/chat/completions"
-        
-        # Create the system prompt for summarization
-        system_prompt = (
-            "You are an expert assistant tasked with summarizing video content. "
-            "The following is structured data about a video (including transcript and visual descriptions). "
-            "Create a detailed summary of the video content based on this data. Here is the data:\n"
-            f"{context}"
-        )
-        
-        # Define the messages for the API request
-        prompt_messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "Please provide a comprehensive summary of this video content."}
-        ]
-        
-        # Make the API request
-        response = requests.post(
-            llama_api_url,
-            headers={
-                "Authorization": f"Bearer {LLAMA_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "Llama-4-Maverick-17B-128E-Instruct-FP8",
-                "messages": prompt_messages,
-                "max_tokens": 1024
-            }
-        )
-        
-        if response.status_code == 200:
-            res_json = response.json()
-            if 'completion_message' in res_json:
-                summary = res_json['completion_message']['content']['text']
-                
-                # Save the summary to a file
-                podcast_dir = Path("podcasts")
-                podcast_dir.mkdir(exist_ok=True)
-                
-                with open("podcasts/full_podcast.txt", "w", encoding="utf-8") as f:
-                    f.write(summary)
-                
-                return {"response": summary}
-            else:
-                return {"error": f"'completion_message' key not found in response: {res_json}"}
-        else:
-            # Log the entire response JSON
-            try:
-                error_json = response.json()
-            except ValueError:
-                error_json = response.text
-            return {"error": f"API call failed with status code {response.status_code}: {error_json}"}
+        summary = await asyncio.to_thread(summarize_final_json, workspace)
+        return {"response": summary}
             
     except Exception as e:
         return {"error": str(e)}
 
+@app.post("/auto-summarize/stream")
+async def auto_summarize_stream(workspace: Workspace = Depends(request_workspace)):
+    """Streaming version of `/auto-summarize`; the finished summary is saved like the non-streaming route."""
+    if not workspace.final_json.exists():
+        return JSONResponse(status_code=404, content={"error": "final.json not found. Process videos first."})
+    if not os.getenv("LLAMA_API_KEY"):
+        return JSONResponse(status_code=500, content={"error": "LLAMA_API_KEY environment variable not set"})
+    try:
+        prompt_messages = await asyncio.to_thread(build_summary_messages, workspace)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    return StreamingResponse(
+        stream_llama_completion("auto-summarize/stream", prompt_messages, max_tokens=SUMMARY_MAX_TOKENS, on_complete=lambda text: save_podcast_text(text, workspace)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def run_process_videos(video_urls: list, workspace: Workspace, max_workers=None, full_rebuild: bool = False,
+                       job=None) -> dict:
+    """Background job body for /process-videos: analyze the videos, then summarize them.
+
+    Fails the job when none of the videos could be processed.
+    """
+    with workspace.in_use():
+        timings = process_multiple_videos(
+            video_urls, max_workers=max_workers, full_rebuild=full_rebuild, job=job, workspace=workspace
+        )
+        job.check_cancelled()
+        if not any(timing["status"] == "ok" for timing in timings):
+            raise RuntimeError("None of the videos could be processed")
+        job.set_progress("summary", status="running")
+        try:
+            summarization = {"response": summarize_final_json(workspace)}
+        except Exception as e:
+            summarization = {"error": str(e)}
+    job.set_progress("summary", status="failed" if "error" in summarization else "done")
+    return {"status": "Processing complete", "workspace": workspace.id, "timings": timings, "summarization": summarization}
+
 @app.post("/process-videos", tags=["Video Analysis"])
-async def process_videos(request: Request):
+async def process_videos(request: Request, workspace: Workspace = Depends(request_workspace)):
     """
     Process a list of YouTube videos.
     
     Analyzes the videos, generates transcripts, and creates visual descriptions.
+    Only new or changed videos are re-analyzed unless `full_rebuild` is true.
     Also triggers automatic summarization.
+    
+    Runs in the background: poll `/jobs/{job_id}` for per-video progress and the
+    final result, or cancel with `POST /jobs/{job_id}/cancel`. Results go to the
+    caller's workspace (`"workspace"` in the body, `?workspace=` or `X-Workspace-Id`).
     """
     data = await request.json()
     video_urls = data.get("videos", [])
     if not video_urls:
         return {"error": "No videos provided"}
-    process_multiple_videos(video_urls)
-    
-    # Automatically trigger summarization after videos are processed
-    summarization_result = await auto_summarize()
-    return {"status": "Processing complete", "summarization": summarization_result}
+    if data.get("workspace"):
+        workspace = get_workspace(data["workspace"])
+    job_id = job_manager.submit(
+        "process-videos",
+        run_process_videos,
+        video_urls,
+        workspace,
+        max_workers=data.get("max_workers"),
+        full_rebuild=bool(data.get("full_rebuild", False)),
+        pass_job=True
+    )
+    return JSONResponse(
+        status_code=202,
+        content={"message": "Video processing started", "job_id": job_id, "workspace": workspace.id}
+    )
 
 @app.get("/check-files", tags=["System"])
-async def check_files():
+async def check_files(workspace: Workspace = Depends(request_workspace)):
     """
     Check the status of processed files.
     
     Returns information about available files in the data and podcasts folders.
     """
     """Debug endpoint to check what files are available in the data folders"""
-    output_folder = Path("data/output")
-    podcasts_folder = Path("podcasts")
+    output_folder = workspace.output_dir
+    podcasts_folder = workspace.podcasts_dir
     
     output_files = []
     if output_folder.exists():
@@ -737,11 +1110,44 @@ async def check_files():
         "final_json_exists": final_json_exists,
         "podcasts_folder_exists": podcasts_folder.exists(),
         "podcast_files": podcast_files,
-        "podcast_text_exists": podcast_text_exists
+        "podcast_text_exists": podcast_text_exists,
+        "workspace": workspace.id
     }
 
+@app.get("/cache-stats", tags=["System"])
+async def cache_stats():
+    """
+    Report hit/miss counters and usage for the on-disk caches and the in-memory document store.
+    """
+    return {
+        "descriptions": description_cache.stats(),
+        **youtube_data.cache_stats(),
+        "translations": translation_cache.stats(),
+        "audio": audio_cache.stats(),
+        "audio_chunks": chunk_cache.stats(),
+        "documents": document_store.stats(),
+        "answers": ask_sessions.answer_cache.stats(),
+        "ask_sessions": ask_sessions.sessions.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["System"])
+async def prometheus_metrics():
+    """
+    Request, stage, token, retry and cache counters in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/trace", tags=["System"])
+async def trace_dump():
+    """
+    Recorded spans as a Chrome trace (open in chrome://tracing or Perfetto). Requires `TRACE_ENABLED=true`.
+    """
+    if not metrics.trace_enabled:
+        return JSONResponse(status_code=404, content={"error": "Tracing is disabled; set TRACE_ENABLED=true"})
+    return metrics.trace()
+
 @app.post("/send-message", tags=["Conversation"])
-def send_message(message: ConversationMessage):
+async def send_message(message: ConversationMessage):
     """
     Send a message in an existing conversation.
     
@@ -749,7 +1155,7 @@ def send_message(message: ConversationMessage):
     """
     try:
         # Endpoint for sending messages to an existing conversation
-        url = f"{TAVUS_API_URL}/{message.conversation_id}/messages"
+        path = f"/conversations/{message.conversation_id}/messages"
         
         headers = {
             "Content-Type": "application/json",
@@ -764,7 +1170,7 @@ def send_message(message: ConversationMessage):
             }
         }
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = await http_client.apost("tavus", path, headers=headers, json=payload)
         
         if response.status_code == 200:
             return response.json()
@@ -789,7 +1195,7 @@ def send_message(message: ConversationMessage):
         )
 
 @app.post("/end-conversation/{conversation_id}", tags=["Conversation"])
-def end_conversation(conversation_id: str):
+async def end_conversation(conversation_id: str):
     """
     End an active video conversation.
     
@@ -797,14 +1203,15 @@ def end_conversation(conversation_id: str):
     """
     try:
         # Call Tavus API to end the conversation
-        url = f"{TAVUS_API_URL}/{conversation_id}/end"
+        path = f"/conversations/{conversation_id}/end"
         
         headers = {
             "Content-Type": "application/json",
             "x-api-key": TAVUS_API_KEY
         }
         
-        response = requests.post(url, headers=headers)
+        # Ending a conversation twice is harmless, so it may be retried
+        response = await http_client.apost("tavus", path, retry=True, headers=headers)
         
         if response.status_code == 200:
             return {"success": True, "message": "Conversation ended successfully"}
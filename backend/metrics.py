@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import inspect
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+# === CONFIGURATION ===
+
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # written on shutdown when tracing is enabled
+TRACE_MAX_EVENTS = int(os.getenv("TRACE_MAX_EVENTS", "100000"))  # oldest spans are dropped first
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HELP = {
+    "http_requests_total": "HTTP requests handled, by route and status.",
+    "span_seconds": "Duration of instrumented stages (routes, LLM calls, parsing, TTS, ...).",
+    "span_errors_total": "Instrumented stages that raised.",
+    "llm_requests_total": "LLM completions, by service, model and the route or job that made them.",
+    "llm_tokens_total": "LLM tokens reported by the API, by kind (prompt/completion).",
+    "http_retries_total": "Upstream requests retried, by service and reason.",
+    "cache_requests_total": "Cache lookups, by cache and result (hit/miss).",
+    "rate_limit_wait_seconds_total": "Time spent waiting for the Groq rate limiter.",
+    "prompt_tokens_trimmed_total": "Estimated prompt tokens dropped to fit a model's context window.",
+    "llm_json_malformed_total": "Items dropped from model JSON output because they could not be parsed.",
+}
+
+# The route or job the current code runs on behalf of; used to attribute token usage
+operation: ContextVar[str] = ContextVar("operation", default="other")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """In-process counters, latency histograms and an optional span trace.
+
+    Counters and histograms are always collected; each update is a dict lookup
+    under a lock, so they cost about a microsecond. Individual spans are only
+    recorded (as Chrome trace events, viewable in chrome://tracing or Perfetto)
+    when ``trace_enabled`` is set.
+    """
+
+    def __init__(self, trace_enabled: bool = TRACE_ENABLED, max_events: int = TRACE_MAX_EVENTS):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, list]] = {}
+        self.trace_enabled = trace_enabled
+        self.events = deque(maxlen=max_events)
+        self.started = time.perf_counter()
+        self.pid = os.getpid()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add ``amount`` to the counter ``name{labels}``."""
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """Record ``value`` (seconds) in the histogram ``name{labels}``."""
+        key = _label_key(labels)
+        bucket = bisect_left(LATENCY_BUCKETS, value)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                # Per-bucket counts (last one is +Inf), then sum and count
+                histogram = series[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            histogram[bucket] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def record_span(self, name: str, started: float, duration: float, attributes: Optional[Dict] = None,
+                    failed: bool = False):
+        """Record a finished stage that started at ``started`` (``time.perf_counter()``)."""
+        self.observe("span_seconds", duration, span=name)
+        if failed:
+            self.inc("span_errors_total", span=name)
+        if self.trace_enabled:
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": round((started - self.started) * 1e6),
+                "dur": round(duration * 1e6),
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": {"operation": operation.get(), **(attributes or {})}
+            })
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the enclosed block as the stage ``name``; ``attributes`` only go into the trace."""
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record_span(name, started, time.perf_counter() - started, attributes, failed)
+
+    def timed(self, name: str):
+        """Decorator form of ``span`` for plain and async functions."""
+        def decorate(fn):
+            if inspect.iscoroutinefunction(fn):
+                @wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record_usage(self, service: str, model: str, response: Any):
+        """Count one LLM completion and the tokens its response reports.
+
+        Understands OpenAI-style ``usage`` (dicts or SDK objects) and the Llama API's
+        ``metrics`` list; responses without either are counted with no tokens.
+        """
+        labels = {"service": service, "model": model, "operation": operation.get()}
+        self.inc("llm_requests_total", **labels)
+        prompt_tokens, completion_tokens = usage_tokens(response)
+        if prompt_tokens:
+            self.inc("llm_tokens_total", prompt_tokens, kind="prompt", **labels)
+        if completion_tokens:
+            self.inc("llm_tokens_total", completion_tokens, kind="completion", **labels)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {int(value) if value == int(value) else value}")
+            for name, series in sorted(self.histograms.items()):
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram):
+                        cumulative += count
+                        bucket_label = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{_format_labels(key, bucket_label)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def trace(self) -> Dict:
+        """Recorded spans in the Chrome trace-event format."""
+        with self.lock:
+            events = list(self.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_trace(self, path: Union[str, Path]):
+        """Write ``trace()`` to ``path`` as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+        print(f"Wrote {len(self.events)} trace events to {path}")
+
+
+def in_context(fn):
+    """Wrap ``fn`` to run in a copy of the caller's context, so worker threads keep ``operation``."""
+    context = copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def _field(value: Any, name: str):
+    return value.get(name) if isinstance(value, dict) else getattr(value, name, None)
+
+
+def usage_tokens(response: Any) -> Tuple[int, int]:
+    """(prompt, completion) token counts reported in an LLM response, 0 when absent."""
+    usage = _field(response, "usage")
+    if usage is not None:
+        return int(_field(usage, "prompt_tokens") or 0), int(_field(usage, "completion_tokens") or 0)
+    reported = {item.get("metric"): item.get("value") for item in (_field(response, "metrics") or [])
+                if isinstance(item, dict)}
+    return int(reported.get("num_prompt_tokens") or 0), int(reported.get("num_completion_tokens") or 0)
+
+
+metrics = Metrics()
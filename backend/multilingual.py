@@ -1,11 +1,6 @@
-import requests
 import json
 import os
-
-
-# === CONFIGURATION ===
-
-MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
+from translation import translate_text_sync, TranslationError
 
 
 
@@ -16,10 +11,6 @@ def test_translations(target_language):
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')  # Get API key from environment variable
     if not GROQ_API_KEY:
         raise ValueError("GROQ_API_KEY environment variable is not set")
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {GROQ_API_KEY}"
-    }
 
     # English text to translate
     english_text = "The rapid advancement of artificial intelligence is revolutionizing various industries, from healthcare to finance, by enabling more efficient data analysis and decision-making processes."
@@ -31,27 +22,11 @@ def test_translations(target_language):
     print("\nTranslations:")
 
 
-    translation_prompt = f"Translate the following English text to {target_language}:\n{english_text}"
-
-    data = {
-        "model": MODEL,
-        "messages": [
-            {"role": "user", "content": translation_prompt}
-        ]
-    }
-
     try:
-
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
-
-        if response.status_code == 200:
-            response_data = response.json()
-            content = response_data['choices'][0]['message']['content']
-            return content
-        else:
-            print(f"Error: {response.status_code}")
-            print("Response:", response.text)
-
+        # Same engine (and cache) as the /translate route
+        return translate_text_sync(english_text, target_language)
+    except TranslationError as e:
+        print(f"Error: {e}")
     except Exception as e:
         print(f"Error occurred: {str(e)}")
 
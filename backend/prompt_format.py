@@ -0,0 +1,115 @@
+import re
+from typing import Dict, Iterable, List, Optional
+from alignment import aligned_descriptions, format_timestamp, parse_timestamp
+
+# === CONFIGURATION ===
+
+# How video data is laid out in prompts; prepended to every prompt that carries it
+RECORD_LEGEND = ("Each line is [start-end] what is said, then | Visual: what is on screen, with times as mm:ss or h:mm:ss; "
+                 "lines with only Visual: are shots no transcript segment covers.")
+VISUAL_SEPARATOR = " | Visual: "
+
+# "[mm:ss-mm:ss] text" (hours optional), tolerating list markers and spaces models add
+RECORD_LINE = re.compile(r"^\s*(?:[-*]\s*|\d+[.)]\s*)?\[\s*((?:\d+:)?\d{1,2}:\d{2})\s*[-–]\s*((?:\d+:)?\d{1,2}:\d{2})\s*\]\s*:?\s*(.*?)\s*$")
+WHITESPACE = re.compile(r"\s+")
+
+
+def compact_time(value) -> str:
+    """A timestamp as "mm:ss", or "h:mm:ss" from one hour on ("?" if it cannot be parsed)."""
+    seconds = parse_timestamp(value)
+    if seconds < 0:
+        return "?"
+    hours, rest = divmod(seconds, 3600)
+    if hours:
+        return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+    return f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+def format_record(start, end, text: str, visual: Optional[str] = None) -> str:
+    """One ``[start-end] text`` line; newlines in the text are folded so records stay one per line."""
+    line = f"[{compact_time(start)}-{compact_time(end)}] {WHITESPACE.sub(' ', text or '').strip()}"
+    if visual:
+        line += VISUAL_SEPARATOR + WHITESPACE.sub(" ", visual).strip()
+    return line
+
+
+def format_records(records: Iterable[Dict], field: str = "text") -> str:
+    """``records`` with "start_time"/"end_time" as one ``[start-end] <field>`` line each."""
+    return "\n".join(format_record(record.get("start_time"), record.get("end_time"), record.get(field, ""))
+                     for record in records)
+
+
+def parse_records(text: str, field: str = "text") -> List[Dict]:
+    """Inverse of ``format_records``: records with "HH:MM:SS" times and ``field``.
+
+    Lines that are not records continue the previous record (models sometimes wrap
+    long descriptions); anything before the first record is ignored.
+    """
+    records = []
+    for line in text.splitlines():
+        match = RECORD_LINE.match(line)
+        if match:
+            start, end, value = match.groups()
+            records.append({
+                "start_time": format_timestamp(parse_timestamp(start)),
+                "end_time": format_timestamp(parse_timestamp(end)),
+                field: value
+            })
+        elif records and line.strip():
+            records[-1][field] = f"{records[-1][field]} {line.strip()}".strip()
+    return records
+
+
+def video_title(video: Dict) -> str:
+    return video.get("title") or video.get("URL") or video.get("url") or video.get("video_id") or "Untitled Video"
+
+
+def video_header(video: Dict) -> str:
+    video_id = video.get("video_id")
+    return f"Video: {video_title(video)}" + (f" (id: {video_id})" if video_id else "")
+
+
+def video_lines(video: Dict) -> List[str]:
+    """One record per transcript segment, with the visual description aligned to it.
+
+    Descriptions no segment takes become ``[start-end] Visual: ...`` records, placed
+    before the first segment that starts after them.
+    """
+    descriptions, leftovers = aligned_descriptions(video)
+    leftovers = sorted((item for item in leftovers if item.get("description")), key=lambda item: parse_timestamp(item.get("start_time")))
+    lines = []
+    for segment, description in zip(video.get("transcription") or [], descriptions):
+        start = parse_timestamp(segment.get("start_time"))
+        while leftovers and parse_timestamp(leftovers[0].get("start_time")) < start:
+            lines.append(visual_record(leftovers.pop(0)))
+        lines.append(format_record(segment.get("start_time"), segment.get("end_time"), segment.get("text", ""), description))
+    lines.extend(visual_record(item) for item in leftovers)
+    return lines
+
+
+def visual_record(item: Dict) -> str:
+    """A description without a transcript segment as a ``[start-end] Visual: ...`` record."""
+    return format_record(item.get("start_time"), item.get("end_time"), "Visual: " + str(item["description"]))
+
+
+def format_video(video: Dict) -> str:
+    """A video's header line followed by its records."""
+    return "\n".join([video_header(video)] + video_lines(video))
+
+
+def format_segments(segments: List[Dict]) -> str:
+    """Retrieved segments (see retrieval_index.py) as records grouped under their video's header."""
+    if not segments:
+        return "No segments matched the question."
+    lines = []
+    current_video = None
+    for segment in segments:
+        if segment["video_id"] != current_video:
+            current_video = segment["video_id"]
+            lines.append(f"\nVideo: {segment['title']} (id: {current_video})")
+        lines.append(format_record(segment["start_time"], segment["end_time"], segment["text"], segment.get("description")))
+    return "\n".join(lines).strip()
+
+
+def format_videos(videos: Iterable[Dict]) -> str:
+    return "\n\n".join(format_video(video) for video in videos)
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+from metrics import metrics
+
+# === CONFIGURATION ===
+
+GROQ_TOKENS_PER_MIN = int(os.getenv("GROQ_TOKENS_PER_MIN", "280000"))
+GROQ_REQUESTS_PER_MIN = int(os.getenv("GROQ_REQUESTS_PER_MIN", "30"))
+
+
+class TokenBucketLimiter:
+    """Thread-safe limiter enforcing both a tokens-per-minute and a requests-per-minute budget.
+
+    Each budget is a bucket that starts full and refills continuously at its
+    per-minute rate. ``acquire`` blocks until both buckets can cover the request.
+    """
+
+    def __init__(self, tokens_per_min: int, requests_per_min: int, name: str = "limiter"):
+        self.name = name
+        self.token_capacity = float(tokens_per_min)
+        self.request_capacity = float(requests_per_min)
+        self.token_rate = tokens_per_min / 60.0
+        self.request_rate = requests_per_min / 60.0
+        self.tokens = self.token_capacity
+        self.requests = self.request_capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+        self.updated = now
+
+    def acquire(self, tokens: int):
+        """Block until ``tokens`` tokens and one request slot are available, then consume them."""
+        # A single request larger than the whole budget can only wait for a full bucket
+        tokens = min(float(tokens), self.token_capacity)
+        waiting_since = None
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens and self.requests >= 1:
+                    self.tokens -= tokens
+                    self.requests -= 1
+                    break
+                wait_time = max(
+                    (tokens - self.tokens) / self.token_rate if self.tokens < tokens else 0,
+                    (1 - self.requests) / self.request_rate if self.requests < 1 else 0
+                )
+            if waiting_since is None:
+                print(f"[{self.name}] Waiting {wait_time:.1f} seconds to stay under "
+                      f"{int(self.token_capacity):,} tokens/minute and {int(self.request_capacity)} requests/minute...")
+                waiting_since = time.perf_counter()
+            time.sleep(max(wait_time, 0.05))
+        if waiting_since is not None:
+            waited = time.perf_counter() - waiting_since
+            metrics.inc("rate_limit_wait_seconds_total", waited, limiter=self.name)
+            metrics.record_span("rate_limit.wait", waiting_since, waited, {"tokens": tokens})
+
+    def settle(self, reserved: float, used: float):
+        """Replace a request's ``reserved`` token estimate with the ``used`` count the API reported."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.token_capacity, self.tokens + min(float(reserved), self.token_capacity) - used)
+
+    def refund(self, reserved: float):
+        """Return the tokens reserved for a request that failed without using any (e.g. a 429)."""
+        self.settle(reserved, 0)
+
+    def penalize(self, seconds: float):
+        """Drain the buckets so that no request is admitted for ``seconds`` (e.g. after a 429)."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.token_rate)
+            self.requests = min(self.requests, 1 - seconds * self.request_rate)
+
+
+# Process-wide limiter shared by every Groq chat completion (descriptions, summaries and
+# translations). Speech synthesis is billed in characters under separate limits and skips it.
+groq_limiter = TokenBucketLimiter(GROQ_TOKENS_PER_MIN, GROQ_REQUESTS_PER_MIN, name="Groq Rate Limit")
@@ -0,0 +1,238 @@
+import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from workspace import atomic_write_text
+from alignment import find_timestamps, segment_descriptions
+from segment_store import META_FILE, SegmentStore, write_segment_store
+from metrics import metrics
+
+# === CONFIGURATION ===
+
+INDEX_DIR = "data/output/index"
+BM25_K1 = 1.5
+BM25_B = 0.75
+ASK_TOP_K = int(os.getenv("ASK_TOP_K", "40"))
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "do", "does", "for", "from", "has", "have",
+    "how", "i", "if", "in", "is", "it", "its", "of", "on", "or", "so", "that", "the", "their", "then",
+    "there", "these", "this", "to", "was", "we", "were", "what", "when", "where", "which", "who", "why",
+    "will", "with", "you", "your"
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def collect_segments(final_data: Dict) -> List[Dict]:
+    """Flatten final.json into one record per transcript segment, joined with its visual description."""
+    segments = []
+    for video in final_data.get("videos", []):
+        for segment, description in zip(video.get("transcription") or [], segment_descriptions(video)):
+            segments.append({
+                "video_id": video.get("video_id"),
+                "title": video.get("title"),
+                "start_time": segment.get("start_time"),
+                "end_time": segment.get("end_time"),
+                "text": segment.get("text", ""),
+                "description": description
+            })
+    return segments
+
+
+_loaded: Dict[str, tuple] = {}
+# Held while an index directory is loaded or swapped for a rebuilt one
+_load_lock = threading.Lock()
+
+
+@metrics.timed("index.build")
+def build_index(final_json_path: str = "data/output/final.json", index_dir: str = INDEX_DIR) -> Optional[int]:
+    """Build a BM25 index over final.json segments and persist it as memory-mappable .npy arrays.
+
+    Postings are stored term-major: ``term_offsets[t]:term_offsets[t + 1]`` slices
+    ``postings_docs`` / ``postings_tf`` for term ``t``. The segments themselves are
+    stored alongside as a columnar segment store. Returns the number of indexed segments.
+    """
+    try:
+        with open(final_json_path, "r", encoding="utf-8") as f:
+            final_data = json.load(f)
+        segments = collect_segments(final_data)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error building retrieval index: {e}")
+        return None
+
+    vocab: Dict[str, int] = {}
+    term_docs: List[List[int]] = []
+    term_tfs: List[List[int]] = []
+    doc_lengths = np.zeros(len(segments), dtype=np.float32)
+    for doc_id, segment in enumerate(segments):
+        tokens = tokenize(f"{segment['text']} {segment['description']}")
+        doc_lengths[doc_id] = len(tokens)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            term_id = vocab.setdefault(token, len(vocab))
+            if term_id == len(term_docs):
+                term_docs.append([])
+                term_tfs.append([])
+            term_docs[term_id].append(doc_id)
+            term_tfs[term_id].append(count)
+
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum([len(docs) for docs in term_docs])
+    postings_docs = np.array([doc for docs in term_docs for doc in docs], dtype=np.int32)
+    postings_tf = np.array([tf for tfs in term_tfs for tf in tfs], dtype=np.float32)
+
+    # Written to a sibling directory and swapped in whole, so a load never mixes files of
+    # two builds; open memory maps keep the files of the index they were loaded from
+    path = Path(index_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}.build-"))
+    try:
+        for name, array in (("term_offsets.npy", term_offsets), ("postings_docs.npy", postings_docs),
+                            ("postings_tf.npy", postings_tf), ("doc_lengths.npy", doc_lengths)):
+            np.save(build_dir / name, array)
+        atomic_write_text(build_dir / "vocab.json", json.dumps(vocab))
+        write_segment_store(final_data, build_dir)
+        old_dir = build_dir.with_name(build_dir.name.replace(".build-", ".old-"))
+        with _load_lock:
+            if path.exists():
+                os.rename(path, old_dir)
+            os.rename(build_dir, path)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    except OSError as e:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        print(f"Error writing retrieval index: {e}")
+        return None
+    print(f"Built retrieval index: {len(segments)} segments, {len(vocab)} terms -> {path}")
+    return len(segments)
+
+
+class RetrievalIndex:
+    """Read-only BM25 index loaded with memory-mapped postings."""
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        path = Path(index_dir)
+        self.term_offsets = np.load(path / "term_offsets.npy", mmap_mode="r")
+        self.postings_docs = np.load(path / "postings_docs.npy", mmap_mode="r")
+        self.postings_tf = np.load(path / "postings_tf.npy", mmap_mode="r")
+        self.doc_lengths = np.load(path / "doc_lengths.npy", mmap_mode="r")
+        with open(path / "vocab.json", "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        self.segments = SegmentStore(path)
+        self.num_docs = len(self.segments)
+        self.avg_length = float(self.doc_lengths.mean()) if self.num_docs else 0.0
+
+    def search(self, query: str, top_k: int = ASK_TOP_K) -> List[Dict]:
+        """Return the ``top_k`` best-matching segments, ordered by video and time."""
+        return [self.segments.segment(doc_id) for doc_id in self.search_ids(query, top_k)]
+
+    def search_ids(self, query: str, top_k: int = ASK_TOP_K) -> List[int]:
+        """Document ids of the ``top_k`` best-matching segments, in video/time order."""
+        if not self.num_docs:
+            return []
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(self.doc_lengths) / max(self.avg_length, 1e-6))
+        for token in set(tokenize(query)):
+            term_id = self.vocab.get(token)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            idf = np.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        # Document ids follow final.json order, so sorting them restores video/time order
+        return sorted(matched.tolist())
+
+    def time_ids(self, text: str) -> List[int]:
+        """Document ids of segments playing at the timestamps mentioned in ``text`` ("what happens at 02:10?").
+
+        Each timestamp is an O(log n) interval lookup per video.
+        """
+        seconds = [value for value in find_timestamps(text) if value >= 0]
+        doc_ids = set()
+        for video in range(self.segments.num_videos if seconds else 0):
+            time_index = self.segments.time_index(video)
+            offset = int(self.segments.seg_offsets[video])
+            for value in seconds:
+                doc_ids.update(offset + int(position) for position in time_index.at(value))
+        return sorted(doc_ids)
+
+    def spread_ids(self, count: int) -> List[int]:
+        """Document ids of ``count`` segments spaced evenly over the whole corpus."""
+        if not self.num_docs or count <= 0:
+            return []
+        return sorted(set(np.linspace(0, self.num_docs - 1, min(count, self.num_docs)).round().astype(int).tolist()))
+
+    def search_with_times(self, query: str, top_k: int = ASK_TOP_K) -> List[Dict]:
+        """``search`` plus the segments at any timestamps the query mentions, in video/time order.
+
+        Broad questions ("Summarize this") match few or no terms; the remaining slots
+        up to ``top_k`` are filled with evenly spaced segments so the model always
+        gets an overview of the corpus.
+        """
+        doc_ids = set(self.search_ids(query, top_k)) | set(self.time_ids(query))
+        if len(doc_ids) < top_k:
+            for doc_id in self.spread_ids(top_k):
+                if len(doc_ids) >= top_k:
+                    break
+                doc_ids.add(doc_id)
+        return [self.segments.segment(doc_id) for doc_id in sorted(doc_ids)]
+
+
+def load_index(index_dir: str = INDEX_DIR) -> Optional[RetrievalIndex]:
+    """Return the index at ``index_dir``, reloading it when it has been rebuilt on disk."""
+    marker = Path(index_dir) / META_FILE
+    with _load_lock:
+        try:
+            mtime = marker.stat().st_mtime
+        except OSError:
+            return None
+        cached = _loaded.get(index_dir)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            index = RetrievalIndex(index_dir)
+        except (OSError, ValueError) as e:
+            print(f"Error loading retrieval index: {e}")
+            return None
+        _loaded[index_dir] = (mtime, index)
+        # Drop indexes whose workspace has since been deleted
+        for stale in [key for key in _loaded if not Path(key).exists()]:
+            del _loaded[stale]
+        return index
+
+
+def ensure_index(final_json_path: str = "data/output/final.json", index_dir: str = INDEX_DIR) -> Optional[RetrievalIndex]:
+    """Load the index for ``final_json_path``, rebuilding it first if it is missing or older than the source."""
+    try:
+        source_mtime = Path(final_json_path).stat().st_mtime
+    except OSError:
+        return None
+    marker = Path(index_dir) / META_FILE
+    if not marker.exists() or marker.stat().st_mtime < source_mtime:
+        if build_index(final_json_path, index_dir) is None:
+            return None
+        return load_index(index_dir)
+    index = load_index(index_dir)
+    if index is None:
+        # Written by an older version of the store format
+        if build_index(final_json_path, index_dir) is None:
+            return None
+        index = load_index(index_dir)
+    return index
@@ -0,0 +1,215 @@
+import os
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import numpy as np
+from workspace import atomic_write_text
+from alignment import IntervalIndex, format_timestamp, parse_timestamp, segment_descriptions
+
+# === CONFIGURATION ===
+
+STORE_VERSION = 2
+META_FILE = "meta.json"  # written last; its mtime marks the store as complete
+
+
+class _StringTable:
+    """Interns strings into ids; stored as one UTF-8 blob plus an offsets array."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.encoded: List[bytes] = []
+
+    def add(self, text: Optional[str]) -> int:
+        text = text or ""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.encoded)
+            self.encoded.append(text.encode("utf-8"))
+        return string_id
+
+    def arrays(self):
+        offsets = np.zeros(len(self.encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(item) for item in self.encoded])
+        return offsets, np.frombuffer(b"".join(self.encoded), dtype=np.uint8)
+
+
+def write_segment_store(final_data: Dict, store_dir: Union[str, Path]) -> int:
+    """Write final.json-shaped data as columnar arrays in ``store_dir``; returns the segment count.
+
+    Layout (all .npy, int32 unless noted):
+      video_id / video_title / video_url        string ids, one per video
+      seg_offsets (int64)                        segments of video v are seg_offsets[v]:seg_offsets[v + 1]
+      seg_start / seg_end                        whole seconds
+      seg_start_raw / seg_end_raw                original timestamp string id, or -1 when it is
+                                                 exactly format_timestamp(seconds)
+      seg_end_max                                running maximum of seg_end within each video, so
+                                                 time lookups are binary searches (see IntervalIndex)
+      seg_text / seg_description                 string ids; the description is aligned to its segment
+      desc_offsets (int64), desc_start, desc_end, desc_start_raw, desc_end_raw, desc_text
+                                                 the raw visual_description lists, for JSON export
+      string_offsets (int64), string_data (uint8)
+                                                 interned UTF-8 strings
+    """
+    strings = _StringTable()
+    columns: Dict[str, list] = {name: [] for name in (
+        "video_id", "video_title", "video_url", "seg_start", "seg_end", "seg_start_raw", "seg_end_raw",
+        "seg_end_max", "seg_text", "seg_description", "desc_start", "desc_end", "desc_start_raw", "desc_end_raw", "desc_text"
+    )}
+
+    def add_timestamp(prefix: str, value):
+        seconds = parse_timestamp(value)
+        columns[prefix].append(seconds)
+        # Keep non-canonical timestamps ("00:00:08.054") so JSON export is lossless
+        text = "" if value is None else str(value)
+        columns[f"{prefix}_raw"].append(-1 if text == format_timestamp(seconds) else strings.add(text))
+
+    seg_offsets, desc_offsets = [0], [0]
+    for video in final_data.get("videos", []):
+        columns["video_id"].append(strings.add(video.get("video_id")))
+        columns["video_title"].append(strings.add(video.get("title")))
+        columns["video_url"].append(strings.add(video.get("url")))
+        transcription = video.get("transcription") or []
+        end_max = -1
+        for segment, description in zip(transcription, segment_descriptions(video)):
+            add_timestamp("seg_start", segment.get("start_time"))
+            add_timestamp("seg_end", segment.get("end_time"))
+            end_max = max(end_max, columns["seg_end"][-1], columns["seg_start"][-1] + 1)
+            columns["seg_end_max"].append(end_max)
+            columns["seg_text"].append(strings.add(segment.get("text")))
+            columns["seg_description"].append(strings.add(description))
+        for item in video.get("visual_description") or []:
+            add_timestamp("desc_start", item.get("start_time"))
+            add_timestamp("desc_end", item.get("end_time"))
+            columns["desc_text"].append(strings.add(item.get("description")))
+        seg_offsets.append(len(columns["seg_start"]))
+        desc_offsets.append(len(columns["desc_start"]))
+
+    arrays = {name: np.asarray(values, dtype=np.int32) for name, values in columns.items()}
+    arrays["seg_offsets"] = np.asarray(seg_offsets, dtype=np.int64)
+    arrays["desc_offsets"] = np.asarray(desc_offsets, dtype=np.int64)
+    arrays["string_offsets"], arrays["string_data"] = strings.arrays()
+
+    path = Path(store_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    # Replace each file atomically so readers' memory maps stay valid
+    for name, array in arrays.items():
+        fd, tmp_path = tempfile.mkstemp(dir=path, prefix=f".{name}.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path / f"{name}.npy")
+    meta = {"version": STORE_VERSION, "videos": len(columns["video_id"]), "segments": len(columns["seg_start"]),
+            "strings": len(strings.encoded)}
+    atomic_write_text(path / META_FILE, json.dumps(meta))
+    return meta["segments"]
+
+
+def _load_array(path: Path) -> np.ndarray:
+    """Memory-map a .npy file; empty arrays cannot be mapped and are simply read."""
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        return np.load(path)
+
+
+class SegmentStore:
+    """Read-only, memory-mapped view of a store written by ``write_segment_store``.
+
+    Opening it maps the arrays without parsing any segment; strings are decoded
+    only when a segment is materialized. It backs the retrieval index only:
+    final.json and the per-video analyses stay JSON, and summaries, podcasts and
+    whole-corpus /ask prompts still parse them (final.json once per file version,
+    see document_store.py).
+    """
+
+    ARRAYS = ("video_id", "video_title", "video_url", "seg_offsets", "seg_start", "seg_end", "seg_start_raw",
+              "seg_end_raw", "seg_end_max", "seg_text", "seg_description", "desc_offsets", "desc_start", "desc_end",
+              "desc_start_raw", "desc_end_raw", "desc_text", "string_offsets", "string_data")
+
+    def __init__(self, store_dir: Union[str, Path]):
+        path = Path(store_dir)
+        with open(path / META_FILE, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported segment store version: {self.meta.get('version')}")
+        for name in self.ARRAYS:
+            setattr(self, name, _load_array(path / f"{name}.npy"))
+
+    def __len__(self) -> int:
+        return len(self.seg_start)
+
+    @property
+    def num_videos(self) -> int:
+        return len(self.video_id)
+
+    def string(self, string_id: int) -> str:
+        start, end = self.string_offsets[string_id], self.string_offsets[string_id + 1]
+        return self.string_data[start:end].tobytes().decode("utf-8")
+
+    def timestamp(self, column: str, index: int) -> str:
+        """Timestamp string of ``column`` ("seg_start", "desc_end", ...) as originally written."""
+        raw = int(getattr(self, f"{column}_raw")[index])
+        return self.string(raw) if raw >= 0 else format_timestamp(int(getattr(self, column)[index]))
+
+    def segment(self, index: int) -> Dict:
+        """One segment in the record shape used for retrieval (see retrieval_index.collect_segments)."""
+        video = int(np.searchsorted(self.seg_offsets, index, side="right")) - 1
+        return {
+            "video_id": self.string(self.video_id[video]),
+            "title": self.string(self.video_title[video]),
+            "start_time": self.timestamp("seg_start", index),
+            "end_time": self.timestamp("seg_end", index),
+            "text": self.string(self.seg_text[index]),
+            "description": self.string(self.seg_description[index])
+        }
+
+    def time_index(self, video: int) -> IntervalIndex:
+        """Interval index over one video's segments, backed by the mapped arrays.
+
+        Transcript segments are stored in time order, so no sorting is needed.
+        """
+        start, end = self.seg_offsets[video], self.seg_offsets[video + 1]
+        return IntervalIndex(self.seg_start[start:end], self.seg_end[start:end], self.seg_end_max[start:end])
+
+    def video(self, video: int) -> Dict:
+        """One video in the final.json shape."""
+        seg_range = range(self.seg_offsets[video], self.seg_offsets[video + 1])
+        desc_range = range(self.desc_offsets[video], self.desc_offsets[video + 1])
+        return {
+            "video_id": self.string(self.video_id[video]),
+            "title": self.string(self.video_title[video]),
+            "url": self.string(self.video_url[video]),
+            "transcription": [
+                {
+                    "start_time": self.timestamp("seg_start", i),
+                    "end_time": self.timestamp("seg_end", i),
+                    "text": self.string(self.seg_text[i])
+                }
+                for i in seg_range
+            ],
+            "visual_description": [
+                {
+                    "start_time": self.timestamp("desc_start", i),
+                    "end_time": self.timestamp("desc_end", i),
+                    "description": self.string(self.desc_text[i])
+                }
+                for i in desc_range
+            ]
+        }
+
+    def to_json(self) -> Dict:
+        """Export the whole store in the final.json shape, for compatibility."""
+        return {"total_videos": self.num_videos, "videos": [self.video(v) for v in range(self.num_videos)]}
+
+
+def export_json(store_dir: Union[str, Path], json_path: Union[str, Path]):
+    """Write the store at ``store_dir`` back out as a final.json-style file."""
+    atomic_write_text(json_path, json.dumps(SegmentStore(store_dir).to_json(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("Usage: python segment_store.py <store_dir> <output.json>")
+        sys.exit(1)
+    export_json(sys.argv[1], sys.argv[2])
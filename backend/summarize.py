@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import http_client
+from disk_cache import DiskCache, make_cache_key
+from prompt_format import RECORD_LEGEND, format_video, video_header, video_lines
+from rate_limiter import groq_limiter
+from metrics import in_context, metrics
+import token_budget
+
+# === CONFIGURATION ===
+
+# Corpora up to this size are sent in a single prompt; larger ones are map-reduced
+SUMMARY_DIRECT_CHARS = int(os.getenv("SUMMARY_DIRECT_CHARS", "60000"))
+SUMMARY_WINDOW_CHARS = int(os.getenv("SUMMARY_WINDOW_CHARS", "24000"))
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+SUMMARY_MAP_MAX_TOKENS = int(os.getenv("SUMMARY_MAP_MAX_TOKENS", "800"))
+SUMMARY_CACHE_MAX_MB = float(os.getenv("SUMMARY_CACHE_MAX_MB", "100"))
+
+MAP_PROMPT = (
+    "You are summarizing one part of a video for a later, combined summary. "
+    f"Below are timestamped transcript lines with what is visible on screen. {RECORD_LEGEND} "
+    "Write concise notes covering the key topics, steps, visual details and the timestamps where they happen. "
+    "Respond only with the notes."
+)
+COMBINE_PROMPT = (
+    "You are merging partial notes about one or more videos into a single set of notes. "
+    "Keep every distinct topic, step and timestamp, remove repetition, and keep videos clearly separated. "
+    "Respond only with the merged notes."
+)
+
+# Map and intermediate reduce results keyed by (service, model, prompt, input)
+summary_cache = DiskCache("summaries", max_bytes=int(SUMMARY_CACHE_MAX_MB * 1024 * 1024))
+
+
+def chat_complete(service: str, model: str, messages: List[Dict], max_tokens: Optional[int] = None,
+                  temperature: Optional[float] = None) -> str:
+    """Blocking chat completion against the Groq or Llama API; returns the reply text.
+
+    Groq calls reserve their estimated tokens with the shared limiter and settle it
+    with the reported usage (which also calibrates the token estimates), or refund
+    it when the request fails.
+    """
+    raw, reserved = token_budget.reserve(messages, model, max_tokens)
+    limiter = groq_limiter if service == "groq" else None
+    if service == "groq":
+        api_key = os.getenv("GROQ_API_KEY")
+        groq_limiter.acquire(reserved)
+    else:
+        api_key = os.getenv("LLAMA_API_KEY")
+    payload = {"model": model, "messages": messages}
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    if temperature is not None:
+        payload["temperature"] = temperature
+    try:
+        with metrics.span(f"llm.{service}", model=model):
+            response = http_client.post(
+                service,
+                "/chat/completions",
+                retry=True,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json=payload
+            )
+    except Exception:
+        if limiter:
+            limiter.refund(reserved)
+        raise
+    if response.status_code != 200:
+        if limiter:
+            limiter.refund(reserved)
+        raise Exception(f"{service} API Error {response.status_code}: {response.text}")
+    res_json = response.json()
+    metrics.record_usage(service, model, res_json)
+    token_budget.settle(model, raw, res_json, limiter, reserved)
+    if "completion_message" in res_json:
+        return res_json["completion_message"]["content"]["text"]
+    return res_json["choices"][0]["message"]["content"]
+
+
+def _cached_complete(service: str, model: str, system_prompt: str, text: str, max_tokens: int) -> str:
+    key = make_cache_key(service, model, system_prompt, text, max_tokens)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return cached
+    result = chat_complete(
+        service,
+        model,
+        [{"role": "system", "content": system_prompt}, {"role": "user", "content": text}],
+        max_tokens,
+        temperature=0.3
+    )
+    summary_cache.set(key, result)
+    return result
+
+
+def video_windows(video: Dict, max_chars: int = SUMMARY_WINDOW_CHARS) -> List[str]:
+    """Render a video as timestamped lines (see prompt_format.py) and cut them into windows of at most ``max_chars``."""
+    header = video_header(video)
+    lines = video_lines(video)
+
+    windows, current = [], []
+    size = len(header)
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            windows.append("\n".join([header] + current))
+            current, size = [], len(header)
+        current.append(line)
+        size += len(line) + 1
+    if current or not windows:
+        windows.append("\n".join([header] + current))
+    return windows
+
+
+def corpus_size(videos: List[Dict]) -> int:
+    """Characters the videos take up in a prompt."""
+    return sum(len(format_video(video)) for video in videos)
+
+
+def map_reduce_notes(videos: List[Dict], service: str, model: str) -> List[str]:
+    """Summarize every video window in parallel, then merge the notes until they fit one prompt.
+
+    Every map and merge step is cached, so adding one video only runs that video's
+    map steps (plus the merges that include it).
+    """
+    windows = [window for video in videos for window in video_windows(video)]
+    workers = max(1, min(SUMMARY_WORKERS, len(windows)))
+    print(f"Map-reduce summarization: {len(windows)} window(s) from {len(videos)} video(s)")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        notes = list(executor.map(
+            in_context(lambda window: _cached_complete(service, model, MAP_PROMPT, window, SUMMARY_MAP_MAX_TOKENS)),
+            windows
+        ))
+
+        # Hierarchical reduce: merge neighbouring notes in groups until they fit one prompt
+        while len(notes) > 1 and sum(len(note) for note in notes) > SUMMARY_DIRECT_CHARS:
+            groups, current, size = [], [], 0
+            for note in notes:
+                if len(current) >= 2 and size + len(note) > SUMMARY_WINDOW_CHARS:
+                    groups.append(current)
+                    current, size = [], 0
+                current.append(note)
+                size += len(note)
+            groups.append(current)
+            print(f"Merging {len(notes)} partial summaries into {len(groups)}")
+            notes = list(executor.map(
+                in_context(lambda group: group[0] if len(group) == 1 else _cached_complete(
+                    service, model, COMBINE_PROMPT, "\n\n---\n\n".join(group), SUMMARY_MAP_MAX_TOKENS * 2
+                )),
+                groups
+            ))
+    return notes
+
+
+def prepare_messages(videos: List[Dict], service: str, model: str,
+                     direct_messages: Callable[[List[Dict]], List[Dict]],
+                     reduce_messages: Callable[[List[str]], List[Dict]], max_tokens: int) -> List[Dict]:
+    """Return the messages for the final summarization call.
+
+    Small corpora go straight to ``direct_messages(videos)``; larger ones are
+    map-reduced first and the merged notes passed to ``reduce_messages(notes)``.
+    Either way the messages are trimmed to leave ``max_tokens`` for the reply.
+    """
+    if corpus_size(videos) <= SUMMARY_DIRECT_CHARS:
+        messages = direct_messages(videos)
+    else:
+        messages = reduce_messages(map_reduce_notes(videos, service, model))
+    return token_budget.fit_messages(messages, model, max_tokens)
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# Keep the job database, caches and workspaces that modules set up on import out of the tree
+SCRATCH_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("JOB_DB", os.path.join(SCRATCH_DIR, "jobs.sqlite3"))
+os.environ.setdefault("CACHE_DIR", os.path.join(SCRATCH_DIR, "cache"))
+os.environ.setdefault("WORKSPACES_DIR", os.path.join(SCRATCH_DIR, "workspaces"))
+
+
+@pytest.fixture
+def final_data():
+    """A small final.json: two videos with transcripts and visual descriptions."""
+    return {
+        "videos": [
+            {
+                "video_id": "vid1",
+                "title": "Baking bread",
+                "transcription": [
+                    {"start_time": "00:00:00", "end_time": "00:00:05", "text": "Welcome to the kitchen"},
+                    {"start_time": "00:00:05", "end_time": "00:00:12", "text": "Knead the dough for ten minutes"},
+                    {"start_time": "00:00:12", "end_time": "00:00:20", "text": "Let it rise overnight"},
+                ],
+                "visual_description": [
+                    {"start_time": "00:00:00", "end_time": "00:00:05", "description": "A chef waves"},
+                    {"start_time": "00:00:05", "end_time": "00:00:12", "description": "Hands press flour"},
+                    {"start_time": "00:00:12", "end_time": "00:00:20", "description": "A covered bowl"},
+                ],
+            },
+            {
+                "video_id": "vid2",
+                "title": "Fixing bikes",
+                "transcription": [
+                    {"start_time": "00:00:00", "end_time": "00:00:08", "text": "Remove the rear wheel"},
+                    {"start_time": "00:00:08", "end_time": "00:00:15", "text": "Patch the inner tube"},
+                ],
+                "visual_description": [],
+            },
+        ]
+    }
@@ -0,0 +1,69 @@
+import numpy as np
+
+from alignment import (IntervalIndex, align_descriptions, aligned_descriptions, find_timestamps, format_timestamp,
+                       parse_timestamp, segment_descriptions)
+
+
+def test_timestamps_round_trip():
+    assert parse_timestamp("01:02:03") == 3723
+    assert parse_timestamp("02:03") == 123
+    assert parse_timestamp("not a time") == -1
+    assert format_timestamp(3723) == "01:02:03"
+    assert find_timestamps("what happens at 1:05 and 00:01:10?") == [65, 70]
+
+
+def test_overlapping_intervals_brute_force():
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 500, 300)
+    ends = starts + rng.integers(0, 40, 300)
+    index = IntervalIndex.from_bounds(starts, ends)
+    covered_ends = np.maximum(ends, starts + 1)
+    for start in range(0, 560, 7):
+        end = start + 5
+        expected = {i for i in range(len(starts)) if starts[i] < end and covered_ends[i] > start}
+        assert set(index.overlapping(start, end).tolist()) == expected
+
+
+def test_at_and_nearest():
+    index = IntervalIndex.from_records([
+        {"start_time": "00:00:10", "end_time": "00:00:20"},
+        {"start_time": "00:00:00", "end_time": "00:00:10"},
+        {"start_time": "00:00:30", "end_time": "00:00:30"},
+    ])
+    assert index.at(10).tolist() == [0]
+    assert index.at(30).tolist() == [2]
+    assert index.at(25).tolist() == []
+    assert index.nearest(26) == 2
+    assert IntervalIndex.from_records([]).nearest(5) == -1
+
+
+def test_align_descriptions_exact_shifted_and_unmatched():
+    segments = [
+        {"start_time": "00:00:00", "end_time": "00:00:05"},
+        {"start_time": "00:00:05", "end_time": "00:00:10"},
+        {"start_time": "00:00:10", "end_time": "00:00:15"},
+    ]
+    descriptions = [
+        {"start_time": "00:00:00", "end_time": "00:00:05", "description": "exact"},
+        {"start_time": "00:00:06", "end_time": "00:00:09", "description": "shifted"},
+        {"start_time": "00:05:00", "end_time": "00:05:05", "description": "far away"},
+    ]
+    joined, report, leftovers = align_descriptions(segments, descriptions)
+    assert joined == ["exact", "shifted", ""]
+    assert (report["exact"], report["shifted"], report["unmatched"], report["missing"]) == (1, 1, 1, 1)
+    assert report["max_drift_seconds"] == 1
+    assert leftovers == [descriptions[2]]
+
+
+def test_aligned_descriptions_returns_duplicates_as_leftovers():
+    video = {
+        "transcription": [{"start_time": "00:00:00", "end_time": "00:00:10", "text": "intro"}],
+        "visual_description": [
+            {"start_time": "00:00:00", "end_time": "00:00:03", "description": "logo"},
+            {"start_time": "00:00:03", "end_time": "00:00:06", "description": "host"},
+        ],
+    }
+    joined, leftovers = aligned_descriptions(video)
+    assert joined == ["logo"]
+    assert [item["description"] for item in leftovers] == ["host"]
+    assert segment_descriptions(video) == ["logo"]
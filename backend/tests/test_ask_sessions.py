@@ -0,0 +1,41 @@
+import pytest
+
+import ask_sessions
+from ask_sessions import AskSession, SessionStore, SessionError
+
+
+def test_normalize_question_keeps_timestamps():
+    assert ask_sessions.normalize_question("  What happens at 01:30?! ") == "what happens at 01:30"
+
+
+def test_answer_key_depends_on_prompt_variant():
+    corpus = ask_sessions.corpus_hash({"videos": [{"video_id": "a"}]})
+    assert ask_sessions.answer_key("Why?", corpus, "corpus") == ask_sessions.answer_key("why", corpus, "corpus")
+    assert ask_sessions.answer_key("Why?", corpus, "corpus") != ask_sessions.answer_key("Why?", corpus, "retrieved")
+
+
+def test_corpus_hash_ignores_video_order():
+    first, second = {"video_id": "a", "title": "A"}, {"video_id": "b", "title": "B"}
+    assert ask_sessions.corpus_hash({"videos": [first, second]}) == ask_sessions.corpus_hash({"videos": [second, first]})
+    assert ask_sessions.corpus_hash({"videos": [first]}) != ask_sessions.corpus_hash({"videos": [second]})
+
+
+def test_history_keeps_most_recent_turns_within_budget():
+    session = AskSession("s1")
+    for turn in range(5):
+        session.append(f"question {turn}", "answer " + "word " * 50)
+    messages = session.history("test-model", max_tokens=120)
+    assert [message["content"] for message in messages if message["role"] == "user"] == ["question 3", "question 4"]
+
+
+def test_store_expires_idle_sessions_and_validates_ids():
+    store = SessionStore(max_sessions=2, ttl_seconds=3600)
+    first = store.get("w", "one")
+    assert store.get("w", "one") is first
+    store.get("w", "two")
+    store.get("w", "three")
+    # Least recently used session dropped at capacity
+    assert store.get("w", "one") is not first
+    assert store.end("w", "three") and not store.end("w", "three")
+    with pytest.raises(SessionError):
+        store.get("w", "not valid!")
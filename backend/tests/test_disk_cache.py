@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+import disk_cache
+from disk_cache import DiskCache, make_cache_key
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", str(tmp_path))
+
+
+def age(cache: DiskCache, key: str, seconds: float):
+    path = cache._path(key)
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_make_cache_key_is_stable():
+    assert make_cache_key("a", {"x": 1, "y": 2}) == make_cache_key("a", {"y": 2, "x": 1})
+    assert make_cache_key("a", 1) != make_cache_key("a", "1")
+
+
+def test_set_get_and_stats():
+    cache = DiskCache("test")
+    assert cache.get("k" * 64) is None
+    cache.set("k" * 64, {"value": [1, 2]})
+    assert cache.get("k" * 64) == {"value": [1, 2]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_misses():
+    cache = DiskCache("test", max_age_seconds=60)
+    cache.set("a" * 64, "old")
+    age(cache, "a" * 64, 120)
+    assert cache.get("a" * 64) is None
+    assert not cache._path("a" * 64).exists()
+
+
+def test_size_eviction_drops_least_recently_used():
+    cache = DiskCache("test", max_bytes=3500, binary=True)
+    for number, key in enumerate(("a" * 64, "b" * 64, "c" * 64)):
+        cache.set(key, bytes(1000))
+        age(cache, key, 100 - number * 10)
+    # Reading "a" makes it the most recently used entry
+    assert cache.get("a" * 64) is not None
+    cache.set("d" * 64, bytes(1000))
+    assert cache._path("a" * 64).exists()
+    assert not cache._path("b" * 64).exists()
+    assert cache._path("d" * 64).exists()
+    assert cache.total_bytes() <= 3500
+
+
+def test_put_file_and_path():
+    cache = DiskCache("files", binary=True)
+    tmp_path = cache.temp_file("f" * 64)
+    with open(tmp_path, "wb") as f:
+        f.write(b"audio")
+    assert cache.put_file("f" * 64, tmp_path).read_bytes() == b"audio"
+    assert cache.path("f" * 64).read_bytes() == b"audio"
+    assert cache.path("e" * 64) is None
@@ -0,0 +1,67 @@
+import os
+import json
+import time
+
+from generate_video_metadata import load_reusable_analysis, match_descriptions, merge_final_json, prune_output_directory
+from workspace import Workspace, atomic_write_json
+
+
+def test_merge_final_json_in_batch_order(tmp_path, final_data):
+    workspace = Workspace("test", tmp_path)
+    for video in final_data["videos"]:
+        atomic_write_json(workspace.video_output_path(video["video_id"]), dict(video, fingerprint="abc"))
+    merged = merge_final_json(["vid2", "vid1"], workspace)
+    assert [video["video_id"] for video in merged["videos"]] == ["vid2", "vid1"]
+    assert "fingerprint" not in merged["videos"][0]
+    assert json.loads(workspace.final_json.read_text(encoding="utf-8")) == merged
+
+
+def test_merge_final_json_removes_stale_output_when_nothing_merges(tmp_path, final_data):
+    workspace = Workspace("test", tmp_path)
+    atomic_write_json(workspace.final_json, final_data)
+    workspace.index_dir.mkdir(parents=True)
+    (workspace.index_dir / "meta.json").write_text("{}", encoding="utf-8")
+    assert merge_final_json(["missing"], workspace) is None
+    assert not workspace.final_json.exists()
+    assert not workspace.index_dir.exists()
+
+
+def test_prune_keeps_batch_and_newer_files(tmp_path):
+    workspace = Workspace("test", tmp_path)
+    for video_id in ("kept", "stale", "concurrent"):
+        atomic_write_json(workspace.video_output_path(video_id), {"video_id": video_id})
+    started_at = time.time()
+    os.utime(workspace.video_output_path("stale"), (started_at - 60, started_at - 60))
+    os.utime(workspace.video_output_path("kept"), (started_at - 60, started_at - 60))
+    os.utime(workspace.video_output_path("concurrent"), (started_at + 1, started_at + 1))
+    prune_output_directory(["kept"], workspace, older_than=started_at)
+    assert workspace.video_output_path("kept").exists()
+    assert workspace.video_output_path("concurrent").exists()
+    assert not workspace.video_output_path("stale").exists()
+
+
+def test_match_descriptions_fills_segments_sharing_timestamps_in_order():
+    segments = [
+        {"start_time": "00:00:00", "end_time": "00:00:02"},
+        {"start_time": "00:00:00", "end_time": "00:00:02"},
+        {"start_time": "00:00:02", "end_time": "00:00:04"},
+        {"start_time": "00:00:02", "end_time": "00:00:05"},
+    ]
+    items = [
+        {"start_time": "00:00:00", "end_time": "00:00:02", "description": "first"},
+        {"start_time": "00:00:00", "end_time": "00:00:02", "description": "second"},
+        {"start_time": "00:00:02", "end_time": "00:00:09", "description": "third"},
+        {"start_time": "00:00:02", "end_time": "00:00:09", "description": "fourth"},
+    ]
+    assert match_descriptions(segments, items) == {0: "first", 1: "second", 2: "third", 3: "fourth"}
+
+
+def test_incomplete_analysis_is_not_reused(tmp_path, final_data):
+    workspace = Workspace("test", tmp_path)
+    video = final_data["videos"][0]
+    atomic_write_json(workspace.video_output_path("vid1"), dict(video, fingerprint={"transcript": "t"}))
+    assert load_reusable_analysis("vid1", {"transcript": "t"}, workspace)["video_id"] == "vid1"
+    assert load_reusable_analysis("vid1", {"transcript": "other"}, workspace) is None
+    atomic_write_json(workspace.video_output_path("vid1"), dict(video, fingerprint={"transcript": "t"}, incomplete=1))
+    assert load_reusable_analysis("vid1", {"transcript": "t"}, workspace) is None
+    assert "incomplete" not in merge_final_json(["vid1"], workspace)["videos"][0]
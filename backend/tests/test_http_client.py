@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+
+import http_client
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the pooled clients to a scripted transport; returns the list of outcomes to serve."""
+    outcomes = []
+
+    def handler(request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    options = http_client._client_options
+    monkeypatch.setattr(http_client, "_client_options",
+                        lambda service: dict(options(service), transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(http_client, "_sync_clients", {})
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_BASE", 0)
+    return outcomes
+
+
+def test_post_is_not_retried_after_it_may_have_been_processed(upstream):
+    upstream.extend([httpx.ReadTimeout("slow"), 200])
+    with pytest.raises(httpx.ReadTimeout):
+        http_client.post("groq", "/chat/completions")
+    upstream.clear()
+    upstream.extend([500, 200])
+    assert http_client.post("groq", "/chat/completions").status_code == 500
+
+
+def test_post_is_retried_when_unsent_or_rejected(upstream):
+    upstream.extend([httpx.ConnectError("refused"), 429, 503, 200])
+    assert http_client.post("groq", "/chat/completions").status_code == 200
+
+
+def test_post_retry_opt_in(upstream):
+    upstream.extend([httpx.ReadTimeout("slow"), 502, 200])
+    assert http_client.post("groq", "/chat/completions", retry=True).status_code == 200
+
+
+def test_get_is_retried(upstream):
+    upstream.extend([httpx.ReadTimeout("slow"), 500, 200])
+    assert http_client.request("groq", "GET", "/models").status_code == 200
+
+
+def test_async_clients_are_per_loop_and_dropped_with_their_loop(monkeypatch):
+    monkeypatch.setattr(http_client, "_async_clients", http_client.weakref.WeakKeyDictionary())
+
+    async def client():
+        return http_client.get_async_client("groq")
+
+    first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    first = first_loop.run_until_complete(client())
+    assert first_loop.run_until_complete(client()) is first
+    first_loop.close()
+    second = second_loop.run_until_complete(client())
+    assert second is not first
+    # The closed loop's clients were dropped even though the loop object is still alive
+    assert list(http_client._async_clients.keys()) == [second_loop]
+    second_loop.run_until_complete(http_client.aclose_all())
+    second_loop.close()
+    assert second.is_closed
@@ -0,0 +1,20 @@
+from llm_json import JSONObjectStream
+
+
+def test_skips_malformed_objects_and_keeps_the_rest():
+    stream = JSONObjectStream()
+    objects = stream.feed('```json\n[{"a": 1}, {"a": 2,, }, {"a": 3,}]\n```')
+    assert objects == [{"a": 1}, {"a": 3}]
+    assert stream.malformed == 1
+    assert not stream.truncated
+
+
+def test_repairs_missing_commas():
+    assert JSONObjectStream().feed('{"start": "00:00"\n"end": "00:05"}') == [{"start": "00:00", "end": "00:05"}]
+
+
+def test_objects_split_across_feeds_and_truncated_output():
+    stream = JSONObjectStream()
+    assert stream.feed('[{"text": "a } in a string"') == []
+    assert stream.feed('}, {"text": "cut off') == [{"text": "a } in a string"}]
+    assert stream.truncated
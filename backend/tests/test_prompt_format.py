@@ -0,0 +1,84 @@
+import prompt_format
+from prompt_format import compact_time, format_record, parse_records
+
+
+def test_compact_time():
+    assert compact_time("00:00:05") == "00:05"
+    assert compact_time("00:12:34") == "12:34"
+    assert compact_time("01:02:03") == "1:02:03"
+    assert compact_time(3600) == "1:00:00"
+    assert compact_time("soon") == "?"
+
+
+def test_format_record_folds_whitespace():
+    assert format_record("00:00:05", "00:00:12", "Knead\nthe  dough", "Hands\npress flour") == (
+        "[00:05-00:12] Knead the dough | Visual: Hands press flour"
+    )
+
+
+def test_records_round_trip():
+    records = [
+        {"start_time": "00:00:00", "end_time": "00:00:05", "description": "A chef waves"},
+        {"start_time": "01:00:05", "end_time": "01:00:12", "description": "Hands press flour"},
+    ]
+    assert parse_records(prompt_format.format_records(records, "description"), "description") == records
+
+
+def test_parse_records_tolerates_model_formatting():
+    text = "Here you go:\n- [0:05 – 0:12]: A bowl\n  on a table\n2. [00:12-00:20] Dough rises"
+    assert parse_records(text) == [
+        {"start_time": "00:00:05", "end_time": "00:00:12", "text": "A bowl on a table"},
+        {"start_time": "00:00:12", "end_time": "00:00:20", "text": "Dough rises"},
+    ]
+
+
+def test_format_video_aligns_descriptions(final_data):
+    assert prompt_format.format_video(final_data["videos"][0]).splitlines() == [
+        "Video: Baking bread (id: vid1)",
+        "[00:00-00:05] Welcome to the kitchen | Visual: A chef waves",
+        "[00:05-00:12] Knead the dough for ten minutes | Visual: Hands press flour",
+        "[00:12-00:20] Let it rise overnight | Visual: A covered bowl",
+    ]
+
+
+def test_format_segments_groups_by_video():
+    segments = [
+        {"video_id": "a", "title": "A", "start_time": "00:00:00", "end_time": "00:00:05", "text": "one"},
+        {"video_id": "a", "title": "A", "start_time": "00:00:05", "end_time": "00:00:09", "text": "two",
+         "description": "a desk"},
+        {"video_id": "b", "title": "B", "start_time": "00:00:00", "end_time": "00:00:03", "text": "three"},
+    ]
+    assert prompt_format.format_segments(segments) == (
+        "Video: A (id: a)\n[00:00-00:05] one\n[00:05-00:09] two | Visual: a desk\n\nVideo: B (id: b)\n[00:00-00:03] three"
+    )
+
+
+def test_format_video_keeps_every_description():
+    video = {
+        "video_id": "v",
+        "title": "Shots",
+        "transcription": [
+            {"start_time": "00:00:20", "end_time": "00:00:25", "text": "Hello"},
+            {"start_time": "00:00:25", "end_time": "00:00:30", "text": "Today we bake"},
+        ],
+        "visual_description": [
+            {"start_time": "00:00:00", "end_time": "00:00:03", "description": "Title card"},
+            {"start_time": "00:00:03", "end_time": "00:00:06", "description": "Logo"},
+            {"start_time": "00:00:20", "end_time": "00:00:25", "description": "Host waves"},
+            {"start_time": "00:00:25", "end_time": "00:00:30", "description": "Oven"},
+            {"start_time": "00:00:25", "end_time": "00:00:30", "description": "Oven door opens"},
+            {"start_time": "00:05:00", "end_time": "00:05:05", "description": "Credits"},
+        ],
+    }
+    text = prompt_format.format_video(video)
+    for item in video["visual_description"]:
+        assert item["description"] in text
+    assert text.splitlines() == [
+        "Video: Shots (id: v)",
+        "[00:00-00:03] Visual: Title card",
+        "[00:03-00:06] Visual: Logo",
+        "[00:20-00:25] Hello | Visual: Host waves",
+        "[00:25-00:30] Today we bake | Visual: Oven",
+        "[00:25-00:30] Visual: Oven door opens",
+        "[05:00-05:05] Visual: Credits",
+    ]
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from groq import RateLimitError
+
+import generate_video_metadata
+import token_budget
+from rate_limiter import TokenBucketLimiter
+
+
+def test_acquire_consumes_tokens_and_a_request_slot():
+    limiter = TokenBucketLimiter(60000, 60)
+    limiter.acquire(1000)
+    assert limiter.tokens == pytest.approx(59000, abs=5)
+    assert limiter.requests == pytest.approx(59, abs=0.01)
+
+
+def test_acquire_caps_requests_larger_than_the_bucket():
+    limiter = TokenBucketLimiter(60000, 60)
+    limiter.acquire(10 ** 9)
+    assert limiter.tokens == pytest.approx(0, abs=5)
+
+
+def test_settle_replaces_reservation_with_usage():
+    limiter = TokenBucketLimiter(60000, 60)
+    limiter.acquire(5000)
+    limiter.settle(5000, 1200)
+    assert limiter.tokens == pytest.approx(58800, abs=5)
+
+
+def test_refund_returns_the_reservation():
+    limiter = TokenBucketLimiter(60000, 60)
+    limiter.acquire(5000)
+    limiter.refund(5000)
+    assert limiter.tokens == pytest.approx(60000)
+
+
+def test_penalize_blocks_until_the_retry_time():
+    limiter = TokenBucketLimiter(60000, 60)
+    limiter.penalize(2)
+    assert limiter.tokens <= -2 * limiter.token_rate
+    assert limiter.requests <= 1 - 2 * limiter.request_rate
+
+
+class RecordingLimiter:
+    """Records reservations the way TokenBucketLimiter accounts for them, without waiting."""
+
+    def __init__(self):
+        self.outstanding = 0
+
+    def acquire(self, tokens):
+        self.outstanding += tokens
+
+    def settle(self, reserved, used):
+        self.outstanding -= reserved - used
+
+    def refund(self, reserved):
+        self.settle(reserved, 0)
+
+    def penalize(self, seconds):
+        pass
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": "0"}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def fake_client(outcomes):
+    def create(**kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(generate_video_metadata, "groq_limiter", limiter)
+    monkeypatch.setattr(token_budget, "counter", token_budget.TokenCounter())
+    return limiter
+
+
+def test_retries_refund_failed_attempts(limiter):
+    completion = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=30, completion_tokens=20))
+    client = fake_client([rate_limit_error(), rate_limit_error(), completion])
+    assert generate_video_metadata.call_groq_with_limit(client, "Describe this", max_tokens=500) is completion
+    # Only the successful attempt's reported usage stays charged
+    assert limiter.outstanding == 50
+
+
+def test_failed_call_is_refunded(limiter):
+    client = fake_client([rate_limit_error(), ValueError("bad request")])
+    with pytest.raises(ValueError):
+        generate_video_metadata.call_groq_with_limit(client, "Describe this", max_tokens=500)
+    assert limiter.outstanding == 0
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import retrieval_index
+
+
+@pytest.fixture
+def index(tmp_path, final_data):
+    final_json = tmp_path / "final.json"
+    final_json.write_text(json.dumps(final_data), encoding="utf-8")
+    return retrieval_index.ensure_index(str(final_json), str(tmp_path / "index"))
+
+
+def test_search_ranks_matching_segment(index):
+    results = index.search("How long should I knead the dough?", top_k=1)
+    assert [segment["text"] for segment in results] == ["Knead the dough for ten minutes"]
+    assert results[0]["description"] == "Hands press flour"
+
+
+def test_search_ids_is_empty_without_matching_terms(index):
+    assert index.search_ids("summarize everything") == []
+
+
+def test_search_with_times_falls_back_to_spread_segments(index):
+    results = index.search_with_times("summarize everything", top_k=3)
+    assert len(results) == 3
+    # Evenly spaced over the corpus: first, middle and last segment
+    assert [segment["text"] for segment in results] == [
+        "Welcome to the kitchen", "Let it rise overnight", "Patch the inner tube"
+    ]
+
+
+def test_search_with_times_keeps_matches_and_pads(index):
+    results = index.search_with_times("inner tube", top_k=2)
+    texts = [segment["text"] for segment in results]
+    assert len(texts) == 2
+    assert "Patch the inner tube" in texts
+
+
+def test_search_with_times_adds_mentioned_timestamps(index):
+    texts = [segment["text"] for segment in index.search_with_times("what happens at 00:10", top_k=1)]
+    assert "Knead the dough for ten minutes" in texts
+    assert "Patch the inner tube" in texts
+
+
+def test_ensure_index_without_final_json(tmp_path):
+    assert retrieval_index.ensure_index(str(tmp_path / "missing.json"), str(tmp_path / "index")) is None
+
+
+def test_rebuild_swaps_in_a_new_directory(tmp_path, final_data, index):
+    final_data["videos"] = final_data["videos"][:1]
+    final_json = tmp_path / "final.json"
+    final_json.write_text(json.dumps(final_data), encoding="utf-8")
+    assert retrieval_index.build_index(str(final_json), str(tmp_path / "index")) == 3
+    rebuilt = retrieval_index.load_index(str(tmp_path / "index"))
+    assert len(rebuilt.segments) == 3
+    # The previously loaded index still reads its own (now unlinked) files
+    assert len(index.segments) == 5
+    assert index.search("inner tube", top_k=1)[0]["text"] == "Patch the inner tube"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["final.json", "index"]
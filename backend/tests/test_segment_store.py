@@ -0,0 +1,31 @@
+from segment_store import SegmentStore, write_segment_store
+
+
+def test_round_trip(tmp_path, final_data):
+    assert write_segment_store(final_data, tmp_path) == 5
+    store = SegmentStore(tmp_path)
+    assert (len(store), store.num_videos) == (5, 2)
+    exported = store.to_json()
+    assert exported["total_videos"] == 2
+    for original, video in zip(final_data["videos"], exported["videos"]):
+        assert video["video_id"] == original["video_id"]
+        assert video["transcription"] == original["transcription"]
+        assert video["visual_description"] == original["visual_description"]
+
+
+def test_segment_joins_description(tmp_path, final_data):
+    write_segment_store(final_data, tmp_path)
+    store = SegmentStore(tmp_path)
+    assert store.segment(1) == {
+        "video_id": "vid1", "title": "Baking bread", "start_time": "00:00:05", "end_time": "00:00:12",
+        "text": "Knead the dough for ten minutes", "description": "Hands press flour"
+    }
+    assert store.segment(3)["video_id"] == "vid2"
+    assert store.segment(3)["description"] == ""
+
+
+def test_time_index_per_video(tmp_path, final_data):
+    write_segment_store(final_data, tmp_path)
+    store = SegmentStore(tmp_path)
+    assert list(store.time_index(0).at(12)) == [2]
+    assert list(store.time_index(1).at(3)) == [0]
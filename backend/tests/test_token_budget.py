@@ -0,0 +1,94 @@
+import pytest
+
+import token_budget
+from rate_limiter import TokenBucketLimiter
+
+MODEL = "test-model"
+
+
+@pytest.fixture(autouse=True)
+def counter(monkeypatch):
+    counter = token_budget.TokenCounter()
+    monkeypatch.setattr(token_budget, "counter", counter)
+    return counter
+
+
+def test_raw_count_pieces():
+    assert token_budget.raw_count("") == 0
+    assert token_budget.raw_count("hello world") == 2
+    # Long words split into sub-word tokens, digits group in threes
+    assert token_budget.raw_count("internationalization") == 4
+    assert token_budget.raw_count("1234567") == 3
+
+
+def test_calibration_moves_towards_reported_counts(counter):
+    counter.calibrate(MODEL, 100, 150)
+    assert counter.ratio(MODEL) == pytest.approx(1.5)
+    counter.calibrate(MODEL, 100, 100)
+    assert counter.ratio(MODEL) == pytest.approx(1.4)
+    counter.calibrate(MODEL, 100, 10 ** 6)
+    assert counter.ratio(MODEL) <= token_budget.CALIBRATION_BOUNDS[1]
+
+
+def test_reserve_and_settle_with_limiter(counter):
+    limiter = TokenBucketLimiter(60000, 60)
+    messages = [{"role": "user", "content": "Describe the video"}]
+    raw, reserved = token_budget.reserve(messages, MODEL, 500)
+    assert reserved == raw + 500
+    limiter.acquire(reserved)
+    response = {"usage": {"prompt_tokens": 2 * raw, "completion_tokens": 40}}
+    assert token_budget.settle(MODEL, raw, response, limiter, reserved) == (2 * raw, 40)
+    assert limiter.tokens == pytest.approx(60000 - 2 * raw - 40, abs=5)
+    assert counter.ratio(MODEL) == pytest.approx(2.0)
+
+
+def test_settle_without_usage_keeps_reservation():
+    limiter = TokenBucketLimiter(60000, 60)
+    limiter.acquire(1000)
+    assert token_budget.settle(MODEL, 10, {}, limiter, 1000) == (0, 0)
+    assert limiter.tokens == pytest.approx(59000, abs=5)
+
+
+def test_fit_text_keeps_whole_leading_lines():
+    text = "\n".join(f"line {i} with some words" for i in range(100))
+    fitted = token_budget.fit_text(text, 60, MODEL)
+    assert fitted.endswith(token_budget.TRUNCATION_NOTE)
+    kept = fitted[:-len(token_budget.TRUNCATION_NOTE)].split("\n")
+    assert kept == [f"line {i} with some words" for i in range(len(kept))]
+    assert token_budget.counter.count(fitted, MODEL) <= 60
+
+
+def test_fit_text_cuts_a_single_long_line():
+    fitted = token_budget.fit_text("word " * 1000, 50, MODEL)
+    assert 0 < len(fitted) - len(token_budget.TRUNCATION_NOTE) < 5000
+    assert token_budget.counter.count(fitted, MODEL) <= 50
+
+
+def test_fit_messages_trims_the_longest_message():
+    messages = [
+        {"role": "system", "content": "Answer briefly. " + "data " * 5000},
+        {"role": "user", "content": "What is shown?"},
+    ]
+    assert token_budget.fit_messages(messages, MODEL, 100, window=10 ** 6) is messages
+    fitted = token_budget.fit_messages(messages, MODEL, 100, window=2000)
+    assert fitted[1] == messages[1]
+    assert fitted[0]["content"].endswith(token_budget.TRUNCATION_NOTE)
+    assert token_budget.counter.count_messages(fitted, MODEL) <= int(2000 * token_budget.CONTEXT_FILL) - 100
+
+
+def test_pack_respects_both_budgets():
+    items = list(range(10))
+    chunks = token_budget.pack(items, [30] * 10, [10] * 10, input_budget=100, output_budget=25)
+    assert [item for chunk in chunks for item in chunk] == items
+    assert all(len(chunk) <= 2 for chunk in chunks)
+
+
+def test_pack_balances_chunk_sizes():
+    chunks = token_budget.pack(list(range(7)), [10] * 7, [0] * 7, input_budget=60, output_budget=1)
+    # Greedy would give 6 + 1; balancing keeps two chunks of similar size
+    assert sorted(len(chunk) for chunk in chunks) == [3, 4]
+
+
+def test_pack_gives_oversized_items_their_own_chunk():
+    chunks = token_budget.pack(["a", "b", "c"], [5, 500, 5], [0, 0, 0], input_budget=100, output_budget=1)
+    assert chunks == [["a"], ["b"], ["c"]]
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+import disk_cache
+import http_client
+import translation
+from rate_limiter import TokenBucketLimiter
+
+
+class FakeResponse:
+    def __init__(self, content: str, status_code: int = 200):
+        self.status_code = status_code
+        self.text = content
+        self.payload = {"choices": [{"message": {"content": content}}],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    """Prompts sent to the API; replies translate by upper-casing the text."""
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(disk_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(translation, "translation_cache", disk_cache.DiskCache("translations"))
+    monkeypatch.setattr(translation, "groq_limiter", TokenBucketLimiter(60000, 1000))
+    sent = []
+
+    def reply(kwargs):
+        text = kwargs["json"]["messages"][0]["content"].rsplit("\n\n", 1)[1].strip()
+        sent.append(text)
+        return FakeResponse(text.upper())
+
+    async def apost(service, path, retry=False, **kwargs):
+        return reply(kwargs)
+
+    monkeypatch.setattr(http_client, "apost", apost)
+    monkeypatch.setattr(http_client, "post", lambda service, path, retry=False, **kwargs: reply(kwargs))
+    return sent
+
+
+def test_translate_text_chunks_and_reassembles_in_order(calls, monkeypatch):
+    monkeypatch.setattr(translation, "TRANSLATION_CHUNK_CHARS", 20)
+    text = "First part here. Second part here.\n\n---\n\nLast one."
+    assert asyncio.run(translation.translate_text(text, "German")) == (
+        "FIRST PART HERE. SECOND PART HERE.\n\n---\n\nLAST ONE."
+    )
+    # The separator has nothing to translate and never reaches the API
+    assert sorted(calls) == ["First part here.", "Last one.", "Second part here."]
+
+
+def test_translate_text_only_sends_uncached_chunks(calls):
+    asyncio.run(translation.translate_text("Alpha.\n\nBeta.", "German"))
+    calls.clear()
+    assert translation.translate_text_sync("Alpha.\n\nGamma.", "German") == "ALPHA.\n\nGAMMA."
+    assert calls == ["Gamma."]
+    # Cached per language
+    asyncio.run(translation.translate_text("Alpha.", "French"))
+    assert calls == ["Gamma.", "Alpha."]
+
+
+def test_failed_request_refunds_its_reservation(calls, monkeypatch):
+    async def failing(service, path, retry=False, **kwargs):
+        return FakeResponse("busy", status_code=503)
+
+    monkeypatch.setattr(http_client, "apost", failing)
+    limiter = translation.groq_limiter
+    before = limiter.tokens
+    with pytest.raises(translation.TranslationError):
+        asyncio.run(translation.translate_chunk("Hello there.", "German"))
+    assert limiter.tokens == pytest.approx(before, abs=50)
+
+
+def test_cancelled_acquire_refunds_once_the_tokens_are_taken(calls, monkeypatch):
+    limiter = translation.groq_limiter
+    release = threading.Event()
+    acquire = limiter.acquire
+
+    def slow_acquire(tokens):
+        release.wait(5)
+        acquire(tokens)
+
+    monkeypatch.setattr(limiter, "acquire", slow_acquire)
+    before = limiter.tokens
+
+    async def cancel_while_waiting():
+        task = asyncio.create_task(translation.translate_chunk("Hello there.", "German"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+        # Let the acquiring thread finish and its refund callback run
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if limiter.tokens == pytest.approx(before, abs=50):
+                break
+
+    asyncio.run(cancel_while_waiting())
+    assert calls == []
+    assert limiter.tokens == pytest.approx(before, abs=50)
@@ -0,0 +1,61 @@
+import io
+import asyncio
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+import tts
+
+
+def wav_bytes(frames: int, samplerate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros((frames, 1), dtype=np.float32), samplerate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts.audio_cache, "root", tmp_path / "audio")
+    monkeypatch.setattr(tts.chunk_cache, "root", tmp_path / "audio_chunks")
+    monkeypatch.setattr(tts.audio_cache, "_total_bytes", None)
+    monkeypatch.setattr(tts.chunk_cache, "_total_bytes", None)
+
+
+def fake_synthesize(fail_on=None):
+    async def synthesize(text, voice, model=tts.TTS_MODEL, response_format="wav"):
+        if text == fail_on:
+            raise tts.TTSError(500, "upstream error")
+        return wav_bytes(100)
+    return synthesize
+
+
+async def collect(stream) -> bytes:
+    return b"".join([part async for part in await stream])
+
+
+def test_synthesize_document_caches_document_and_chunks(monkeypatch):
+    monkeypatch.setattr(tts, "synthesize", fake_synthesize())
+    chunks = ["one", "two", "three"]
+    path = asyncio.run(tts.synthesize_document(chunks, "voice"))
+    data, samplerate = sf.read(path)
+    assert (len(data), samplerate) == (300, 8000)
+    assert tts.chunk_cache.get(tts.chunk_key("two", "voice", tts.TTS_MODEL)) is not None
+    assert tts.cached_document(chunks, "voice") == path
+
+
+def test_failed_chunk_aborts_stream(monkeypatch):
+    monkeypatch.setattr(tts, "synthesize", fake_synthesize(fail_on="three"))
+    chunks = ["one", "two", "three", "four"]
+    with pytest.raises(tts.TTSError) as error:
+        asyncio.run(collect(tts.prepare_wav_stream(chunks, "voice", concurrency=1)))
+    assert "3/4" in error.value.text
+    assert tts.cached_document(chunks, "voice") is None
+
+
+def test_synthesize_document_larger_than_cache(monkeypatch):
+    monkeypatch.setattr(tts, "synthesize", fake_synthesize())
+    monkeypatch.setattr(tts.audio_cache, "max_bytes", 100)
+    with pytest.raises(tts.TTSError) as error:
+        asyncio.run(tts.synthesize_document(["one", "two"], "voice"))
+    assert error.value.status_code == 507
@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+
+import pytest
+
+import workspace
+from workspace import evict_workspaces
+
+
+@pytest.fixture
+def workspaces_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace, "WORKSPACES_DIR", str(tmp_path))
+    monkeypatch.setattr(workspace, "_workspaces", {})
+    # Only the sweeps the tests run themselves
+    monkeypatch.setattr(workspace, "_last_eviction", time.time())
+    return tmp_path
+
+
+def make_idle(workspaces_dir, workspace_id: str):
+    path = workspaces_dir / workspace_id
+    (path / "data").mkdir(parents=True)
+    stamp = time.time() - 7200
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_evicts_only_idle_workspaces(workspaces_dir):
+    make_idle(workspaces_dir, "idle")
+    make_idle(workspaces_dir, "busy")
+    make_idle(workspaces_dir, "merging")
+    busy = workspace.get_workspace("busy")
+    merging = workspace.get_workspace("merging")
+    for path in (workspaces_dir / "busy", workspaces_dir / "merging"):
+        stamp = time.time() - 7200
+        os.utime(path, (stamp, stamp))
+    held = threading.Event()
+    done = threading.Event()
+
+    def merge():
+        with merging.lock:
+            held.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=merge)
+    thread.start()
+    held.wait(5)
+    try:
+        with busy.in_use():
+            assert evict_workspaces(max_age_hours=1) == ["idle"]
+    finally:
+        done.set()
+        thread.join()
+    assert sorted(path.name for path in workspaces_dir.iterdir()) == ["busy", "merging"]
+    assert "idle" not in workspace._workspaces
+
+
+def test_recently_used_workspace_is_kept(workspaces_dir):
+    make_idle(workspaces_dir, "fresh")
+    workspace.get_workspace("fresh").touch()
+    assert evict_workspaces(max_age_hours=1) == []
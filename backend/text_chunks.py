@@ -0,0 +1,45 @@
+import re
+from typing import List
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+
+
+def split_sentences(text: str, max_chars: int) -> List[str]:
+    """Group sentences into chunks shorter than ``max_chars`` (a single long sentence stays whole)."""
+    sentences = SENTENCE_BOUNDARY.split(text)
+    chunks, current = [], ""
+    for sentence in sentences:
+        if len(current) + len(sentence) < max_chars:
+            current += sentence + " "
+        else:
+            if current.strip():
+                chunks.append(current.strip())
+            current = sentence + " "
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def split_paragraphs(text: str, max_chars: int) -> List[List[str]]:
+    """Split text into paragraphs, each a list of chunks no longer than ``max_chars``.
+
+    Paragraphs longer than ``max_chars`` are broken at sentence boundaries. Chunk
+    boundaries depend only on each paragraph's own content, so editing one paragraph
+    leaves every other paragraph's chunks unchanged. Rejoin with ``join_paragraphs``.
+    """
+    paragraphs = []
+    for paragraph in PARAGRAPH_BOUNDARY.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            paragraphs.append([paragraph])
+        else:
+            paragraphs.append(split_sentences(paragraph, max_chars))
+    return paragraphs
+
+
+def join_paragraphs(paragraphs: List[List[str]]) -> str:
+    """Inverse of ``split_paragraphs`` (up to whitespace normalisation)."""
+    return "\n\n".join(" ".join(chunks) for chunks in paragraphs)
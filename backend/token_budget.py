@@ -0,0 +1,196 @@
+import os
+import re
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from metrics import metrics, usage_tokens
+
+# === CONFIGURATION ===
+
+DEFAULT_CONTEXT_WINDOW = 128000
+CONTEXT_WINDOWS = {
+    "Llama-4-Maverick-17B-128E-Instruct-FP8": 128000,
+    "meta-llama/llama-4-maverick-17b-128e-instruct": 131072,
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131072,
+}
+MESSAGE_OVERHEAD_TOKENS = 8  # role header and separators per chat message
+# Fraction of the context window prompts are trimmed to, leaving room for estimation error
+CONTEXT_FILL = float(os.getenv("CONTEXT_FILL", "0.9"))
+# Weight of each reported count when re-calibrating the estimate (exponential moving average)
+CALIBRATION_SMOOTHING = 0.2
+CALIBRATION_BOUNDS = (0.5, 3.0)
+TRUNCATION_NOTE = "\n[... remaining data omitted to fit the model's context window ...]"
+
+# The pre-tokenization split used by Llama 3/4 style BPE tokenizers: contractions,
+# words with their leading space, numbers in groups of up to three digits,
+# punctuation runs and whitespace runs
+TOKEN_PIECES = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+", re.I)
+CHARS_PER_WORD_TOKEN = 6   # long words split into several sub-word tokens
+CHARS_PER_SYMBOL_TOKEN = 2  # punctuation runs like '":' merge pairwise at best
+
+
+def raw_count(text: str) -> int:
+    """Uncalibrated token estimate for ``text`` from its pre-tokenization pieces."""
+    tokens = 0
+    for piece in TOKEN_PIECES.findall(text):
+        stripped = piece.lstrip(" ")
+        if not stripped or stripped[0].isspace():
+            tokens += 1
+        elif stripped[0].isalpha():
+            tokens += (len(stripped) + CHARS_PER_WORD_TOKEN - 1) // CHARS_PER_WORD_TOKEN
+        elif stripped[0].isdigit():
+            tokens += 1
+        else:
+            tokens += (len(stripped) + CHARS_PER_SYMBOL_TOKEN - 1) // CHARS_PER_SYMBOL_TOKEN
+    return tokens
+
+
+def raw_count_messages(messages: Sequence[Dict]) -> int:
+    return sum(raw_count(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def context_window(model: str) -> int:
+    return CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+class TokenCounter:
+    """Prompt token estimates, calibrated per model against the counts the APIs report.
+
+    ``raw_count`` mimics BPE pre-tokenization, which tracks real counts within a
+    stable ratio for a given tokenizer; every reported ``prompt_tokens`` nudges the
+    model's ratio towards ``reported / raw``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ratios: Dict[str, float] = {}
+
+    def ratio(self, model: str) -> float:
+        with self.lock:
+            return self.ratios.get(model, 1.0)
+
+    def scale(self, raw: int, model: str) -> int:
+        return math.ceil(raw * self.ratio(model))
+
+    def count(self, text: str, model: str) -> int:
+        return self.scale(raw_count(text), model)
+
+    def count_messages(self, messages: Sequence[Dict], model: str) -> int:
+        return self.scale(raw_count_messages(messages), model)
+
+    def calibrate(self, model: str, raw: int, reported: int):
+        """Move ``model``'s ratio towards ``reported / raw`` (bounded to CALIBRATION_BOUNDS)."""
+        if raw <= 0 or reported <= 0:
+            return
+        low, high = CALIBRATION_BOUNDS
+        observed = min(max(reported / raw, low), high)
+        with self.lock:
+            current = self.ratios.get(model)
+            self.ratios[model] = observed if current is None else (
+                current + CALIBRATION_SMOOTHING * (observed - current)
+            )
+
+
+counter = TokenCounter()
+
+
+def reserve(messages: Sequence[Dict], model: str, max_tokens: Optional[int]) -> Tuple[int, int]:
+    """(raw prompt estimate, tokens to reserve with a rate limiter) for a request."""
+    raw = raw_count_messages(messages)
+    return raw, counter.scale(raw, model) + (max_tokens or 0)
+
+
+def settle(model: str, raw: int, response: Any, limiter=None, reserved: int = 0) -> Tuple[int, int]:
+    """Account for a finished request from the usage its response reports.
+
+    Calibrates ``counter`` with the reported prompt tokens and, with a ``limiter``,
+    replaces the ``reserved`` estimate by the tokens actually used. Only the attempt
+    that produced ``response`` is settled here; reservations of failed attempts are
+    refunded by the caller (``limiter.refund``). A response without usage keeps its
+    reservation. Returns the reported (prompt, completion) counts.
+    """
+    prompt_tokens, completion_tokens = usage_tokens(response)
+    if prompt_tokens:
+        counter.calibrate(model, raw, prompt_tokens)
+    if limiter is not None and (prompt_tokens or completion_tokens):
+        limiter.settle(reserved, prompt_tokens + completion_tokens)
+    return prompt_tokens, completion_tokens
+
+
+def fit_text(text: str, max_tokens: int, model: str) -> str:
+    """The start of ``text`` within ``max_tokens`` (estimated), with a note if anything was cut.
+
+    Text is cut after the last whole line that fits; a single line that does not
+    fit (e.g. compact JSON) is cut proportionally within the line.
+    """
+    ratio = counter.ratio(model)
+    if math.ceil(raw_count(text) * ratio) <= max_tokens:
+        return text
+    budget = max_tokens - math.ceil(raw_count(TRUNCATION_NOTE) * ratio)
+    kept, used = [], 0.0
+    for line in text.split("\n"):
+        cost = (raw_count(line) + 1) * ratio
+        if used + cost > budget:
+            if budget > used:
+                kept.append(line[:int(len(line) * (budget - used) / cost)])
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept) + TRUNCATION_NOTE
+
+
+def fit_messages(messages: List[Dict], model: str, max_tokens: int,
+                 window: Optional[int] = None) -> List[Dict]:
+    """Trim the longest message so the prompt plus ``max_tokens`` of output fits the context.
+
+    The longest message is the one carrying the video data; its leading lines are
+    kept. Returns ``messages`` unchanged when they already fit.
+    """
+    budget = int((window or context_window(model)) * CONTEXT_FILL) - max_tokens
+    total = counter.count_messages(messages, model)
+    if total <= budget or not messages:
+        return messages
+    longest = max(range(len(messages)), key=lambda i: len(messages[i].get("content") or ""))
+    content = messages[longest]["content"]
+    allowed = max(budget - (total - counter.count(content, model)), 0)
+    trimmed = fit_text(content, allowed, model)
+    print(f"Trimmed prompt for {model} from ~{total:,} to ~{budget:,} tokens "
+          f"({len(content) - len(trimmed):,} characters dropped)")
+    metrics.inc("prompt_tokens_trimmed_total", total - budget, model=model)
+    return [dict(message, content=trimmed) if i == longest else message for i, message in enumerate(messages)]
+
+
+def pack(items: Sequence, input_costs: Sequence[int], output_costs: Sequence[int],
+         input_budget: int, output_budget: int) -> List[List]:
+    """Split ``items`` into consecutive chunks whose summed costs stay within both budgets.
+
+    Greedy packing gives the fewest chunks; the chunks are then evened out (same
+    count, similar sizes) so concurrent requests finish at about the same time.
+    An item over budget on its own still gets a chunk.
+    """
+    weights = [max(i / max(input_budget, 1), o / max(output_budget, 1)) for i, o in zip(input_costs, output_costs)]
+
+    def greedy(capacity: float) -> List[List[int]]:
+        chunks, current, load = [], [], 0.0
+        for position, weight in enumerate(weights):
+            if current and load + weight > capacity:
+                chunks.append(current)
+                current, load = [], 0.0
+            current.append(position)
+            load += weight
+        if current:
+            chunks.append(current)
+        return chunks
+
+    chunks = greedy(1.0)
+    if len(chunks) > 1:
+        # Smallest capacity that still needs no more chunks than greedy packing
+        low, high = sum(weights) / len(chunks), 1.0
+        for _ in range(20):
+            middle = (low + high) / 2
+            if len(greedy(middle)) <= len(chunks):
+                high = middle
+            else:
+                low = middle
+        chunks = greedy(high)
+    return [[items[position] for position in chunk] for chunk in chunks]
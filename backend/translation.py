@@ -0,0 +1,208 @@
+import os
+import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import http_client
+import token_budget
+from rate_limiter import groq_limiter
+from disk_cache import DiskCache, make_cache_key
+from metrics import in_context, metrics
+from text_chunks import split_paragraphs, join_paragraphs
+
+# === CONFIGURATION ===
+
+MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
+TRANSLATION_TEMPERATURE = 0.3  # Lower temperature for more accurate translations
+TRANSLATION_MAX_TOKENS = 4000
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+TRANSLATION_CACHE_MAX_MB = float(os.getenv("TRANSLATION_CACHE_MAX_MB", "100"))
+# Long texts are translated paragraph by paragraph; longer paragraphs are split at sentences
+TRANSLATION_CHUNK_CHARS = int(os.getenv("TRANSLATION_CHUNK_CHARS", "4000"))
+
+PROMPT_TEMPLATE = """
+            Translate the following English text to {language}. Maintain the same tone and style,
+            and ensure all technical terms and proper nouns are accurately preserved.
+            Respond with only the translation:
+
+            {text}
+            """
+
+# Chunks with nothing to translate (separators, emoji-only headings) are passed through
+TRANSLATABLE = re.compile(r"[^\W\d_]")
+
+# Translated chunks keyed by (chunk hash, language, model, prompt template)
+translation_cache = DiskCache("translations", max_bytes=int(TRANSLATION_CACHE_MAX_MB * 1024 * 1024))
+
+
+class TranslationError(Exception):
+    """Raised when the translation API call does not succeed."""
+
+
+def _cache_key(text: str, language: str, model: str) -> str:
+    return make_cache_key(make_cache_key(text), language, model, PROMPT_TEMPLATE, TRANSLATION_TEMPERATURE)
+
+
+def _request_kwargs(text: str, language: str, model: str) -> Dict:
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    if not GROQ_API_KEY:
+        raise TranslationError("GROQ_API_KEY environment variable is not set")
+    return {
+        "headers": {
+            "Authorization": f"Bearer {GROQ_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        "json": {
+            "model": model,
+            "messages": [{"role": "user", "content": PROMPT_TEMPLATE.format(language=language, text=text)}],
+            "temperature": TRANSLATION_TEMPERATURE,
+            "max_tokens": TRANSLATION_MAX_TOKENS
+        }
+    }
+
+
+def _reserve(request_kwargs: Dict, model: str) -> Tuple[int, int]:
+    """(raw prompt estimate, tokens to reserve with the Groq limiter) for a translation request."""
+    return token_budget.reserve(request_kwargs["json"]["messages"], model, TRANSLATION_MAX_TOKENS)
+
+
+def _parse_response(response, language: str, model: str, raw: int, reserved: int) -> str:
+    """The translated text; settles the request's limiter reservation once it has been read."""
+    if response.status_code != 200:
+        print(f"Translation error for {language}: {response.text}")
+        raise TranslationError(f"Translation error: {response.status_code}")
+    res_json = response.json()
+    content = res_json["choices"][0]["message"]["content"]
+    metrics.record_usage("groq", model, res_json)
+    token_budget.settle(model, raw, res_json, groq_limiter, reserved)
+    return content
+
+
+async def _acquire(reserved: int):
+    """``groq_limiter.acquire`` off the event loop; if the caller is cancelled while it
+    waits, the tokens are refunded as soon as the waiting thread has taken them."""
+    acquiring = asyncio.ensure_future(asyncio.to_thread(groq_limiter.acquire, reserved))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        def refund_when_acquired(future):
+            if not future.cancelled() and future.exception() is None:
+                groq_limiter.refund(reserved)
+        acquiring.add_done_callback(refund_when_acquired)
+        raise
+
+
+async def translate_chunk(text: str, language: str, model: str = MODEL,
+                          semaphore: Optional[asyncio.Semaphore] = None) -> str:
+    """Translate one chunk, serving repeated chunks from the cache."""
+    if not TRANSLATABLE.search(text):
+        return text
+    key = _cache_key(text, language, model)
+    cached = translation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    request_kwargs = _request_kwargs(text, language, model)
+    raw, reserved = _reserve(request_kwargs, model)
+
+    async def request() -> str:
+        await _acquire(reserved)
+        settled = False
+        try:
+            with metrics.span("translate.chunk", language=language):
+                response = await http_client.apost("groq", "/chat/completions", retry=True, **request_kwargs)
+            translated = _parse_response(response, language, model, raw, reserved)
+            settled = True
+            return translated
+        finally:
+            # Errors and cancellation give the reservation back
+            if not settled:
+                groq_limiter.refund(reserved)
+
+    if semaphore is None:
+        translated = (await request()).strip()
+    else:
+        async with semaphore:
+            translated = (await request()).strip()
+    translation_cache.set(key, translated)
+    return translated
+
+
+def translate_chunk_sync(text: str, language: str, model: str = MODEL) -> str:
+    """Blocking counterpart of ``translate_chunk`` for code running outside the event loop."""
+    if not TRANSLATABLE.search(text):
+        return text
+    key = _cache_key(text, language, model)
+    cached = translation_cache.get(key)
+    if cached is not None:
+        return cached
+    request_kwargs = _request_kwargs(text, language, model)
+    raw, reserved = _reserve(request_kwargs, model)
+    groq_limiter.acquire(reserved)
+    settled = False
+    try:
+        with metrics.span("translate.chunk", language=language):
+            response = http_client.post("groq", "/chat/completions", retry=True, **request_kwargs)
+        translated = _parse_response(response, language, model, raw, reserved).strip()
+        settled = True
+    finally:
+        if not settled:
+            groq_limiter.refund(reserved)
+    translation_cache.set(key, translated)
+    return translated
+
+
+async def translate_text(text: str, language: str, model: str = MODEL,
+                         semaphore: Optional[asyncio.Semaphore] = None) -> str:
+    """Translate ``text`` chunk by chunk in parallel and reassemble the chunks in order.
+
+    Only chunks that are not already cached reach the API, so editing one paragraph
+    only retranslates that paragraph.
+    """
+    paragraphs = split_paragraphs(text, TRANSLATION_CHUNK_CHARS)
+    chunks = [chunk for paragraph in paragraphs for chunk in paragraph]
+    translated = iter(await asyncio.gather(*(translate_chunk(chunk, language, model, semaphore) for chunk in chunks)))
+    return join_paragraphs([[next(translated) for _ in paragraph] for paragraph in paragraphs])
+
+
+def translate_text_sync(text: str, language: str, model: str = MODEL) -> str:
+    """Blocking counterpart of ``translate_text``; chunks run on a small thread pool."""
+    paragraphs = split_paragraphs(text, TRANSLATION_CHUNK_CHARS)
+    chunks = [chunk for paragraph in paragraphs for chunk in paragraph]
+    with ThreadPoolExecutor(max_workers=max(1, min(TRANSLATION_CONCURRENCY, len(chunks)))) as executor:
+        translated = iter(list(executor.map(in_context(lambda chunk: translate_chunk_sync(chunk, language, model)), chunks)))
+    return join_paragraphs([[next(translated) for _ in paragraph] for paragraph in paragraphs])
+
+
+async def iter_translations(text: str, languages: Iterable[str], model: str = MODEL,
+                            concurrency: int = TRANSLATION_CONCURRENCY) -> AsyncIterator[Tuple[str, str]]:
+    """Translate into every language concurrently and yield ``(language, result)`` as each finishes.
+
+    At most ``concurrency`` chunk requests are in flight across all languages. Failures
+    are yielded as ``"Translation error: ..."`` strings rather than raised, matching /translate.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(language: str) -> Tuple[str, str]:
+        try:
+            return language, await translate_text(text, language, model, semaphore)
+        except TranslationError as e:
+            return language, str(e)
+        except Exception as e:
+            print(f"Exception during translation to {language}: {str(e)}")
+            return language, f"Translation error: {str(e)}"
+
+    # Asking for the same language twice only translates it once
+    tasks = [asyncio.create_task(run(language)) for language in dict.fromkeys(languages)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def translate_many(text: str, languages: List[str], model: str = MODEL) -> Dict[str, str]:
+    """Translate into every language concurrently; results keep the requested language order."""
+    results = {language: result async for language, result in iter_translations(text, languages, model)}
+    return {language: results[language] for language in dict.fromkeys(languages)}
@@ -0,0 +1,234 @@
+import io
+import os
+import struct
+import asyncio
+from collections import deque
+from typing import AsyncIterator, List, Optional, Tuple
+import numpy as np
+import soundfile as sf
+from pathlib import Path
+import http_client
+from metrics import metrics
+from disk_cache import DiskCache, make_cache_key
+from text_chunks import split_paragraphs
+
+# === CONFIGURATION ===
+
+TTS_MODEL = "playai-tts"
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "4"))
+TTS_CHUNK_CHARS = 9000  # Groq's speech endpoint accepts up to 10K characters per request
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "500"))
+TTS_CHUNK_CACHE_MAX_MB = float(os.getenv("TTS_CHUNK_CACHE_MAX_MB", "200"))
+
+# Assembled WAV files and the synthesized chunks they are built from, each evicted
+# least recently used first within its own budget, so large documents cannot push
+# out the chunks that let an edited document be re-synthesized cheaply (and vice versa)
+audio_cache = DiskCache("audio", max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024), binary=True)
+chunk_cache = DiskCache("audio_chunks", max_bytes=int(TTS_CHUNK_CACHE_MAX_MB * 1024 * 1024), binary=True)
+
+
+class TTSError(Exception):
+    """Raised when the speech API does not return audio."""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"TTS request failed with {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+@metrics.timed("tts.chunk")
+async def synthesize(text: str, voice: str, model: str = TTS_MODEL, response_format: str = "wav") -> bytes:
+    """Synthesize one chunk of text with the Groq speech endpoint and return the encoded audio."""
+    response = await http_client.apost(
+        "groq",
+        "/audio/speech",
+        retry=True,
+        headers={
+            "Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "model": model,
+            "input": text,
+            "voice": voice,
+            "response_format": response_format
+        }
+    )
+    if response.status_code != 200:
+        raise TTSError(response.status_code, response.text)
+    return response.content
+
+
+def tts_chunks(text: str) -> List[str]:
+    """Split text into speech chunks: one per paragraph, long paragraphs split at sentences.
+
+    Boundaries depend only on each paragraph, so editing one paragraph leaves the
+    other chunks (and their cached audio) untouched.
+    """
+    return [chunk for paragraph in split_paragraphs(text, TTS_CHUNK_CHARS) for chunk in paragraph]
+
+
+def chunk_key(text: str, voice: str, model: str, response_format: str = "wav") -> str:
+    return make_cache_key("chunk", make_cache_key(text), voice, model, response_format)
+
+
+def document_key(chunks: List[str], voice: str, model: str) -> str:
+    """Key (and ETag) of the assembled WAV for a list of chunks."""
+    return make_cache_key("document", [chunk_key(chunk, voice, model) for chunk in chunks])
+
+
+async def synthesize_cached(text: str, voice: str, model: str = TTS_MODEL, response_format: str = "wav") -> bytes:
+    """``synthesize`` backed by the chunk cache."""
+    key = chunk_key(text, voice, model, response_format)
+    cached = chunk_cache.get(key)
+    if cached is not None:
+        return cached
+    content = await synthesize(text, voice, model, response_format)
+    chunk_cache.set(key, content)
+    return content
+
+
+def cached_document(chunks: List[str], voice: str, model: str = TTS_MODEL) -> Optional[Path]:
+    """Path of the already assembled WAV for ``chunks``, if it is cached."""
+    return audio_cache.path(document_key(chunks, voice, model))
+
+
+def decode_audio(content: bytes) -> Tuple[np.ndarray, int]:
+    """Decode encoded audio bytes in memory into a float32 (frames, channels) array."""
+    data, samplerate = sf.read(io.BytesIO(content), dtype="float32", always_2d=True)
+    return data, samplerate
+
+
+def convert_audio(data: np.ndarray, samplerate: int, target_rate: int, target_channels: int) -> np.ndarray:
+    """Resample (linear interpolation) and up/down-mix ``data`` to the target format."""
+    if data.shape[1] != target_channels:
+        mono = data.mean(axis=1, keepdims=True)
+        data = np.repeat(mono, target_channels, axis=1)
+    if samplerate != target_rate and len(data):
+        frames = int(round(len(data) * target_rate / samplerate))
+        source_times = np.arange(len(data)) / samplerate
+        target_times = np.arange(frames) / target_rate
+        data = np.stack(
+            [np.interp(target_times, source_times, data[:, channel]) for channel in range(data.shape[1])],
+            axis=1
+        ).astype(np.float32)
+    return data
+
+
+def to_pcm16(data: np.ndarray) -> bytes:
+    """Interleaved little-endian 16-bit PCM bytes for a float (frames, channels) array."""
+    return (np.clip(data, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def wav_header(samplerate: int, channels: int, data_bytes: Optional[int] = None) -> bytes:
+    """RIFF/WAVE header for 16-bit PCM; ``data_bytes=None`` marks a stream of unknown length."""
+    block_align = channels * 2
+    riff_size = 0xFFFFFFFF if data_bytes is None else data_bytes + 36
+    data_size = 0xFFFFFFFF if data_bytes is None else data_bytes
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, samplerate, samplerate * block_align, block_align, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+async def prepare_wav_stream(chunks: List[str], voice: str, model: str = TTS_MODEL,
+                             concurrency: int = TTS_CONCURRENCY, cache: bool = True) -> AsyncIterator[bytes]:
+    """Synthesize ``chunks`` concurrently and return a generator of one progressive WAV stream.
+
+    At most ``concurrency`` chunks are in flight or buffered at once, and audio is
+    emitted strictly in chunk order, so memory grows with chunk size rather than
+    podcast length. The output format follows the first chunk; later chunks are
+    resampled/remixed to match. The first chunk is awaited before returning so its
+    errors (TTSError) surface before any response bytes are sent; a later chunk that
+    fails raises TTSError from the generator, which aborts the response instead of
+    ending it as a short but valid-looking WAV.
+
+    With ``cache`` set, chunks come from the audio cache when possible and the
+    complete stream is also saved as the document's cached WAV once it finishes.
+    """
+    synthesize_chunk = synthesize_cached if cache else synthesize
+    pending = deque()
+    remaining = iter(chunks)
+
+    def launch_next():
+        chunk = next(remaining, None)
+        if chunk is not None:
+            pending.append(asyncio.create_task(synthesize_chunk(chunk, voice, model)))
+
+    for _ in range(max(1, concurrency)):
+        launch_next()
+    if not pending:
+        raise TTSError(400, "No text to synthesize")
+
+    try:
+        first, samplerate = decode_audio(await pending.popleft())
+    except Exception:
+        for task in pending:
+            task.cancel()
+        raise
+    launch_next()
+    channels = first.shape[1]
+    buffered = [first]
+    key = document_key(chunks, voice, model) if cache else None
+
+    async def generate():
+        tmp_path = audio_cache.temp_file(key) if key else None
+        out = open(tmp_path, "wb") if tmp_path else None
+        written = 0
+        completed = False
+        try:
+            header = wav_header(samplerate, channels)
+            if out:
+                out.write(header)
+            yield header
+            for position in range(len(chunks)):
+                if buffered:
+                    pcm = to_pcm16(buffered.pop())
+                else:
+                    try:
+                        data, rate = decode_audio(await pending.popleft())
+                    except Exception as e:
+                        print(f"TTS chunk {position + 1}/{len(chunks)} failed after {written} bytes: {e}")
+                        metrics.inc("tts_stream_failures_total")
+                        raise TTSError(getattr(e, "status_code", 502), f"Chunk {position + 1}/{len(chunks)} failed: "
+                                                                       f"{getattr(e, 'text', e)}") from e
+                    launch_next()
+                    pcm = to_pcm16(convert_audio(data, rate, samplerate, channels))
+                if out:
+                    out.write(pcm)
+                written += len(pcm)
+                yield pcm
+            completed = True
+        finally:
+            for task in pending:
+                task.cancel()
+            if out:
+                if completed:
+                    # Patch in the real sizes so the cached copy is a regular, seekable WAV
+                    out.seek(0)
+                    out.write(wav_header(samplerate, channels, written))
+                    out.close()
+                    audio_cache.put_file(key, tmp_path)
+                else:
+                    out.close()
+                    os.remove(tmp_path)
+
+    return generate()
+
+
+async def synthesize_document(chunks: List[str], voice: str, model: str = TTS_MODEL) -> Path:
+    """Return the path of the cached WAV for ``chunks``, synthesizing only uncached chunks.
+
+    Raises TTSError if the assembled WAV does not stay in the audio cache (it is
+    larger than TTS_CACHE_MAX_MB).
+    """
+    path = cached_document(chunks, voice, model)
+    if path is not None:
+        return path
+    async for _ in await prepare_wav_stream(chunks, voice, model):
+        pass
+    path = cached_document(chunks, voice, model)
+    if path is None:
+        raise TTSError(507, "Synthesized audio is larger than the audio cache (TTS_CACHE_MAX_MB)")
+    return path
@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from document_store import document_store
+
+# === CONFIGURATION ===
+
+DEFAULT_WORKSPACE = "default"
+WORKSPACES_DIR = os.getenv("WORKSPACES_DIR", "data/workspaces")
+WORKSPACE_MAX_AGE_HOURS = float(os.getenv("WORKSPACE_MAX_AGE_HOURS", "72"))
+WORKSPACE_EVICT_INTERVAL = 600  # seconds between eviction sweeps
+
+WORKSPACE_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class WorkspaceError(ValueError):
+    """Raised for malformed workspace IDs or paths that escape a workspace."""
+
+
+def atomic_write_text(path: Union[str, Path], text: str):
+    """Write ``text`` to ``path`` via a temp file and rename, so readers never see a partial file.
+
+    The in-memory document store is notified so the next read sees the new version.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        document_store.invalidate(path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: Union[str, Path], data, indent: Optional[int] = 2):
+    """``atomic_write_text`` for JSON data."""
+    atomic_write_text(path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+
+class Workspace:
+    """The set of files one user or job works on.
+
+    Every workspace uses the same relative layout (``data/output/final.json``,
+    ``podcasts/full_podcast.txt``, ...) under its own root. The default workspace's
+    root is the current directory, so it keeps the original single-user paths.
+    """
+
+    def __init__(self, workspace_id: str, root: Path):
+        self.id = workspace_id
+        self.root = root
+        self.lock = threading.RLock()  # serializes merges/rebuilds within this workspace
+        self.active = 0
+
+    @property
+    def is_default(self) -> bool:
+        return self.id == DEFAULT_WORKSPACE
+
+    @property
+    def output_dir(self) -> Path:
+        return self.root / "data" / "output"
+
+    @property
+    def final_json(self) -> Path:
+        return self.output_dir / "final.json"
+
+    @property
+    def index_dir(self) -> Path:
+        return self.output_dir / "index"
+
+    @property
+    def podcasts_dir(self) -> Path:
+        return self.root / "podcasts"
+
+    @property
+    def podcast_text(self) -> Path:
+        return self.podcasts_dir / "full_podcast.txt"
+
+    def video_output_path(self, video_id: str) -> Path:
+        return self.output_dir / f"youtube_{video_id}_enhanced.json"
+
+    def episode_sources(self) -> List[Path]:
+        """Per-video JSON files that podcast episodes are generated from.
+
+        The default workspace keeps using the sample files in ``data/``; other
+        workspaces use their own video analyses.
+        """
+        if self.is_default:
+            return sorted((self.root / "data").glob("*.json"))
+        return sorted(self.output_dir.glob("youtube_*_enhanced.json"))
+
+    def resolve(self, relative_path: str) -> Path:
+        """Resolve a client-supplied relative path inside this workspace."""
+        if self.is_default:
+            return Path(relative_path)
+        path = (self.root / relative_path).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise WorkspaceError(f"Path escapes workspace: {relative_path}")
+        return path
+
+    def touch(self):
+        """Mark the workspace as recently used (eviction is based on this)."""
+        if not self.is_default:
+            self.root.mkdir(parents=True, exist_ok=True)
+            os.utime(self.root)
+
+    @contextmanager
+    def in_use(self):
+        """Keep the workspace from being evicted while a job works in it."""
+        with _registry_lock:
+            self.active += 1
+        try:
+            yield self
+        finally:
+            with _registry_lock:
+                self.active -= 1
+            self.touch()
+
+    def clear_output(self):
+        """Remove everything in this workspace's output folder."""
+        if self.output_dir.exists():
+            for file_path in self.output_dir.glob("*"):
+                if file_path.is_file():
+                    file_path.unlink()
+                elif file_path.is_dir():
+                    shutil.rmtree(file_path)
+
+
+_workspaces: Dict[str, Workspace] = {}
+_registry_lock = threading.Lock()
+_last_eviction = 0.0
+
+
+def get_workspace(workspace_id: Optional[str] = None) -> Workspace:
+    """Return the workspace for ``workspace_id`` (the default one when empty)."""
+    workspace_id = workspace_id or DEFAULT_WORKSPACE
+    if not WORKSPACE_ID.fullmatch(workspace_id):
+        raise WorkspaceError("Workspace IDs may only contain letters, digits, '-' and '_' (max 64)")
+    with _registry_lock:
+        workspace = _workspaces.get(workspace_id)
+        if workspace is None:
+            root = Path(".") if workspace_id == DEFAULT_WORKSPACE else Path(WORKSPACES_DIR) / workspace_id
+            workspace = _workspaces[workspace_id] = Workspace(workspace_id, root)
+    workspace.touch()
+    maybe_evict()
+    return workspace
+
+
+def maybe_evict():
+    """Run ``evict_workspaces`` at most once per WORKSPACE_EVICT_INTERVAL."""
+    global _last_eviction
+    now = time.time()
+    with _registry_lock:
+        if now - _last_eviction < WORKSPACE_EVICT_INTERVAL:
+            return
+        _last_eviction = now
+    evict_workspaces()
+
+
+def _unused_since(path: Path, cutoff: float) -> bool:
+    try:
+        return path.is_dir() and path.stat().st_mtime <= cutoff
+    except OSError:
+        return False
+
+
+def evict_workspaces(max_age_hours: float = WORKSPACE_MAX_AGE_HOURS) -> List[str]:
+    """Delete workspaces unused for ``max_age_hours``.
+
+    Workspaces a job is using, or whose lock is held (a merge or index rebuild),
+    are skipped; the others are deleted while holding their lock.
+    """
+    root = Path(WORKSPACES_DIR)
+    if not root.exists():
+        return []
+    evicted = []
+    cutoff = time.time() - max_age_hours * 3600
+    for path in root.iterdir():
+        if not _unused_since(path, cutoff):
+            continue
+        with _registry_lock:
+            workspace = _workspaces.get(path.name)
+            if workspace is None:
+                workspace = _workspaces[path.name] = Workspace(path.name, path)
+            if workspace.active:
+                continue
+        if not workspace.lock.acquire(blocking=False):
+            continue
+        try:
+            # Re-check now that no merge can start: a job or request may have come in since
+            with _registry_lock:
+                if workspace.active or not _unused_since(path, cutoff):
+                    continue
+            shutil.rmtree(path, ignore_errors=True)
+            with _registry_lock:
+                if not workspace.active:
+                    _workspaces.pop(path.name, None)
+        finally:
+            workspace.lock.release()
+        evicted.append(path.name)
+    if evicted:
+        print(f"Evicted {len(evicted)} idle workspace(s): {', '.join(evicted)}")
+    return evicted
@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from youtube_transcript_api import YouTubeTranscriptApi
+from disk_cache import DiskCache, make_cache_key
+from metrics import metrics
+
+# === CONFIGURATION ===
+
+YOUTUBE_OEMBED_URL = os.getenv("YOUTUBE_OEMBED_URL", "https://www.youtube.com/oembed")
+# When set, transcripts are fetched as JSON from "<YOUTUBE_TRANSCRIPT_URL>/<video_id>"
+# (e.g. a local stub) instead of through youtube-transcript-api.
+YOUTUBE_TRANSCRIPT_URL = os.getenv("YOUTUBE_TRANSCRIPT_URL")
+YOUTUBE_CACHE_TTL_HOURS = float(os.getenv("YOUTUBE_CACHE_TTL_HOURS", "24"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "8"))
+HTTP_TIMEOUT = float(os.getenv("YOUTUBE_HTTP_TIMEOUT", "15"))
+
+title_cache = DiskCache("titles", max_age_seconds=YOUTUBE_CACHE_TTL_HOURS * 3600)
+transcript_cache = DiskCache("transcripts", max_age_seconds=YOUTUBE_CACHE_TTL_HOURS * 3600)
+
+# One pooled session so oEmbed lookups reuse keep-alive connections
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=PREFETCH_WORKERS))
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=PREFETCH_WORKERS))
+
+
+def fetch_title(video_id: str) -> Optional[str]:
+    """Return the video title from the cache or the oEmbed endpoint."""
+    key = make_cache_key("title", video_id)
+    title = title_cache.get(key)
+    if title is not None:
+        return title
+    try:
+        with metrics.span("youtube.title"):
+            response = session.get(
+                YOUTUBE_OEMBED_URL,
+                params={"url": f"https://www.youtube.com/watch?v={video_id}", "format": "json"},
+                timeout=HTTP_TIMEOUT
+            )
+        if response.status_code != 200:
+            return None
+        title = response.json()["title"]
+    except Exception as e:
+        print(f"Error fetching video title: {e}")
+        return None
+    title_cache.set(key, title)
+    return title
+
+
+def fetch_raw_transcript(video_id: str) -> Optional[List[Dict]]:
+    """Return the raw transcript segments (text, start, duration) from the cache or upstream."""
+    key = make_cache_key("transcript", video_id)
+    transcript = transcript_cache.get(key)
+    if transcript is not None:
+        return transcript
+    try:
+        with metrics.span("youtube.transcript", video_id=video_id):
+            if YOUTUBE_TRANSCRIPT_URL:
+                response = session.get(f"{YOUTUBE_TRANSCRIPT_URL.rstrip('/')}/{video_id}", timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+                transcript = response.json()
+            else:
+                transcript = YouTubeTranscriptApi.get_transcript(video_id)
+    except Exception as e:
+        print(f"Error fetching transcript for {video_id}: {e}")
+        return None
+    transcript_cache.set(key, transcript)
+    return transcript
+
+
+def prefetch(video_ids: List[str], max_workers: Optional[int] = None):
+    """Resolve titles and transcripts for a whole batch in parallel, warming the caches."""
+    video_ids = list(dict.fromkeys(video_ids))
+    if not video_ids:
+        return
+    workers = max(1, min(max_workers or PREFETCH_WORKERS, len(video_ids) * 2))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        titles = [executor.submit(fetch_title, video_id) for video_id in video_ids]
+        transcripts = [executor.submit(fetch_raw_transcript, video_id) for video_id in video_ids]
+        resolved = sum(1 for future in transcripts if future.result() is not None)
+        for future in titles:
+            future.result()
+    print(f"Prefetched {resolved}/{len(video_ids)} transcript(s)")
+
+
+def cache_stats() -> Dict:
+    """Hit/miss counters for the title and transcript caches."""
+    return {"titles": title_cache.stats(), "transcripts": transcript_cache.stats()}
@@ -79,7 +79,23 @@ function YouTubeSelector({ onVideosSelected }) {
       
       if (!res.ok) throw new Error('Failed to process videos');
       
-      const data = await res.json();
+      // Processing runs as a background job; poll it until it finishes
+      const { job_id: jobId } = await res.json();
+      let job;
+      while (true) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const jobRes = await fetch(`http://localhost:8000/jobs/${jobId}`);
+        if (!jobRes.ok) throw new Error('Failed to fetch job status');
+        job = await jobRes.json();
+        if (!['queued', 'running'].includes(job.status)) break;
+        // Progress is keyed by video URL, next to job-wide entries such as "summary"
+        const progress = job.progress || {};
+        const done = videos.filter(v => ['done', 'reused'].includes(progress[v.url]?.status)).length;
+        setProcessingStatus(`Processing videos... (${done}/${videos.length} done)`);
+      }
+      if (job.status !== 'completed') throw new Error(`Video processing ${job.status}: ${job.error || ''}`);
+      
+      const data = job.result;
       
       if (data.summarization && data.summarization.response) {
         setProcessingStatus('Videos processed and summarized successfully!');